@@ -10,6 +10,7 @@ from pointcloudset.config import (
     GET_CLUSTER_CORE_QUERY_CHUNK_SIZE,
     GET_CLUSTER_MEMORY_BUDGET_MB,
 )
+from pointcloudset.pipeline.execution import kernel_workers
 
 
 def _budgeted_chunk_size(requested: int, max_neighbors: int, budget_bytes: int) -> int:
@@ -28,14 +29,17 @@ def _budgeted_chunk_size(requested: int, max_neighbors: int, budget_bytes: int)
     return max(1, min(requested, max_points))
 
 
-def get_cluster_labels(xyz: np.ndarray, eps: float, min_points: int) -> pandas.DataFrame:
+def get_cluster_labels(xyz: np.ndarray, eps: float, min_points: int, tree: KDTree | None = None) -> pandas.DataFrame:
     """Return DBSCAN labels for ``xyz`` coordinates.
 
     The implementation follows canonical DBSCAN with core connectivity via
-    union-find and border attachment in a second pass.
+    union-find and border attachment in a second pass. A ``tree`` of ``xyz``, for
+    example from :attr:`pointcloudset.pointcloud.PointCloud.spatial_index`, is reused
+    instead of building a new one.
     """
     n = len(xyz)
-    tree = KDTree(xyz)
+    tree = KDTree(xyz) if tree is None else tree
+    workers = kernel_workers()
 
     # Stage 1: identify core points via count-only batch query (no edge storage).
     # Chunking keeps the count array allocation predictable for very large clouds.
@@ -43,7 +47,7 @@ def get_cluster_labels(xyz: np.ndarray, eps: float, min_points: int) -> pandas.D
     chunk = max(1, min(n, 100_000))
     for start in range(0, n, chunk):
         end = min(start + chunk, n)
-        counts[start:end] = tree.query_ball_point(xyz[start:end], eps, workers=-1, return_length=True)
+        counts[start:end] = tree.query_ball_point(xyz[start:end], eps, workers=workers, return_length=True)
     is_core = counts >= min_points
     budget_bytes = int(GET_CLUSTER_MEMORY_BUDGET_MB * 1024 * 1024)
 
@@ -69,7 +73,7 @@ def get_cluster_labels(xyz: np.ndarray, eps: float, min_points: int) -> pandas.D
     for start in range(0, n_core, edge_chunk):
         end = min(start + edge_chunk, n_core)
         batch_idx = core_idx[start:end]
-        nbr_lists = tree.query_ball_point(xyz[batch_idx], eps, workers=-1)
+        nbr_lists = tree.query_ball_point(xyz[batch_idx], eps, workers=workers)
         left_pairs: list[int] = []
         right_pairs: list[int] = []
         for local_i, nbrs in enumerate(nbr_lists):
@@ -109,7 +113,7 @@ def get_cluster_labels(xyz: np.ndarray, eps: float, min_points: int) -> pandas.D
     for start in range(0, len(non_core_idx), border_chunk):
         end = min(start + border_chunk, len(non_core_idx))
         batch_idx = non_core_idx[start:end]
-        nbr_lists = tree.query_ball_point(xyz[batch_idx], eps, workers=-1)
+        nbr_lists = tree.query_ball_point(xyz[batch_idx], eps, workers=workers)
         for local_i, nbrs in enumerate(nbr_lists):
             i_global = int(batch_idx[local_i])
             for j_global in nbrs:
@@ -3,6 +3,7 @@ Global definitions for the library.
 """
 
 import operator
+from pathlib import Path
 
 OPS = {
     ">": operator.gt,
@@ -18,3 +19,38 @@ PLOTLYSIZELIMIT = 300000
 GET_CLUSTER_CORE_QUERY_CHUNK_SIZE = 1024
 GET_CLUSTER_BORDER_QUERY_CHUNK_SIZE = 4096
 GET_CLUSTER_MEMORY_BUDGET_MB = 1536.0
+
+# Number of points per kNN query of the statistical outlier filter, which bounds the
+# memory of the neighbour distances.
+STATISTICAL_OUTLIER_QUERY_CHUNK_SIZE = 65536
+
+# Memory budget of the neighbourhoods of PointCloud.estimate_normals, which are
+# processed in chunks of points.
+NORMALS_MEMORY_BUDGET_MB = 256.0
+
+# Number of plane hypotheses PointCloud.plane_segmentation fits and scores at once, and
+# number of random points they are scored on before the best ones are scored on all
+# points. Pointclouds up to this size are always scored on all points.
+RANSAC_BATCH_SIZE = 64
+RANSAC_PREVIEW_SIZE = 4096
+
+# Target memory per dask task when Dataset.apply groups pointclouds with batch_size="auto".
+# Dataset.agg keeps dense per point statistics only while they fit it, larger
+# original_ids (or pointclouds) use the dask groupby instead.
+DATASET_BATCH_TARGET_MB = 64.0
+
+# Number of histogram bins per point used to approximate the percentiles of
+# Dataset.agg(depth="point", percentiles=...).
+DATASET_AGG_PERCENTILE_BINS = 64
+# Accuracy parameter k of the quantile sketches of Dataset.quantile. The rank error is
+# typically below 4 / k, the memory about 3 * k values per column.
+DATASET_QUANTILE_SKETCH_K = 2048
+
+# Memory limit of a pipeline.frame_store.FrameStore. Pointclouds beyond it are spilled
+# to a local scratch directory.
+FRAME_STORE_MEMORY_LIMIT_MB = 8192.0
+
+# Default directory and size limit of the checkpoints written by Dataset.persist_to and
+# Dataset.apply(checkpoint=True).
+CHECKPOINT_DIR = Path.home().joinpath(".cache", "pointcloudset", "checkpoints")
+CHECKPOINT_MAX_SIZE_GB = 20.0
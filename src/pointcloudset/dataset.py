@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from collections.abc import Callable
+import datetime
+from collections.abc import Callable, Sequence
 from pathlib import Path
 from typing import Any, Literal, get_type_hints
 
@@ -8,10 +9,22 @@ import numpy as np
 import pandas
 import plotly.graph_objects as go
 from dask import delayed
+from dask.base import tokenize
 
+from pointcloudset.config import DATASET_BATCH_TARGET_MB
 from pointcloudset.dataset_core import DatasetCore
 from pointcloudset.io import DATASET_FROM_FILE, DATASET_FROM_INSTANCE, DATASET_TO_FILE
+from pointcloudset.pipeline.aggregate import percentile_name
+from pointcloudset.pipeline.batch import auto_batch_size, batch_slices, delayed_batch, run_batch
+from pointcloudset.pipeline.checkpoint import CheckpointCache, function_fingerprint, persist, source_fingerprint
 from pointcloudset.pipeline.delayed_result import DelayedResult
+from pointcloudset.pipeline.execution import Execution, kernel_workers_context
+from pointcloudset.pipeline.frame_index import FrameIndex, pointcloud_bounds
+from pointcloudset.pipeline.occupancy import VoxelGrid, dataset_voxel_occupancy
+from pointcloudset.pipeline.rolling import Rolling
+from pointcloudset.pipeline.scan import scan
+from pointcloudset.pipeline.sketch import dataset_histograms, dataset_sketches
+from pointcloudset.pipeline.time_groupby import TimeGroupBy
 from pointcloudset.plot.dataset import animate_dataset
 from pointcloudset.pointcloud import PointCloud
 
@@ -34,24 +47,146 @@ class Dataset(DatasetCore):
     section of the docu.
     """
 
-    def __getitem__(self, pointcloud_number: slice | int) -> DatasetCore | PointCloud:
+    def __getitem__(self, pointcloud_number: slice | int | Sequence | np.ndarray) -> DatasetCore | PointCloud:
+        """A single PointCloud for an int, otherwise a lazy Dataset.
+
+        Besides slices, a sequence or array of pointcloud numbers in increasing order and
+        a boolean mask with one value per pointcloud select pointclouds without
+        computing them, like numpy fancy indexing.
+
+        Raises:
+            TypeError: If the type of pointcloud_number is not supported.
+            IndexError: If a pointcloud number is out of range or the mask has the wrong
+                length.
+            ValueError: If the selected pointclouds are not in increasing order of time.
+
+        Examples:
+
+            .. code-block:: python
+
+                dataset[[0, 5, 7]]
+                dataset[np.array(dataset.timestamps) > start]
+        """
         if isinstance(pointcloud_number, slice):
             data = self.data[pointcloud_number]
             timestamps = self.timestamps[pointcloud_number]
             meta = self.meta
-            return Dataset(data, timestamps, meta)
-        elif isinstance(pointcloud_number, int):
-            df = self.data[pointcloud_number].compute()
+            frames = range(len(self))[pointcloud_number]
+            return Dataset(
+                data,
+                timestamps,
+                meta,
+                execution=self.execution,
+                fingerprint=lambda: tokenize(self.fingerprint, frames.start, frames.stop, frames.step),
+                frame_bounds=None if self.frame_bounds is None else self.frame_bounds[pointcloud_number],
+            )
+        elif isinstance(pointcloud_number, int | np.integer):
+            df = self.execution.for_single_task().compute(self.data[pointcloud_number])[0]
             timestamp = self.timestamps[pointcloud_number]
             return PointCloud(data=df, orig_file=self.meta["orig_file"], timestamp=timestamp)
+        elif isinstance(pointcloud_number, Sequence | np.ndarray) and not isinstance(pointcloud_number, str):
+            return self._take(self._pointcloud_numbers(pointcloud_number))
         else:
             raise TypeError(f"Wrong type {type(pointcloud_number).__name__}")
 
+    def _pointcloud_numbers(self, selection: Sequence | np.ndarray) -> np.ndarray:
+        selection = np.asarray(selection)
+        if selection.ndim != 1:
+            raise IndexError(f"expecting a one dimensional index, got {selection.ndim} dimensions")
+        if selection.dtype == bool:
+            if len(selection) != len(self):
+                raise IndexError(f"boolean mask has {len(selection)} values for {len(self)} pointclouds")
+            return np.flatnonzero(selection)
+        if len(selection) == 0:
+            return np.empty(0, dtype=np.intp)
+        if selection.dtype.kind not in "iu":
+            raise TypeError(f"Wrong type {selection.dtype} of the pointcloud numbers")
+        if np.any((selection < -len(self)) | (selection >= len(self))):
+            raise IndexError(f"pointcloud number out of range for {len(self)} pointclouds")
+        return np.where(selection < 0, selection + len(self), selection).astype(np.intp)
+
+    def _take(self, numbers: np.ndarray) -> Dataset:
+        """Lazy Dataset with the pointclouds with these numbers."""
+        return Dataset(
+            data=[self.data[number] for number in numbers],
+            timestamps=[self.timestamps[number] for number in numbers],
+            meta=self.meta,
+            execution=self.execution,
+            fingerprint=lambda: tokenize(self.fingerprint, "take", numbers),
+            frame_bounds=None if self.frame_bounds is None else self.frame_bounds[numbers],
+        )
+
+    def decimate(self, every: int, offset: int = 0) -> Dataset:
+        """Every n-th pointcloud, for example for a preview of a long recording. Lazy, no
+        pointcloud is computed.
+
+        Args:
+            every (int): Keep every n-th pointcloud.
+            offset (int, optional): Number of the first pointcloud to keep. Defaults
+                to 0.
+
+        Returns:
+            Dataset: Dataset with the pointclouds ``offset, offset + every, ...``.
+
+        Raises:
+            ValueError: If every is less than 1 or offset is negative.
+
+        Examples:
+
+            .. code-block:: python
+
+                preview = dataset.decimate(10)
+        """
+        if every < 1:
+            raise ValueError(f"every must be >= 1, got {every}")
+        if offset < 0:
+            raise ValueError(f"offset must be >= 0, got {offset}")
+        return self[offset::every]
+
+    def resample(self, period: datetime.timedelta | str, how: Literal["first", "last"] = "first") -> Dataset:
+        """One pointcloud per time period, for example to reduce a recording to a fixed
+        rate. Lazy, no pointcloud is computed.
+
+        The periods start at the first timestamp. Periods without a pointcloud are
+        skipped.
+
+        Args:
+            period (datetime.timedelta | str): Length of the periods, a timedelta or a
+                pandas offset string like ``"1s"`` or ``"200ms"``.
+            how ("first" | "last", optional): Keep the first or the last pointcloud of
+                each period. Defaults to "first".
+
+        Returns:
+            Dataset: Dataset with at most one pointcloud per period.
+
+        Raises:
+            ValueError: If period is not positive or how is not supported.
+
+        Examples:
+
+            .. code-block:: python
+
+                one_hz = dataset.resample("1s")
+        """
+        if how not in ("first", "last"):
+            raise ValueError(f"how must be 'first' or 'last', got {how}")
+        period = pandas.to_timedelta(period)
+        if period <= pandas.Timedelta(0):
+            raise ValueError(f"period must be positive, got {period}")
+        if len(self) == 0:
+            return self[:]
+        numbers = pandas.Series(np.arange(len(self)), index=pandas.DatetimeIndex(self.timestamps))
+        resampled = numbers.resample(period, origin="start")
+        selected = resampled.first() if how == "first" else resampled.last()
+        return self._take(selected.dropna().to_numpy(dtype=np.intp))
+
     @classmethod
     def from_file(cls, file_path: Path, **kwargs):
         """Reads a Dataset from a file.gfile
         For larger ROS bagfiles files use the commandline tool pointcloudset to convert
-        the ROS file beforehand.
+        the ROS file beforehand, or pass a
+        :class:`pointcloudset.pipeline.frame_store.FrameStore` as ``frame_store`` which
+        spills the pointclouds beyond its memory limit to a local scratch directory.
 
         Supported are the native format which is a directore filled with parquet frames and
         ROS bag files (.bag).
@@ -81,6 +216,9 @@ class Dataset(DatasetCore):
             .. code-block:: python
 
                 pointcloudset.Dataset.from_file(bag_file, topic="lidar/points", keep_zeros=False)
+                pointcloudset.Dataset.from_file(
+                    bag_file, topic="lidar/points", frame_store=FrameStore(memory_limit_mb=16_000)
+                )
         """
         from_dir = False
         from_dir = False
@@ -99,9 +237,14 @@ class Dataset(DatasetCore):
             raise ValueError((f"Unsupported file format {ext}; supported formats are: {{DATASET_FROM_FILE.keys()}}"))
         res = DATASET_FROM_FILE[ext](file_path, ext=ext, **kwargs)
         meta = res["meta"]
-        out = cls(data=res["data"], timestamps=res["timestamps"], meta=meta)
+        frame_bounds = meta.pop("frame_bounds", None)
+        fingerprint = source_fingerprint(file_path, **kwargs)
+        out = cls(data=res["data"], timestamps=res["timestamps"], meta=meta, fingerprint=fingerprint)
         if from_dir:
             out = out._replace_nan_frames_with_empty(res["empty_data"])
+            out._fingerprint = fingerprint
+            if frame_bounds is not None and len(frame_bounds) == len(out):
+                out.frame_bounds = np.array(frame_bounds, dtype=np.float64).reshape(-1, 6)
         return out
 
     def to_file(self, file_path: Path = Path(), **kwargs) -> None:
@@ -143,6 +286,7 @@ class Dataset(DatasetCore):
             .. code-block:: python
 
                 pointcloudset.Dataset.from_instance("pointclouds", [pc1, pc2])
+                pointcloudset.Dataset.from_instance("pointclouds", pointclouds, frame_store=FrameStore())
 
         """
         library = library.upper()
@@ -155,23 +299,44 @@ class Dataset(DatasetCore):
         self,
         func: Callable[[PointCloud], PointCloud] | Callable[[PointCloud], Any],
         warn: bool = True,
+        batch_size: int | Literal["auto"] | None = None,
+        checkpoint: bool | Path = False,
         **kwargs,
     ) -> Dataset | DelayedResult:
         """Applies a function to the dataset. It is also possible to pass keyword
         arguments.
 
+        By default one dask task is generated per pointcloud. For datasets with many
+        small pointclouds the scheduler overhead of these tasks can dominate the
+        runtime. With ``batch_size`` consecutive pointclouds are grouped into one task.
+        The results are the same and stay in order.
+
         Args:
             func (Union[Callable[[PointCloud], PointCloud], Callable[[PointCloud], Any]]): Function to
                 apply. If it returns a PointCloud and has the according type hint a new
                 Dataset will be generated.
             warn (bool): If ``True`` warning if result is not a Dataset, if ``False``
                 warning is turned off.
+            batch_size (int | "auto" | None, optional): Number of consecutive pointclouds
+                processed in one dask task. If "auto" the batch size is chosen from the
+                memory usage of the first pointcloud and
+                :data:`pointcloudset.config.DATASET_BATCH_TARGET_MB`. Defaults to
+                ``None``, which means one task per pointcloud.
+            checkpoint (bool | pathlib.Path, optional): If ``True`` or a cache directory,
+                the resulting Dataset is computed right away and written to the cache, or
+                read from it if the same function was already applied to the same data.
+                See :meth:`persist_to`. Only for functions which return a PointCloud.
+                Defaults to ``False``.
             **kwargs: Keyword arguments to pass to func.
 
         Returns:
             Union[Dataset, DelayedResult]: A Dataset if the function returns a PointCloud,
             otherwise a DelayedResult object which is a tuple of dask delayed objects.
 
+        Raises:
+            ValueError: If ``checkpoint`` is used with a function which does not return a
+                PointCloud.
+
         Examples:
 
             .. code-block:: python
@@ -195,15 +360,38 @@ class Dataset(DatasetCore):
                     return pointcloud.data.x.max() + test
 
                 dataset.apply(func, test=10)
+
+            .. code-block:: python
+
+                dataset.apply(func, batch_size=100)
+
+            .. code-block:: python
+
+                dataset.apply(remove_ground, checkpoint=True)
         """
         returns_pointcloud = _is_pipline_returing_pointcloud(func, warn=warn)
-        columns = list(self[0].data.columns)
+        if checkpoint is not False and not returns_pointcloud:
+            raise ValueError("checkpoint needs a function which returns a PointCloud with the according type hint")
+        if returns_pointcloud:
+
+            def fingerprint():
+                return tokenize(self.fingerprint, function_fingerprint(func, kwargs))
+
+            if checkpoint is not False:
+                cache = CheckpointCache(None if checkpoint is True else checkpoint)
+                applied = self.apply(func, warn=warn, batch_size=batch_size, **kwargs)
+                return persist(applied, cache)
+        # threads for KDTree queries etc. inside func, so that the tasks running in
+        # parallel do not oversubscribe the CPU
+        kernel_workers = self.execution.kernel_workers()
 
         if returns_pointcloud:
 
             def pipeline_delayed(element_in, timestamp):
                 pointcloud_in = PointCloud(data=element_in, timestamp=timestamp)
-                pointcloud = func(pointcloud_in, **kwargs)
+                columns = list(pointcloud_in.columns)
+                with kernel_workers_context(kernel_workers):
+                    pointcloud = func(pointcloud_in, **kwargs)
                 if not pointcloud._has_data():
                     pointcloud = PointCloud(columns=columns)
                 return pointcloud.data  # to generate an empty pointcloud
@@ -212,17 +400,253 @@ class Dataset(DatasetCore):
 
             def pipeline_delayed(element_in, timestamp):
                 pointcloud = PointCloud(data=element_in, timestamp=timestamp)
-                return func(pointcloud, **kwargs)
-
-        res = []
-        for i in range(0, len(self)):
-            item = delayed(pipeline_delayed)(self.data[i], self.timestamps[i])
-            res.append(item)
-
+                with kernel_workers_context(kernel_workers):
+                    return func(pointcloud, **kwargs)
+
+        if batch_size == "auto":
+            frame_nbytes = int(self[0].data.memory_usage(index=False).sum())
+            batch_size = auto_batch_size(
+                len(self),
+                frame_nbytes,
+                int(DATASET_BATCH_TARGET_MB * 1024**2),
+                n_workers=self.execution.num_workers,
+            )
+
+        if batch_size is None:
+            res = []
+            for i in range(0, len(self)):
+                item = delayed(pipeline_delayed)(self.data[i], self.timestamps[i])
+                res.append(item)
+            if returns_pointcloud:
+                return Dataset(
+                    data=res,
+                    timestamps=self.timestamps,
+                    meta=self.meta,
+                    execution=self.execution,
+                    fingerprint=fingerprint,
+                )
+            else:
+                return DelayedResult(res, execution=self.execution)
+
+        slices = batch_slices(len(self), batch_size)
+        batches = [
+            delayed_batch(run_batch, pipeline_delayed, self.data[frames], self.timestamps[frames]) for frames in slices
+        ]
+        batch_lengths = [frames.stop - frames.start for frames in slices]
+        results = DelayedResult(batches=batches, batch_lengths=batch_lengths, execution=self.execution)
         if returns_pointcloud:
-            return Dataset(data=res, timestamps=self.timestamps, meta=self.meta)
+            return Dataset(
+                data=results.data,
+                timestamps=self.timestamps,
+                meta=self.meta,
+                execution=self.execution,
+                fingerprint=fingerprint,
+            )
         else:
-            return DelayedResult(res)
+            return results
+
+    def rolling(self, window: int, step: int = 1) -> Rolling:
+        """Sliding windows of consecutive pointclouds, for operations which need the
+        neighbouring pointclouds, like temporal denoising or accumulating several
+        pointclouds.
+
+        Each pointcloud is computed once and reused in all windows it belongs to,
+        instead of slicing the Dataset per window.
+
+        Args:
+            window (int): Number of consecutive pointclouds per window.
+            step (int, optional): Number of pointclouds between the starts of two
+                windows. Defaults to 1.
+
+        Returns:
+            Rolling: Iterable over the windows as lists of PointClouds, oldest first,
+            with :meth:`pointcloudset.pipeline.rolling.Rolling.apply` to map a function
+            over the windows lazily.
+
+        Raises:
+            ValueError: If window or step is less than 1.
+
+        Examples:
+
+            .. code-block:: python
+
+                for pointclouds in dataset.rolling(3):
+                    print(pointclouds[-1].timestamp)
+
+            .. code-block:: python
+
+                def accumulate(pointclouds: list[PointCloud]) -> PointCloud:
+                    return PointCloud(
+                        pd.concat([pointcloud.data for pointcloud in pointclouds], ignore_index=True),
+                        timestamp=pointclouds[-1].timestamp,
+                    )
+
+                dense = dataset.rolling(5, step=5).apply(accumulate)
+        """
+        return Rolling(self, window, step)
+
+    def groupby_time(
+        self, freq: str | datetime.timedelta | pandas.DateOffset, origin: str | datetime.datetime = "start_day"
+    ) -> TimeGroupBy:
+        """Group the pointclouds into time bins, for statistics per second or minute.
+
+        The pointclouds are assigned to the bins from the timestamps alone. Use
+        :meth:`pointcloudset.pipeline.time_groupby.TimeGroupBy.agg` to aggregate all
+        points per bin in one parallel pass, without a table per pointcloud.
+
+        Args:
+            freq (str | datetime.timedelta | pandas.DateOffset): Length of the bins, for
+                example ``"1s"`` or ``"1min"``.
+            origin (str | datetime.datetime, optional): Start of the first bin as in
+                :meth:`pandas.Series.resample`. Defaults to "start_day".
+
+        Returns:
+            TimeGroupBy: The grouped pointclouds.
+
+        Raises:
+            ValueError: If the Dataset is empty or freq is not a valid frequency.
+
+        Examples:
+
+            .. code-block:: python
+
+                dataset.groupby_time("1s").agg({"x": ["min", "max"], "intensity": ["mean"]})
+        """
+        return TimeGroupBy(self, freq, origin=origin)
+
+    def scan(
+        self,
+        func: Callable[..., tuple[Any, Any]],
+        init_state: Any,
+        max_in_flight: int | None = None,
+        output_dir: Path | None = None,
+        **kwargs,
+    ) -> tuple[Any, list | Dataset]:
+        """Runs a stateful function over the pointclouds in order, for sequential
+        algorithms like odometry, tracking or background models.
+
+        ``func(state, pointcloud, **kwargs)`` returns the new state and an output. It
+        runs in the calling thread, one pointcloud after another, while the upcoming
+        pointclouds are read and computed in parallel with the execution settings of the
+        Dataset, so the sequential step does not wait for the decoding.
+
+        Args:
+            func (Callable[..., tuple[Any, Any]]): Function with the signature
+                ``func(state, pointcloud, **kwargs) -> (state, output)``.
+            init_state (Any): State passed with the first pointcloud.
+            max_in_flight (int | None, optional): Maximum number of pointclouds computed
+                ahead. Defaults to ``None``, see
+                :meth:`pointcloudset.pipeline.delayed_result.DelayedResult.stream`.
+            output_dir (pathlib.Path | None, optional): If given, the outputs, which
+                must be PointClouds, are written to this directory in the native format
+                on a background thread instead of being kept in memory. The directory
+                must be empty or not exist. Defaults to ``None``.
+            **kwargs: Keyword arguments to pass to func.
+
+        Returns:
+            tuple[Any, list | Dataset]: The final state and the outputs, as a list or,
+            with ``output_dir``, as a Dataset read from the directory with the
+            timestamps of the input pointclouds.
+
+        Raises:
+            ValueError: If output_dir is not empty.
+            TypeError: If an output is not a PointCloud when writing to output_dir.
+
+        Examples:
+
+            .. code-block:: python
+
+                def count_points(total: int, pointcloud: PointCloud) -> tuple[int, int]:
+                    return total + len(pointcloud), len(pointcloud)
+
+                total, per_pointcloud = dataset.scan(count_points, 0)
+
+            .. code-block:: python
+
+                state, registered = dataset.scan(register, None, output_dir=Path("registered"))
+        """
+        return scan(self, func, init_state, max_in_flight=max_in_flight, output_dir=output_dir, **kwargs)
+
+    def with_execution(
+        self,
+        scheduler: Literal["threads", "processes", "synchronous", "distributed"] | None = None,
+        num_workers: int | None = None,
+        memory_limit: str | int | None = None,
+    ) -> Dataset:
+        """Returns the same Dataset with explicit scheduler settings for all its
+        computations. Datasets and results derived from it, for example with
+        :meth:`apply`, keep these settings.
+
+        Args:
+            scheduler (str | None, optional): "threads", "processes", "synchronous" or
+                "distributed". Defaults to ``None`` which uses the globally active dask
+                scheduler.
+            num_workers (int | None, optional): Number of workers. Defaults to one per
+                CPU core.
+            memory_limit (str | int | None, optional): Memory limit per worker, only for
+                the distributed scheduler. Defaults to ``None``.
+
+        Returns:
+            Dataset: Dataset with the same data which is computed with the given settings.
+
+        Hint:
+
+            See also: :class:`pointcloudset.pipeline.execution.Execution`
+
+        Examples:
+
+            .. code-block:: python
+
+                labels = dataset.with_execution("processes").apply(cluster_func).compute()
+        """
+        execution = Execution(scheduler=scheduler, num_workers=num_workers, memory_limit=memory_limit)
+        return Dataset(
+            data=self.data,
+            timestamps=self.timestamps,
+            meta=self.meta,
+            execution=execution,
+            fingerprint=self._fingerprint,
+            frame_bounds=self.frame_bounds,
+        )
+
+    def persist_to(
+        self,
+        cache_dir: Path | None = None,
+        max_size_gb: float | None = None,
+        max_entries: int | None = None,
+    ) -> Dataset:
+        """Computes the Dataset and writes it to a checkpoint in the native format, or
+        reads it from there if it was already written by an earlier run.
+
+        Checkpoints are identified by :attr:`fingerprint`, which combines the files the
+        Dataset was read from with the source code and keyword arguments of all
+        functions applied to it. Rerunning the same preprocessing on the same data reads
+        the checkpoint instead of computing it again. The least recently used
+        checkpoints are deleted when the cache grows beyond its size limit.
+
+        Args:
+            cache_dir (pathlib.Path | None, optional): Directory of the cache. Defaults to
+                :data:`pointcloudset.config.CHECKPOINT_DIR`.
+            max_size_gb (float | None, optional): Size limit of the cache in GB. Defaults
+                to :data:`pointcloudset.config.CHECKPOINT_MAX_SIZE_GB`.
+            max_entries (int | None, optional): Maximum number of checkpoints in the
+                cache. Defaults to ``None`` which means no limit.
+
+        Returns:
+            Dataset: The Dataset read from the checkpoint, with the same fingerprint and
+            execution settings.
+
+        Hint:
+
+            See also: :class:`pointcloudset.pipeline.checkpoint.CheckpointCache`
+
+        Examples:
+
+            .. code-block:: python
+
+                cleaned = dataset.apply(crop).apply(remove_outliers).persist_to(Path("cache"))
+        """
+        return persist(self, CheckpointCache(cache_dir, max_size_gb=max_size_gb, max_entries=max_entries))
 
     @property
     def has_original_id(self) -> bool:
@@ -235,22 +659,81 @@ class Dataset(DatasetCore):
         def check_original_id(pc):
             return pc.has_original_id
 
-        return all(self.apply(check_original_id, warn=False).compute())
+        return all(self.apply(check_original_id, warn=False, batch_size="auto").compute())
+
+    @property
+    def frame_index(self) -> FrameIndex:
+        """Index of the bounding box of each pointcloud, used by
+        :meth:`frames_intersecting`.
+
+        The bounding boxes are computed once, stored in :attr:`frame_bounds` and kept
+        by slices of the Dataset and when writing it with :meth:`to_file`. Datasets
+        returned by :meth:`apply` compute them again, since the function may move the
+        points.
+
+        Returns:
+            FrameIndex: Index of the bounding boxes.
+        """
+        if self.frame_bounds is None:
+            bounds = self.apply(pointcloud_bounds, warn=False, batch_size="auto").to_numpy(dtype=np.float64)
+            self.frame_bounds = bounds.reshape(-1, 6)
+        return FrameIndex(self.frame_bounds)
+
+    def frames_intersecting(self, box: pandas.DataFrame | Sequence) -> Dataset:
+        """The pointclouds whose bounding box intersects a box, for example to find all
+        pointclouds with points in a parking spot.
+
+        Uses :attr:`frame_index`, so only the first query on a Dataset without stored
+        bounding boxes reads all pointclouds. The result is lazy.
+
+        Args:
+            box (pandas.DataFrame | Sequence): Either a DataFrame like
+                :attr:`pointcloudset.pointcloud.PointCloud.bounding_box` with the rows
+                "min" and "max" and some of the columns x, y, and z, or the two corners
+                ``((min_x, min_y, min_z), (max_x, max_y, max_z))``. Missing columns and
+                infinite values do not limit the box.
+
+        Returns:
+            Dataset: Dataset with the matching pointclouds, which may be empty. The
+            pointclouds are not limited to the box, use :meth:`PointCloud.limit` for
+            that.
+
+        Raises:
+            ValueError: If the box is not valid.
+
+        Examples:
+
+            .. code-block:: python
+
+                parked = dataset.frames_intersecting(((10.0, -2.0, -np.inf), (15.0, 2.0, np.inf)))
+        """
+        return self._take(self.frame_index.intersecting(box))
 
     def agg(
         self,
         agg: str | list | dict,
         depth: Literal["dataset", "pointcloud", "point"] = "dataset",
+        percentiles: list[float] | None = None,
     ) -> pandas.Series | list[pandas.DataFrame] | pandas.DataFrame | pandas.DataFrame:
         """Aggregate using one or more operations over the whole dataset.
         Similar to :meth:`pandas.DataFrame.aggregate`.
         Uses :class:`dask.dataframe.DataFrame` with parallel processing.
 
+        At the depths "dataset" and "point" the statistics count, sum, mean, std, var,
+        min and max are accumulated per original_id (or per row number) into dense
+        arrays in a single parallel pass, so the memory usage is proportional to the
+        sensor resolution and not to the number of pointclouds.
+
 
         Args:
             agg (Union[str, list, dict]): Function to use for aggregating.
             depth (Literal["dataset", "pointcloud", "point"], optional): Aggregation level: "dataset", "pointcloud" or
                 "point". Defaults to "dataset".
+            percentiles (list[float] | None, optional): Percentiles between 0 and 100
+                per point, only for depth "point". They are added as columns like
+                "x p90" and approximated from histograms with
+                :data:`pointcloudset.config.DATASET_AGG_PERCENTILE_BINS` bins between the
+                minimum and maximum of each point. Defaults to ``None``.
 
         Returns:
             Union[pandas.DataFrame, pandas.DataFrame, pandas.Series]: Results of the
@@ -258,7 +741,8 @@ class Dataset(DatasetCore):
             depth and aggregation.
 
         Raises:
-            ValueError: If depth is not "dataset", "pointcloud" or "point".
+            ValueError: If depth is not "dataset", "pointcloud" or "point" or if
+                percentiles are used with another depth or are not between 0 and 100.
 
         Examples:
 
@@ -266,6 +750,10 @@ class Dataset(DatasetCore):
 
                 dataset.agg("max", "pointcloud")
 
+            .. code-block:: python
+
+                dataset.agg(["mean", "std"], "point", percentiles=[5, 50, 95])
+
             .. code-block:: python
 
                 dataset.agg(["min","max","mean","std"])
@@ -274,19 +762,24 @@ class Dataset(DatasetCore):
 
                 dataset.agg({"x" : ["min","max","mean","std"]})
         """
+        if percentiles is not None:
+            if depth != "point":
+                raise ValueError("percentiles are only supported with depth point")
+            if any(not 0 <= percentile <= 100 for percentile in percentiles):
+                raise ValueError("percentiles must be between 0 and 100")
         if depth == "point":
-            if self.has_original_id:
-                data = self._agg(agg).compute()
-                if isinstance(agg, str):
-                    data.columns = [i if i in ["N", "original_id"] else f"{i} {agg}" for i in data.columns]
-
-                return data
-            else:
-                raise ValueError("this operations nees original_id in each pointcloud")
+            data = self._agg_by_key(agg, require_original_id=True, percentiles=percentiles)
+            if isinstance(agg, str):
+                keep = {"N", "original_id"}
+                keep_stats = {percentile_name(percentile) for percentile in percentiles or []}
+                data.columns = [
+                    i if i in keep or i.rsplit(" ", 1)[-1] in keep_stats else f"{i} {agg}" for i in data.columns
+                ]
+            return data
         elif depth == "pointcloud":
             return self._agg_per_pointcloud(agg)
         elif depth == "dataset":
-            data = self._agg(agg).compute()
+            data = self._agg_by_key(agg)
 
             if isinstance(agg, dict):
                 data = data.iloc[:, :-2]
@@ -453,11 +946,215 @@ class Dataset(DatasetCore):
         """
         return self.agg("std", depth=depth)
 
+    def quantile(
+        self,
+        q: float | list[float] = 0.5,
+        columns: str | list[str] | None = None,
+        k: int | None = None,
+    ) -> pandas.Series | pandas.DataFrame:
+        """Quantiles of columns over all points of the dataset.
+        Similar to :meth:`pandas.DataFrame.quantile`.
+
+        Computed in one parallel pass with mergeable quantile sketches
+        (:class:`pointcloudset.pipeline.sketch.QuantileSketch`), so the memory usage does
+        not grow with the size of the dataset. The quantiles are approximate, the rank
+        error is typically below ``4 / k``. The minimum and maximum (q 0 and 1) are exact.
+
+        Args:
+            q (float | list[float], optional): Quantiles between 0 and 1. Defaults to 0.5.
+            columns (str | list[str] | None, optional): Columns. Defaults to ``None``
+                which means all numeric columns except original_id.
+            k (int | None, optional): Accuracy parameter of the sketches. Defaults to
+                :data:`pointcloudset.config.DATASET_QUANTILE_SKETCH_K`.
+
+        Returns:
+            pandas.Series | pandas.DataFrame: Series with the columns as index for a
+            single quantile, otherwise a DataFrame with the quantiles as index.
+
+        Raises:
+            ValueError: If a quantile is not between 0 and 1 or a column does not exist
+                or is not numeric.
+
+        Examples:
+
+            .. code-block:: python
+
+                dataset.quantile(0.99, "intensity")
+
+            .. code-block:: python
+
+                dataset.quantile([0.05, 0.5, 0.95])
+        """
+        if np.any((np.asarray(q) < 0) | (np.asarray(q) > 1)):
+            raise ValueError("quantiles must be between 0 and 1")
+        sketches = dataset_sketches(self, columns, k)
+        if np.ndim(q) == 0:
+            return pandas.Series(
+                {column: sketch.quantile(q) for column, sketch in sketches.items()}, name=q, dtype=np.float64
+            )
+        return pandas.DataFrame(
+            {column: sketch.quantile(q) for column, sketch in sketches.items()},
+            index=pandas.Index(q, dtype=np.float64),
+        )
+
+    def histogram(
+        self,
+        columns: str | list[str] | None = None,
+        bins: int | np.ndarray = 10,
+        range: tuple[float, float] | None = None,
+    ) -> tuple[np.ndarray, np.ndarray] | dict[str, tuple[np.ndarray, np.ndarray]]:
+        """Histograms of columns over all points of the dataset.
+        Similar to :func:`numpy.histogram`.
+
+        The counts are accumulated per pointcloud and summed in one parallel pass.
+
+        Args:
+            columns (str | list[str] | None, optional): Columns. Defaults to ``None``
+                which means all numeric columns except original_id.
+            bins (int | numpy.ndarray, optional): Number of equal bins or the bin edges.
+                Defaults to 10.
+            range (tuple[float, float] | None, optional): Lower and upper edge of equal
+                bins. Defaults to ``None`` which uses the minimum and maximum of each
+                column, computed in an additional pass.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray] | dict: Counts and bin edges for a single
+            column, otherwise a dict with the counts and bin edges per column. Values
+            outside of the bins and NaN values are not counted.
+
+        Raises:
+            ValueError: If the bins are not valid or a column does not exist or is not
+                numeric.
+
+        Examples:
+
+            .. code-block:: python
+
+                counts, edges = dataset.histogram("intensity", bins=256, range=(0, 256))
+        """
+        histograms = dataset_histograms(self, columns, bins, range)
+        if isinstance(columns, str):
+            return histograms[columns]
+        return histograms
+
+    def voxel_occupancy(
+        self,
+        voxel_size: float,
+        bounds: pandas.DataFrame | Sequence | None = None,
+        value_column: str | None = None,
+    ) -> VoxelGrid:
+        """How often each voxel was hit over the whole Dataset, for coverage analysis
+        and heat maps.
+
+        The points of each pointcloud are mapped to voxel keys in parallel. Each batch of
+        pointclouds is reduced to sparse counts per voxel, which are merged at the end,
+        so only occupied voxels are kept in memory and no points are shuffled.
+
+        Args:
+            voxel_size (float): Edge length of the voxels. The voxels are aligned with
+                the origin.
+            bounds (pandas.DataFrame | Sequence | None, optional): Box like in
+                :meth:`frames_intersecting`, points outside are ignored. Defaults to
+                ``None``.
+            value_column (str | None, optional): Column to average per voxel, for
+                example "intensity". Defaults to ``None``.
+
+        Returns:
+            VoxelGrid: Sparse grid with the number of points and pointclouds per
+            occupied voxel, see :class:`pointcloudset.pipeline.occupancy.VoxelGrid`.
+
+        Raises:
+            ValueError: If voxel_size is not positive, bounds is not valid, the value
+                column does not exist or the points are too far from the origin for the
+                voxel size.
+
+        Examples:
+
+            .. code-block:: python
+
+                grid = dataset.voxel_occupancy(0.2, value_column="intensity")
+                grid.to_frame().sort_values("pointclouds")
+        """
+        return dataset_voxel_occupancy(self, voxel_size, bounds=bounds, value_column=value_column)
+
+    def quantile_filter(
+        self,
+        dim: str,
+        relation: str = ">=",
+        cut_quantile: float = 0.5,
+        k: int | None = None,
+    ) -> Dataset:
+        """Filter all pointclouds with the quantile of a dimension over the whole dataset,
+        instead of the quantile per pointcloud of
+        :func:`pointcloudset.filter.stat.quantile_filter`.
+
+        The quantile is computed right away with :meth:`quantile`, the filtering is lazy.
+
+        Args:
+            dim (str): Dimension to limit. Any column in data.
+            relation (str, optional): Any operator as string. Defaults to ">=".
+            cut_quantile (float, optional): Quantile to compare to. Defaults to 0.5.
+            k (int | None, optional): Accuracy parameter of the sketch. Defaults to
+                :data:`pointcloudset.config.DATASET_QUANTILE_SKETCH_K`.
+
+        Returns:
+            Dataset: Dataset with the filtered pointclouds.
+
+        Examples:
+
+            .. code-block:: python
+
+                bright = dataset.quantile_filter("intensity", ">=", 0.99)
+        """
+        cut_value = float(self.quantile(cut_quantile, dim, k)[dim])
+
+        def filter_quantile(pointcloud: PointCloud, **kwargs) -> PointCloud:
+            return pointcloud.filter("quantile", **kwargs)
+
+        return self.apply(filter_quantile, dim=dim, relation=relation, cut_quantile=cut_quantile, cut_value=cut_value)
+
+    def voxel_down_sample(
+        self,
+        voxel_size: float,
+        agg: Literal["centroid", "first", "mean"] = "centroid",
+        column_agg: dict[str, str] | None = None,
+    ) -> Dataset:
+        """Downsample all pointclouds to one point per occupied voxel, see
+        :meth:`pointcloudset.pointcloud.PointCloud.voxel_down_sample`. Lazy like
+        :meth:`apply`.
+
+        Args:
+            voxel_size (float): Edge length of the voxels. Must be positive.
+            agg (Literal["centroid", "first", "mean"], optional): Statistic of the
+                columns. Defaults to "centroid".
+            column_agg (dict[str, str] | None, optional): Statistics for single columns.
+                Defaults to ``None``.
+
+        Returns:
+            Dataset: Dataset with the downsampled pointclouds.
+
+        Raises:
+            ValueError: If voxel_size is not positive.
+
+        Examples:
+
+            .. code-block:: python
+
+                preview = dataset.voxel_down_sample(0.2, column_agg={"intensity": "max"})
+        """
+        if voxel_size <= 0:
+            raise ValueError(f"voxel_size must be positive, got {voxel_size}")
+
+        def down_sample(pointcloud: PointCloud, **kwargs) -> PointCloud:
+            return pointcloud.voxel_down_sample(**kwargs)
+
+        return self.apply(down_sample, voxel_size=voxel_size, agg=agg, column_agg=column_agg)
+
     def _agg_per_pointcloud(self, agg: str | list | dict) -> pandas.DataFrame | list | pandas.DataFrame:
         def get(pointcloud, agg: str | list | dict):
             return pointcloud.data.agg(agg)
 
-        res = self.apply(get, warn=False, agg=agg).compute()
+        res = self.apply(get, warn=False, batch_size="auto", agg=agg).compute()
         if isinstance(agg, str):
             res = pandas.DataFrame(res)
             if not isinstance(agg, dict) and "original_id" in res.columns:
@@ -484,6 +1181,11 @@ class Dataset(DatasetCore):
             meta[key] = new
         else:
             meta[key] = [dataset.meta]
+        self._fingerprint = tokenize(self.fingerprint, dataset.fingerprint)
+        if self.frame_bounds is not None and dataset.frame_bounds is not None:
+            self.frame_bounds = np.concatenate([self.frame_bounds, dataset.frame_bounds])
+        else:
+            self.frame_bounds = None
         self.data.extend(dataset.data)
         self.timestamps.extend(dataset.timestamps)
         self._check()
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
 import datetime
+from collections.abc import Callable
 
 import dask
+import numpy as np
 import pandas as pd
+from dask.base import tokenize
 from dask.delayed import Delayed, DelayedLeaf
 
+from pointcloudset.pipeline.aggregate import Unsupported, aggregate_by_key
+from pointcloudset.pipeline.execution import Execution
+
 
 class DatasetCore:
     """
@@ -17,12 +23,40 @@ class DatasetCore:
         data: list[dask.delayed.DelayedLeaf] = [],
         timestamps: list[datetime.datetime] = [],
         meta: dict = {"orig_file": "", "topic": ""},
+        execution: Execution | None = None,
+        fingerprint: str | Callable[[], str] | None = None,
+        frame_bounds: np.ndarray | None = None,
     ) -> None:
         self.data = data
         self.timestamps = timestamps
         self.meta = meta
+        self.execution = Execution() if execution is None else execution
+        """Scheduler settings used to compute the Dataset, see
+        :class:`pointcloudset.pipeline.execution.Execution`."""
+        self._fingerprint = fingerprint
+        self.frame_bounds = frame_bounds
+        """Bounding box of each pointcloud with shape (pointclouds, 6) if known, see
+        :attr:`pointcloudset.dataset.Dataset.frame_index`."""
         self._check()
 
+    @property
+    def fingerprint(self) -> str:
+        """Hash which identifies the source of the Dataset and the functions applied to
+        it. Used as the key of checkpoints, see :meth:`pointcloudset.dataset.Dataset.persist_to`.
+
+        Datasets read with :meth:`pointcloudset.dataset.Dataset.from_file` are identified
+        by the files they were read from, other Datasets by the content of their
+        pointclouds, which computes all of them once.
+        """
+        if callable(self._fingerprint):
+            # derived Datasets compute it only when needed
+            self._fingerprint = self._fingerprint()
+        if self._fingerprint is None:
+            # the dask keys of data from memory are random, so they would differ each run
+            tokens = self.execution.compute(*[dask.delayed(tokenize)(element) for element in self.data])
+            self._fingerprint = tokenize(list(tokens), self.timestamps)
+        return self._fingerprint
+
     @property
     def start_time(self) -> datetime.datetime:
         """
@@ -63,7 +97,7 @@ class DatasetCore:
         def bb(pc):
             return pc.bounding_box
 
-        list_of_bb = self.apply(bb, warn=False).compute()
+        list_of_bb = self.apply(bb, warn=False, batch_size="auto").compute()
         bb_all_df = pd.concat(list_of_bb)
         return pd.DataFrame([bb_all_df.min(), bb_all_df.max()], index=["min", "max"])
 
@@ -117,6 +151,42 @@ class DatasetCore:
             data = data.groupby("dummy").agg(agg)
         return data
 
+    def _agg_by_key(
+        self,
+        agg: str | list | dict,
+        require_original_id: bool = False,
+        percentiles: list[float] | None = None,
+    ) -> pd.DataFrame:
+        """Computed result of :meth:`_agg`.
+
+        Statistics which can be merged (count, sum, mean, std, var, min and max) of
+        numeric data are computed in a single pass over the frames with
+        :func:`pointcloudset.pipeline.aggregate.aggregate_by_key`, without a dask
+        shuffle. Everything else falls back to the dask groupby.
+
+        Args:
+            agg (Union[str, list, dict]): Function to use for aggregating.
+            require_original_id (bool, optional): Only aggregate per original_id.
+                Defaults to ``False``.
+            percentiles (list[float] | None, optional): Percentiles to add per
+                original_id. Defaults to ``None``.
+
+        Returns:
+            pandas.DataFrame: Aggregation per original_id or per row number.
+
+        Raises:
+            ValueError: If ``require_original_id`` is set and not all pointclouds have
+                original_ids or if percentiles are not supported for the data.
+        """
+        try:
+            return aggregate_by_key(self, agg, require_original_id=require_original_id, percentiles=percentiles)
+        except Unsupported as error:
+            if require_original_id and not self.has_original_id:
+                raise ValueError("this operations nees original_id in each pointcloud") from error
+            if percentiles:
+                raise ValueError(f"percentiles are not supported for this data or aggregation: {error}") from error
+            return self.execution.compute(self._agg(agg))[0]
+
     def has_pointclouds(self) -> bool:
         """Check if Dataset has PointCloud.
 
@@ -173,6 +243,9 @@ class DatasetCore:
             if not pd.Series(self.timestamps).is_monotonic_increasing:
                 raise ValueError("Timestamps are not monotonic increasing")
 
+            if self.frame_bounds is not None and self.frame_bounds.shape != (len(self), 6):
+                raise ValueError(f"frame_bounds must have the shape ({len(self)}, 6), got {self.frame_bounds.shape}")
+
             assert isinstance(self.data[0], (DelayedLeaf, Delayed)), (
                 f"data needs to be a dask delayed object got {type(self.data[0])}"
             )
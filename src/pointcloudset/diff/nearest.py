@@ -2,7 +2,7 @@
 Functions to calculate differences between the pointcloud nearest points in another one.
 """
 
-from scipy.spatial import KDTree
+import numpy as np
 
 
 def calculate_distance_to_nearest(pointcloud, target):
@@ -24,8 +24,8 @@ def calculate_distance_to_nearest(pointcloud, target):
         ValueError: If distance ot nearest points already exits.
 
     """
-    if "distance to nearest point" in pointcloud.data.columns:
+    if "distance to nearest point" in pointcloud.columns:
         raise ValueError("distance to nearest point already exists.")
-    distances, _ = KDTree(target.points.xyz).query(pointcloud.points.xyz)
+    distances, _ = target.spatial_index.query_knn(pointcloud.get_xyz(np.float64))
     pointcloud._add_column("distance to nearest point", distances)
     return pointcloud
@@ -31,8 +31,7 @@ def calculate_distance_to_plane(
     Returns:
         PointCloud: PointCloud including distances to a plane for each point.
     """
-    points = pointcloud.points.xyz
-    distances = np.asarray([plane.distance_to_point(point, target, normal_dist) for point in points])
+    distances = plane.distance_to_points(pointcloud.get_xyz(np.float64), target, normal_dist)
     if absolute_values:
         distances = np.absolute(distances)
     plane_str = np.array2string(target, formatter={"float_kind": lambda x: "%.4f" % x})
@@ -29,9 +29,7 @@ def calculate_distance_to_point(
     Returns:
         PointCloud: PointCloud including Euclidean distances to a point for each point.
     """
-    point_a = target
-    points = pointcloud.points.xyz
-    distances = np.array([np.linalg.norm(point_a - point) for point in points])
+    distances = np.linalg.norm(pointcloud.xyz - target, axis=1)
     point_str = np.array2string(target, formatter={"float_kind": lambda x: "%.4f" % x})
     point_str = " ".join(point_str.split())  # delete multiple white space
     pointcloud._add_column(f"distance to point: {point_str}", distances)
@@ -5,6 +5,7 @@ Utiliy functions for filtering of frames.
 from pointcloudset.filter.stat import (
     quantile_filter,
     remove_radius_outlier,
+    remove_statistical_outlier,
     value_filter,
 )
 
@@ -12,4 +13,5 @@ ALL_FILTERS = {
     "QUANTILE": quantile_filter,
     "VALUE": value_filter,
     "RADIUSOUTLIER": remove_radius_outlier,
+    "STATISTICAL": remove_statistical_outlier,
 }
@@ -0,0 +1,144 @@
+"""
+Selection of points with several conditions, which are combined into one boolean mask
+before the points are gathered once.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from pointcloudset.config import OPS
+
+if TYPE_CHECKING:
+    from pointcloudset import PointCloud
+
+
+def parse_condition(condition: tuple | list) -> list[tuple[str, object]]:
+    """Relations and values of one condition.
+
+    Args:
+        condition (tuple | list): Either ``(min, max)`` for ``min <= value <= max`` or
+            ``(relation, value)`` with a relation of :data:`pointcloudset.config.OPS`
+            like ``(">", 20)``.
+
+    Returns:
+        list[tuple[str, object]]: Relations with the values to compare to.
+
+    Raises:
+        ValueError: If the condition is not valid or max is smaller than min.
+    """
+    if not isinstance(condition, (tuple, list)) or len(condition) != 2:
+        raise ValueError(f"condition must be (min, max) or (relation, value), got {condition}")
+    first, second = condition
+    if isinstance(first, str):
+        if first not in OPS:
+            raise ValueError(f"relation must be one of {list(OPS)}, got {first}")
+        return [(first, second)]
+    if second < first:
+        raise ValueError("maxvalue must be greater than minvalue")
+    return [(">=", first), ("<=", second)]
+
+
+def select_mask(pointcloud: PointCloud, conditions: str | Mapping) -> np.ndarray:
+    """Boolean mask of the points which fulfil all conditions.
+
+    Args:
+        pointcloud (PointCloud): PointCloud.
+        conditions (str | Mapping): Either a dict of column names and conditions, see
+            :func:`parse_condition`, or an expression of :func:`pandas.eval` with the
+            column names as variables like ``"x > 0 and intensity < 50"``.
+
+    Returns:
+        numpy.ndarray: Mask with one value per point, ``False`` for NaN.
+
+    Raises:
+        ValueError: If a condition is not valid.
+        KeyError: If a column does not exist.
+    """
+    if isinstance(conditions, str):
+        columns = {name: pointcloud.column_values(name) for name in pointcloud.columns if isinstance(name, str)}
+        try:
+            mask = pd.eval(conditions, resolvers=(columns,))
+        except pd.errors.UndefinedVariableError as error:
+            raise KeyError(f"choose any of {pointcloud.columns} in the expression") from error
+        mask = np.asarray(mask)
+        if mask.dtype != bool or mask.shape != (len(pointcloud),):
+            raise ValueError(f"expression must give one boolean per point: {conditions}")
+        return mask
+    relations = {column: parse_condition(condition) for column, condition in conditions.items()}
+    mask = np.ones(len(pointcloud), dtype=bool)
+    for column, comparisons in relations.items():
+        if column not in pointcloud.columns:
+            raise KeyError(f"choose any of {pointcloud.columns}, got {column}")
+        values = pointcloud.column_values(column)
+        for relation, value in comparisons:
+            mask &= np.asarray(OPS[relation](values, value), dtype=bool)
+    return mask
+
+
+class Selection:
+    """Points of a PointCloud selected lazily with :meth:`pointcloudset.pointcloud.PointCloud.select`.
+
+    Further conditions are combined with the mask and the points are only gathered by
+    :meth:`compute`, once for the whole chain.
+
+    Args:
+        pointcloud (PointCloud): PointCloud to select from.
+        mask (numpy.ndarray): Boolean mask of the selected points.
+
+    Examples:
+
+        .. code-block:: python
+
+            cropped = pointcloud.select(x=(-10, 10), lazy=True).limit("y", -5, 5).compute()
+    """
+
+    def __init__(self, pointcloud: PointCloud, mask: np.ndarray):
+        self.pointcloud = pointcloud
+        self.mask = mask
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.mask))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self)} of {len(self.pointcloud)} points)"
+
+    def select(self, conditions: str | Mapping | None = None, **kwargs) -> Selection:
+        """Select the points which also fulfil further conditions, see
+        :meth:`pointcloudset.pointcloud.PointCloud.select`.
+
+        Returns:
+            Selection: Selection with the combined mask.
+        """
+        conditions = {} if conditions is None else conditions
+        if isinstance(conditions, str):
+            if kwargs:
+                raise ValueError("use either an expression or keyword conditions")
+            mask = select_mask(self.pointcloud, conditions)
+        else:
+            mask = select_mask(self.pointcloud, {**conditions, **kwargs})
+        return Selection(self.pointcloud, self.mask & mask)
+
+    def limit(self, dim: str, minvalue: float, maxvalue: float) -> Selection:
+        """Same as :meth:`pointcloudset.pointcloud.PointCloud.limit`, lazily."""
+        return self.select({dim: (minvalue, maxvalue)})
+
+    def limit_less(self, dim: str, value: float) -> Selection:
+        """Same as :meth:`pointcloudset.pointcloud.PointCloud.limit_less`, lazily."""
+        return self.select({dim: ("<", value)})
+
+    def limit_greater(self, dim: str, value: float) -> Selection:
+        """Same as :meth:`pointcloudset.pointcloud.PointCloud.limit_greater`, lazily."""
+        return self.select({dim: (">", value)})
+
+    def compute(self) -> PointCloud:
+        """Gather the selected points.
+
+        Returns:
+            PointCloud: PointCloud with the selected points.
+        """
+        return self.pointcloud.apply_filter(self.mask)
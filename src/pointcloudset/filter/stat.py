@@ -7,9 +7,8 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 import numpy as np
-from scipy.spatial import KDTree
 
-from pointcloudset.config import OPS
+from pointcloudset.config import OPS, STATISTICAL_OUTLIER_QUERY_CHUNK_SIZE
 
 if TYPE_CHECKING:
     from pointcloudset import PointCloud
@@ -20,6 +19,7 @@ def quantile_filter(
     dim: str,
     relation: str = ">=",
     cut_quantile: float = 0.5,
+    cut_value: float | None = None,
 ) -> PointCloud:
     """Filtering based on quantile values of dimension dim of the data.
 
@@ -29,13 +29,21 @@ def quantile_filter(
             "intensity")
         relation (str, optional): Any operator as string. Defaults to ">=".
         cut_quantile (float, optional): Quantile to compare to. Defaults to 0.5.
+        cut_value (float | None, optional): Precomputed value of the quantile, for
+            example the quantile over a whole Dataset from
+            :meth:`pointcloudset.dataset.Dataset.quantile`. Then ``cut_quantile`` is
+            ignored. Defaults to ``None`` which uses the quantile of this pointcloud.
 
     Returns:
         PointCloud: PointCloud which fullfils the criteria.
     """
-    cut_value = pointcloud.data[dim].quantile(cut_quantile)
-    filter_array = OPS[relation](pointcloud.data[dim], cut_value)
-    return pointcloud.apply_filter(filter_array.to_numpy())
+    values = pointcloud.column_values(dim)
+    if cut_value is None:
+        # like pandas.Series.quantile, NaN is skipped
+        valid = values[~np.isnan(values)] if values.dtype.kind in "fc" else values
+        cut_value = np.quantile(valid.astype(np.float64), cut_quantile) if len(valid) > 0 else np.nan
+    filter_array = OPS[relation](values, cut_value)
+    return pointcloud.apply_filter(filter_array)
 
 
 def value_filter(
@@ -57,7 +65,7 @@ def value_filter(
         PointCloud: PointCloud which fullfils the criteria.
     """
 
-    bool_array = (OPS[relation](pointcloud.data[dim], value)).to_numpy()
+    bool_array = OPS[relation](pointcloud.column_values(dim), value)
     return pointcloud.apply_filter(bool_array)
 
 
@@ -83,7 +91,53 @@ def remove_radius_outlier(pointcloud: PointCloud, nb_points: int, radius: float)
 
     if len(pointcloud) == 0:
         return pointcloud
-    xyz = np.asarray(pointcloud.xyz)
-    counts = KDTree(xyz).query_ball_point(xyz, radius, workers=-1, return_length=True)
+    index = pointcloud.spatial_index
+    counts = index.query_radius(index.xyz, radius, return_length=True)
     mask = counts > nb_points
     return pointcloud.apply_filter(mask)
+
+
+def remove_statistical_outlier(pointcloud: PointCloud, k: int = 20, std_ratio: float = 2.0) -> PointCloud:
+    """Remove points whose mean distance to their ``k`` nearest neighbours is larger
+    than the mean of these distances over all points plus ``std_ratio`` times their
+    standard deviation.
+
+    Unlike :func:`remove_radius_outlier` the threshold adapts to the density of the
+    pointcloud. The neighbours are found with k nearest neighbour queries on
+    :attr:`pointcloudset.pointcloud.PointCloud.spatial_index` in chunks of
+    :data:`pointcloudset.config.STATISTICAL_OUTLIER_QUERY_CHUNK_SIZE` points.
+
+    Args:
+        pointcloud (PointCloud): PointCloud from which to remove points.
+        k (int, optional): Number of neighbours (excluding the point itself). Must be
+            >= 1. Pointclouds with fewer points use all other points. Defaults to 20.
+        std_ratio (float, optional): Number of standard deviations above the mean
+            distance for outliers. Must be positive. Defaults to 2.0.
+
+    Returns:
+        PointCloud: PointCloud without outliers.
+
+    Raises:
+        ValueError: If ``k`` is less than 1 or ``std_ratio`` is not positive.
+    """
+    if k < 1:
+        raise ValueError(f"k must be >= 1, got {k}")
+    if std_ratio <= 0:
+        raise ValueError(f"std_ratio must be positive, got {std_ratio}")
+
+    n_points = len(pointcloud)
+    if n_points < 2:
+        return pointcloud
+    k = min(k, n_points - 1)
+    index = pointcloud.spatial_index
+    # querying in the order of the leaves of the tree keeps neighbouring queries close in
+    # memory, which is about twice as fast as querying in the order of the points
+    leaf_order = index.tree.indices
+    mean_distances = np.empty(n_points)
+    for start in range(0, n_points, STATISTICAL_OUTLIER_QUERY_CHUNK_SIZE):
+        chunk = leaf_order[start : start + STATISTICAL_OUTLIER_QUERY_CHUNK_SIZE]
+        distances, _ = index.query_knn(index.xyz[chunk], k=k + 1)
+        # the nearest neighbour is the point itself
+        mean_distances[chunk] = distances[:, 1:].mean(axis=1)
+    threshold = mean_distances.mean() + std_ratio * mean_distances.std(ddof=1)
+    return pointcloud.apply_filter(mean_distances <= threshold)
@@ -0,0 +1,134 @@
+"""
+Estimation of normals and curvature from the covariance of the neighbourhood of each
+point, for whole chunks of points at once.
+"""
+
+from __future__ import annotations
+
+import itertools
+
+import numpy as np
+
+from pointcloudset.config import NORMALS_MEMORY_BUDGET_MB
+from pointcloudset.geometry.spatial_index import SpatialIndex
+
+# estimated bytes per neighbour of the temporary arrays of one chunk
+_BYTES_PER_NEIGHBOUR = 200
+
+
+def covariance_normals(
+    xyz: np.ndarray, points: np.ndarray, neighbours: np.ndarray, counts: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Normals and curvature of neighbourhoods from the eigenvectors of their covariance
+    matrices, all decomposed at once with :func:`numpy.linalg.eigh`.
+
+    Args:
+        xyz (numpy.ndarray): All points with shape (n, 3).
+        points (numpy.ndarray): Numbers of the m points to compute.
+        neighbours (numpy.ndarray): Numbers of the neighbours of all m points one after
+            the other, including the point itself.
+        counts (numpy.ndarray): Number of neighbours of each point, at least 1.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Unit normals with shape (m, 3), in the
+        direction of the smallest eigenvalue, and the curvature, the smallest eigenvalue
+        divided by the sum of the eigenvalues. Both are NaN for points with fewer than 3
+        neighbours.
+    """
+    starts = np.zeros(len(counts), dtype=np.intp)
+    np.cumsum(counts[:-1], out=starts[1:])
+    # one coordinate at a time and relative to the point itself, so large coordinates do
+    # not cancel out; reducing 1-D arrays is several times faster than (n, 3, 3) arrays
+    centered = [xyz[neighbours, axis] - np.repeat(xyz[points, axis], counts) for axis in range(3)]
+    means = [np.add.reduceat(values, starts) / counts for values in centered]
+    covariances = np.empty((len(counts), 3, 3))
+    for row, column in zip(*np.triu_indices(3), strict=True):
+        products = np.add.reduceat(centered[row] * centered[column], starts)
+        covariances[:, row, column] = products / counts - means[row] * means[column]
+        covariances[:, column, row] = covariances[:, row, column]
+    eigenvalues, eigenvectors = np.linalg.eigh(covariances)
+    eigenvalues = np.maximum(eigenvalues, 0.0)
+    normals = eigenvectors[:, :, 0]
+    total = eigenvalues.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        curvature = np.where(total > 0, eigenvalues[:, 0] / total, 0.0)
+    too_few = counts < 3
+    normals[too_few] = np.nan
+    curvature[too_few] = np.nan
+    return normals, curvature
+
+
+def estimate_normals(
+    index: SpatialIndex,
+    k: int | None = None,
+    radius: float | None = None,
+    viewpoint: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Normals and curvature of all points of a spatial index.
+
+    The neighbourhoods are found with one k nearest neighbour or radius query per chunk
+    of points. The chunks are sized so their neighbourhoods fit into
+    :data:`pointcloudset.config.NORMALS_MEMORY_BUDGET_MB` and taken in the leaf order of
+    the tree, which keeps neighbouring queries close in memory.
+
+    Args:
+        index (SpatialIndex): Index of the points.
+        k (int | None, optional): Number of neighbours including the point itself.
+            Defaults to ``None``.
+        radius (float | None, optional): Search radius. With k, at most k neighbours
+            within the radius are used. Defaults to ``None``.
+        viewpoint (numpy.ndarray | None, optional): The normals are flipped to point
+            towards it. Defaults to ``None`` which is the origin, the sensor position.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Normals with shape (n, 3) and curvature,
+        see :func:`covariance_normals`.
+
+    Raises:
+        ValueError: If neither k nor radius is given, k is less than 3 or radius is not
+            positive.
+    """
+    if k is None and radius is None:
+        raise ValueError("give k, radius or both")
+    if k is not None and k < 3:
+        raise ValueError(f"k must be >= 3 to define a plane, got {k}")
+    if radius is not None and radius <= 0:
+        raise ValueError(f"radius must be positive, got {radius}")
+    viewpoint = np.zeros(3) if viewpoint is None else np.asarray(viewpoint, dtype=np.float64)
+    xyz = index.xyz
+    n_points = len(index)
+    normals = np.empty((n_points, 3))
+    curvature = np.empty(n_points)
+    if n_points == 0:
+        return normals, curvature
+    budget = int(NORMALS_MEMORY_BUDGET_MB * 1024**2) // _BYTES_PER_NEIGHBOUR
+    leaf_order = index.tree.indices
+    if k is not None:
+        k = min(k, n_points)
+        upper_bound = np.inf if radius is None else radius
+        chunk_size = max(1, budget // k)
+        cuts = list(range(0, n_points, chunk_size)) + [n_points]
+    else:
+        radius_counts = index.query_radius(xyz[leaf_order], radius, return_length=True)
+        # cut the chunks where the number of neighbours exceeds the budget
+        ends = np.cumsum(radius_counts)
+        cuts = [0]
+        while cuts[-1] < n_points:
+            done = ends[cuts[-1] - 1] if cuts[-1] > 0 else 0
+            cuts.append(max(cuts[-1] + 1, int(np.searchsorted(ends, done + budget, side="right"))))
+    for start, end in itertools.pairwise(cuts):
+        points = leaf_order[start:end]
+        if k is not None:
+            _, indices = index.query_knn(xyz[points], k=k, distance_upper_bound=upper_bound)
+            found = indices < n_points
+            neighbours = indices[found]
+            counts = found.sum(axis=1)
+        else:
+            counts = radius_counts[start:end].astype(np.intp)
+            neighbours = np.concatenate(index.query_radius(xyz[points], radius)).astype(np.intp)
+        chunk_normals, chunk_curvature = covariance_normals(xyz, points, neighbours, counts)
+        flip = np.einsum("ij,ij->i", chunk_normals, viewpoint - xyz[points]) < 0
+        chunk_normals[flip] *= -1
+        normals[points] = chunk_normals
+        curvature[points] = chunk_curvature
+    return normals, curvature
@@ -45,6 +45,37 @@ def distance_to_point(point_a: np.ndarray, plane_model: np.ndarray, normal_dist:
     return distance
 
 
+def distance_to_points(xyz: np.ndarray, plane_model: np.ndarray, normal_dist: bool = True) -> np.ndarray:
+    """Calculate the distances from a plane to many points at once, like
+    :func:`distance_to_point` for each point.
+
+    Args:
+        xyz (numpy.ndarray): Points with shape (n, 3).
+        plane_model (numpy.ndarray):  [a, b, c, d] parameters of the plane equation,
+            could be provided by :func:`pointcloudset.pointcloud.PointCloud.plane_segmentation`.
+        normal_dist (bool): Calculate normal distance if ``True``, calculate
+            distance in direction of line of sight if ``False``. Defaults to ``True``.
+
+    Returns:
+        numpy.ndarray: Distance between plane and each point.
+
+    Raises:
+        ValueError: If xyz does not have 3 columns or if plane does not have 4 values.
+    """
+    xyz = np.asarray(xyz, dtype=np.float64)
+    if xyz.ndim != 2 or xyz.shape[1] != 3:
+        raise ValueError("xyz needs to have 3 columns")
+    if len(plane_model) != 4:
+        raise ValueError("plane_model needs to have 4 values")
+    a, b, c, d = (float(value) for value in plane_model)
+    x, y, z = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+    if normal_dist:
+        return (a * x + b * y + c * z + d) / math.sqrt(a**2 + b**2 + c**2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = -d / (x * a + y * b + z * c)
+    return np.sqrt((x * t - x) ** 2 + (y * t - y) ** 2 + (z * t - z) ** 2)
+
+
 def intersect_line_of_sight(line: np.ndarray, plane_model: np.ndarray) -> np.ndarray:
     """Calculate the point of intersection between a line and a plane.
 
@@ -0,0 +1,182 @@
+"""
+RANSAC plane fitting which scores whole batches of plane hypotheses at once.
+"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from pointcloudset.config import RANSAC_BATCH_SIZE, RANSAC_PREVIEW_SIZE
+
+# a hypothesis is scored on all points if its preview could come from a plane with at
+# least as many inliers as the best one, within this many standard deviations
+_PREVIEW_SIGMAS = 3.0
+
+
+def check_ransac_arguments(distance_threshold: float, ransac_n: int, num_iterations: int, confidence: float):
+    """Validate the arguments of :func:`ransac_plane`.
+
+    Raises:
+        ValueError: If distance_threshold is not positive, ransac_n is less than 3,
+            num_iterations is less than 1 or confidence is not in (0, 1].
+    """
+    if distance_threshold <= 0:
+        raise ValueError(f"distance_threshold must be positive, got {distance_threshold}")
+    if ransac_n < 3:
+        raise ValueError(f"ransac_n must be >= 3 to define a plane, got {ransac_n}")
+    if num_iterations < 1:
+        raise ValueError(f"num_iterations must be >= 1, got {num_iterations}")
+    if not 0 < confidence <= 1:
+        raise ValueError(f"confidence must be in (0, 1], got {confidence}")
+
+
+def fit_plane(xyz: np.ndarray) -> np.ndarray:
+    """Least squares plane through points.
+
+    Args:
+        xyz (numpy.ndarray): Points with shape (n, 3), at least 3 of them.
+
+    Returns:
+        numpy.ndarray: Plane model [a, b, c, d] for ax+by+cz+d=0 with a unit normal
+        in the direction of the smallest eigenvalue of the covariance of the points.
+    """
+    centroid = xyz.mean(axis=0)
+    centered = xyz - centroid
+    _, eigenvectors = np.linalg.eigh(centered.T @ centered)
+    normal = eigenvectors[:, 0]
+    return np.array([*normal, -normal @ centroid])
+
+
+def _draw_samples(rng: np.random.Generator, n_points: int, n_samples: int, ransac_n: int) -> np.ndarray:
+    """Point numbers of n_samples samples of ransac_n different points."""
+    samples = rng.integers(n_points, size=(n_samples, ransac_n))
+    while True:
+        repeated = (np.diff(np.sort(samples, axis=1), axis=1) == 0).any(axis=1)
+        if not repeated.any():
+            return samples
+        samples[repeated] = rng.integers(n_points, size=(int(repeated.sum()), ransac_n))
+
+
+def _fit_hypotheses(sample_xyz: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Planes through samples with shape (m, ransac_n, 3), all fitted at once.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Plane models with shape (m, 4) and a mask
+        of the samples which span a plane.
+    """
+    if sample_xyz.shape[1] == 3:
+        first = sample_xyz[:, 1] - sample_xyz[:, 0]
+        second = sample_xyz[:, 2] - sample_xyz[:, 0]
+        normals = np.cross(first, second)
+        lengths = np.linalg.norm(normals, axis=1)
+        scale = np.linalg.norm(first, axis=1) * np.linalg.norm(second, axis=1)
+        valid = lengths > 1e-10 * scale
+        normals /= np.where(valid, lengths, 1.0)[:, np.newaxis]
+        centroids = sample_xyz[:, 0]
+    else:
+        centroids = sample_xyz.mean(axis=1)
+        centered = sample_xyz - centroids[:, np.newaxis]
+        eigenvalues, eigenvectors = np.linalg.eigh(np.einsum("mki,mkj->mij", centered, centered))
+        normals = eigenvectors[:, :, 0]
+        # collinear samples have two vanishing eigenvalues
+        valid = eigenvalues[:, 1] > 1e-10 * eigenvalues[:, 2]
+    offsets = -np.einsum("ij,ij->i", normals, centroids)
+    return np.column_stack([normals, offsets]), valid
+
+
+def _count_inliers(xyz: np.ndarray, models: np.ndarray, distance_threshold: float) -> np.ndarray:
+    """Number of points within distance_threshold of each plane, one matrix product."""
+    distances = xyz @ models[:, :3].T
+    distances += models[:, 3]
+    return np.count_nonzero(np.abs(distances) <= distance_threshold, axis=0)
+
+
+def _required_iterations(inlier_ratio: float, ransac_n: int, confidence: float) -> float:
+    """Number of samples after which one of them contained only inliers with the given
+    confidence."""
+    all_inliers = inlier_ratio**ransac_n
+    if all_inliers >= 1.0:
+        return 1.0
+    if all_inliers <= 0.0 or confidence >= 1.0:
+        return math.inf
+    return math.log(1.0 - confidence) / math.log1p(-all_inliers)
+
+
+def ransac_plane(
+    xyz: np.ndarray,
+    distance_threshold: float,
+    ransac_n: int,
+    num_iterations: int,
+    rng: np.random.Generator,
+    confidence: float = 0.999,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find the plane with the most inliers with RANSAC.
+
+    The hypotheses are drawn and fitted in batches of
+    :data:`pointcloudset.config.RANSAC_BATCH_SIZE` and each batch is scored with one
+    matrix product on a fixed random preview of
+    :data:`pointcloudset.config.RANSAC_PREVIEW_SIZE` points. Only the hypotheses whose
+    preview could come from a plane with at least as many inliers as the best one so far
+    are counted on all points. The search stops once a sample of only inliers of the
+    best plane was drawn with the given confidence, or after num_iterations samples.
+
+    Args:
+        xyz (numpy.ndarray): Points with shape (n, 3). Points with NaN or infinite
+            coordinates are left out.
+        distance_threshold (float): Max distance of an inlier from the plane.
+        ransac_n (int): Number of points per sample, at least 3.
+        num_iterations (int): Maximum number of samples.
+        rng (numpy.random.Generator): Random number generator for the samples.
+        confidence (float, optional): Probability to have drawn at least one sample of
+            only inliers before stopping. 1 draws all num_iterations samples. Defaults
+            to 0.999.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Sorted numbers of the inliers of the best
+        plane and the plane model [a, b, c, d] refitted to all of them, see
+        :func:`fit_plane`. No inliers and zeros if no sample spans a plane or there are
+        fewer than ransac_n finite points.
+    """
+    finite = np.isfinite(xyz).all(axis=1)
+    numbers = None
+    if not finite.all():
+        numbers = np.flatnonzero(finite)
+        xyz = xyz[numbers]
+    n_points = len(xyz)
+    if n_points < ransac_n:
+        return np.empty(0, dtype=np.intp), np.zeros(4)
+    # relative to the centre, so large coordinates do not cancel out in the offsets
+    center = xyz.mean(axis=0)
+    centered = xyz - center
+    exact = n_points <= RANSAC_PREVIEW_SIZE
+    preview = centered if exact else centered[rng.choice(n_points, RANSAC_PREVIEW_SIZE, replace=False)]
+    best_model = None
+    best_count = 0
+    done = 0
+    while done < min(num_iterations, _required_iterations(best_count / n_points, ransac_n, confidence)):
+        n_samples = min(RANSAC_BATCH_SIZE, num_iterations - done)
+        done += n_samples
+        models, valid = _fit_hypotheses(centered[_draw_samples(rng, n_points, n_samples, ransac_n)])
+        preview_counts = np.where(valid, _count_inliers(preview, models, distance_threshold), -1)
+        if exact:
+            best = int(np.argmax(preview_counts))
+            if preview_counts[best] > best_count:
+                best_model, best_count = models[best], int(preview_counts[best])
+            continue
+        size = len(preview)
+        for candidate in np.argsort(-preview_counts, kind="stable"):
+            ratio = best_count / n_points
+            bound = size * ratio - _PREVIEW_SIGMAS * math.sqrt(size * ratio * (1.0 - ratio))
+            if preview_counts[candidate] < max(bound, 0):
+                break
+            count = int(_count_inliers(centered, models[candidate : candidate + 1], distance_threshold)[0])
+            if count > best_count:
+                best_model, best_count = models[candidate], count
+    if best_model is None:
+        return np.empty(0, dtype=np.intp), np.zeros(4)
+    inliers = np.flatnonzero(np.abs(centered @ best_model[:3] + best_model[3]) <= distance_threshold)
+    model = fit_plane(centered[inliers])
+    model[3] -= model[:3] @ center
+    return (inliers if numbers is None else numbers[inliers]), model
@@ -0,0 +1,186 @@
+"""
+Fixed size samples of points which keep the geometry of a pointcloud: farthest point
+sampling and sampling stratified by voxel.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from pointcloudset.cluster.numba import HAS_NUMBA, njit
+from pointcloudset.geometry import voxel
+from pointcloudset.geometry.spatial_index import SpatialIndex
+
+FARTHEST_POINT_BLOCK_SIZE = 256
+"""Number of points per block of :func:`farthest_point_indices`."""
+
+
+def _farthest_point_blocks_python(
+    coords: list[np.ndarray],
+    lower: np.ndarray,
+    upper: np.ndarray,
+    ids: np.ndarray,
+    n_points: int,
+    start: int,
+    out: np.ndarray,
+) -> None:
+    n_blocks = len(ids)
+    # picked points and the padding are -inf, so they are never picked (again)
+    min_distances = np.full(ids.shape, np.inf)
+    min_distances.flat[n_points:] = -np.inf
+    min_distances.flat[start] = -np.inf
+    block_max = np.full(n_blocks, np.inf)
+    x, y, z = (coords[axis].flat[start] for axis in range(3))
+    for number in range(1, len(out)):
+        center = (x, y, z)
+        box_distances = np.zeros(n_blocks)
+        for axis in range(3):
+            gap = np.maximum(np.maximum(lower[axis] - center[axis], center[axis] - upper[axis]), 0.0)
+            box_distances += gap * gap
+        # no point of a block is closer to the new point than its bounding box
+        blocks = np.flatnonzero(box_distances < block_max)
+        distances = (coords[0][blocks] - x) ** 2
+        distances += (coords[1][blocks] - y) ** 2
+        distances += (coords[2][blocks] - z) ** 2
+        updated = np.minimum(min_distances[blocks], distances)
+        min_distances[blocks] = updated
+        block_max[blocks] = updated.max(axis=1)
+        block = np.argmax(block_max)
+        position = np.argmax(min_distances[block])
+        out[number] = ids[block, position]
+        min_distances[block, position] = -np.inf
+        block_max[block] = min_distances[block].max()
+        x, y, z = (coords[axis][block, position] for axis in range(3))
+
+
+@njit(cache=True)
+def _farthest_point_blocks_numba(coords_x, coords_y, coords_z, lower, upper, ids, n_points, start, out):
+    n_blocks, block_size = ids.shape
+    min_distances = np.full((n_blocks, block_size), np.inf)
+    for flat in range(n_points, n_blocks * block_size):
+        min_distances[flat // block_size, flat % block_size] = -np.inf
+    block_max = np.full(n_blocks, np.inf)
+    block = start // block_size
+    position = start % block_size
+    min_distances[block, position] = -np.inf
+    for number in range(1, len(out)):
+        x = coords_x[block, position]
+        y = coords_y[block, position]
+        z = coords_z[block, position]
+        for b in range(n_blocks):
+            gap_x = max(max(lower[0, b] - x, x - upper[0, b]), 0.0)
+            gap_y = max(max(lower[1, b] - y, y - upper[1, b]), 0.0)
+            gap_z = max(max(lower[2, b] - z, z - upper[2, b]), 0.0)
+            if gap_x * gap_x + gap_y * gap_y + gap_z * gap_z >= block_max[b]:
+                continue
+            new_max = -np.inf
+            for p in range(block_size):
+                dx = coords_x[b, p] - x
+                dy = coords_y[b, p] - y
+                dz = coords_z[b, p] - z
+                distance = dx * dx + dy * dy + dz * dz
+                min_distances[b, p] = min(min_distances[b, p], distance)
+                new_max = max(new_max, min_distances[b, p])
+            block_max[b] = new_max
+        block = 0
+        for b in range(1, n_blocks):
+            if block_max[b] > block_max[block]:
+                block = b
+        position = 0
+        for p in range(1, block_size):
+            if min_distances[block, p] > min_distances[block, position]:
+                position = p
+        out[number] = ids[block, position]
+        min_distances[block, position] = -np.inf
+        new_max = -np.inf
+        for p in range(block_size):
+            new_max = max(new_max, min_distances[block, p])
+        block_max[block] = new_max
+
+
+def farthest_point_indices(index: SpatialIndex, number_of_points: int, start: int = 0) -> np.ndarray:
+    """Farthest point sampling: starting at one point, the point with the largest
+    distance to all points picked so far is added until there are number_of_points.
+
+    The points are split into blocks of :data:`FARTHEST_POINT_BLOCK_SIZE` neighbouring
+    points in the leaf order of the tree of the index. After each pick only the blocks
+    whose bounding box is closer to the new point than their current largest distance
+    are updated, which gives the same result as updating the distances of all points
+    in O(N·k), but touches fewer points the more points are picked. The loop is
+    compiled with Numba if it is installed, otherwise each pick is vectorized with
+    numpy.
+
+    Args:
+        index (SpatialIndex): Index of the points, which must all be finite.
+        number_of_points (int): Number of points to pick.
+        start (int, optional): Number of the first point. Defaults to 0.
+
+    Returns:
+        numpy.ndarray: Numbers of the picked points in the order they were picked, each
+        point at most once. Ties are broken by the leaf order of the tree.
+
+    Raises:
+        ValueError: If number_of_points is negative or larger than the number of points.
+    """
+    n_points = len(index)
+    if not 0 <= number_of_points <= n_points:
+        raise ValueError(f"number_of_points must be between 0 and {n_points}, got {number_of_points}")
+    out = np.empty(number_of_points, dtype=np.intp)
+    if number_of_points == 0:
+        return out
+    order = index.tree.indices
+    n_blocks = -(-n_points // FARTHEST_POINT_BLOCK_SIZE)
+    # the last block is filled up with copies of its last point
+    padded = np.concatenate([order, np.full(n_blocks * FARTHEST_POINT_BLOCK_SIZE - n_points, order[-1])])
+    ids = padded.reshape(n_blocks, FARTHEST_POINT_BLOCK_SIZE)
+    coords = [np.ascontiguousarray(index.xyz[padded, axis]).reshape(ids.shape) for axis in range(3)]
+    lower = np.stack([values.min(axis=1) for values in coords])
+    upper = np.stack([values.max(axis=1) for values in coords])
+    start_position = int(np.flatnonzero(padded == start)[0])
+    out[0] = start
+    if HAS_NUMBA:
+        _farthest_point_blocks_numba(*coords, lower, upper, ids, n_points, start_position, out)
+    else:
+        _farthest_point_blocks_python(coords, lower, upper, ids, n_points, start_position, out)
+    return out
+
+
+def stratified_indices(
+    xyz: np.ndarray, number_of_points: int, voxel_size: float, rng: np.random.Generator
+) -> np.ndarray:
+    """Sample stratified by voxel: every occupied voxel gets one random point before any
+    voxel gets a second one, and so on.
+
+    Points are ranked randomly within their voxel and the points with the lowest ranks
+    are picked, ties between voxels are broken randomly. Everything is done with two
+    sorts and one partition of all points.
+
+    Args:
+        xyz (numpy.ndarray): Points with shape (n, 3), points with NaN or infinite
+            coordinates are left out.
+        number_of_points (int): Number of points to pick.
+        voxel_size (float): Edge length of the voxels.
+        rng (numpy.random.Generator): Random number generator.
+
+    Returns:
+        numpy.ndarray: Sorted numbers of the picked points.
+
+    Raises:
+        ValueError: If number_of_points is negative or larger than the number of finite
+            points, or the points are too far from the origin for the voxel size.
+    """
+    order, starts = voxel.group_points(xyz, voxel_size)
+    n_points = len(order)
+    if not 0 <= number_of_points <= n_points:
+        raise ValueError(f"number_of_points must be between 0 and {n_points}, got {number_of_points}")
+    if number_of_points == 0:
+        return np.empty(0, dtype=np.intp)
+    counts = np.diff(np.append(starts, n_points))
+    labels = np.repeat(np.arange(len(starts)), counts)
+    # random order within each voxel, the random part stays below 0.5 so it never
+    # rounds up to the next voxel
+    shuffled = np.argsort(labels + 0.5 * rng.random(n_points))
+    ranks = np.arange(n_points) - np.repeat(starts, counts)
+    priority = ranks + 0.5 * rng.random(n_points)
+    picked = np.argpartition(priority, number_of_points - 1)[:number_of_points]
+    return np.sort(order[shuffled[picked]])
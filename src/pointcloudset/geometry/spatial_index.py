@@ -0,0 +1,136 @@
+"""
+Spatial index of the points of a pointcloud for neighbour queries.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from scipy.spatial import KDTree
+
+from pointcloudset.pipeline.execution import kernel_workers
+
+
+class SpatialIndex:
+    """KDTree of the points of a pointcloud with radius, k nearest neighbour and box
+    queries, see :attr:`pointcloudset.pointcloud.PointCloud.spatial_index`.
+
+    The tree is built on the first neighbour query and reused by all following ones.
+    The queries use the threads of :func:`pointcloudset.pipeline.execution.kernel_workers`.
+
+    Args:
+        xyz (numpy.ndarray): Points with shape (n, 3), which must not be changed.
+        tree (scipy.spatial.KDTree | None, optional): Tree of exactly these points.
+            Defaults to ``None`` which builds it when needed.
+
+    Raises:
+        ValueError: If xyz does not have the shape (n, 3).
+    """
+
+    def __init__(self, xyz: np.ndarray, tree: KDTree | None = None):
+        xyz = np.asarray(xyz, dtype=np.float64)
+        if xyz.ndim != 2 or xyz.shape[1] != 3:
+            raise ValueError(f"xyz must have the shape (n, 3), got {xyz.shape}")
+        self.xyz = xyz
+        """Coordinates of the indexed points."""
+        self._tree = tree
+        self._x_order: np.ndarray | None = None
+        self._sorted_x: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.xyz)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(points={len(self)}, built={self._tree is not None})"
+
+    @property
+    def tree(self) -> KDTree:
+        """The :class:`scipy.spatial.KDTree`, built on first use.
+
+        Raises:
+            ValueError: If a coordinate is NaN or infinite.
+        """
+        if self._tree is None:
+            self._tree = KDTree(self.xyz)
+        return self._tree
+
+    def query_radius(self, points: np.ndarray, radius: float, return_length: bool = False) -> np.ndarray:
+        """Indexed points within a radius of each query point, see
+        :meth:`scipy.spatial.KDTree.query_ball_point`.
+
+        Args:
+            points (numpy.ndarray): Query points with shape (m, 3).
+            radius (float): Search radius.
+            return_length (bool, optional): Return only the number of points within the
+                radius. Defaults to ``False``.
+
+        Returns:
+            numpy.ndarray: Object array with the list of point numbers per query point,
+            or the numbers of points.
+        """
+        return self.tree.query_ball_point(points, radius, workers=kernel_workers(), return_length=return_length)
+
+    def query_knn(
+        self, points: np.ndarray, k: int = 1, distance_upper_bound: float = np.inf
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The k nearest indexed points of each query point, see
+        :meth:`scipy.spatial.KDTree.query`.
+
+        Args:
+            points (numpy.ndarray): Query points with shape (m, 3).
+            k (int, optional): Number of neighbours. Defaults to 1.
+            distance_upper_bound (float, optional): Maximum distance. Defaults to infinity.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Distances and point numbers, with shape
+            (m,) for ``k=1`` and (m, k) otherwise. Missing neighbours have an infinite
+            distance and the number ``len(self)``.
+        """
+        return self.tree.query(points, k=k, distance_upper_bound=distance_upper_bound, workers=kernel_workers())
+
+    def query_box(self, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+        """Indexed points inside an axis aligned box, including its boundary.
+
+        Args:
+            lower (numpy.ndarray): Minimum corner (x, y, z), may be -inf.
+            upper (numpy.ndarray): Maximum corner (x, y, z), may be inf.
+
+        Returns:
+            numpy.ndarray: Sorted point numbers.
+        """
+        lower = np.asarray(lower, dtype=np.float64)
+        upper = np.asarray(upper, dtype=np.float64)
+        if self._x_order is None:
+            # NaN is sorted to the end and never matches
+            self._x_order = np.argsort(self.xyz[:, 0], kind="stable")
+            self._sorted_x = self.xyz[self._x_order, 0]
+        start = np.searchsorted(self._sorted_x, lower[0], side="left")
+        end = np.searchsorted(self._sorted_x, upper[0], side="right")
+        candidates = self._x_order[start:end]
+        points = self.xyz[candidates]
+        inside = np.all((points >= lower) & (points <= upper), axis=1)
+        return np.sort(candidates[inside])
+
+    def subset(self, indices: np.ndarray) -> SpatialIndex:
+        """Index of a subset of the points, for the result of a filter.
+
+        The tree is reused if all points are kept in the same order. Otherwise the new
+        index carries the coordinates of the subset and builds its tree only if it is
+        queried, which is faster than masking the results of the queries on the tree of
+        all points.
+
+        Args:
+            indices (numpy.ndarray): Boolean mask or numbers of the kept points.
+
+        Returns:
+            SpatialIndex: Index of the kept points, numbered from 0.
+        """
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        elif indices.size == 0:
+            indices = indices.astype(np.intp)
+        if len(indices) == len(self) and np.array_equal(indices, np.arange(len(self))):
+            return SpatialIndex(self.xyz, self._tree)
+        xyz = self.xyz.take(indices, axis=0)
+        xyz.flags.writeable = False
+        return SpatialIndex(xyz)
@@ -0,0 +1,213 @@
+"""
+Utility functions for voxel grids, sparse statistics per voxel and grouping of points
+by voxel for downsampling.
+
+Voxels are aligned with the origin, the voxel of a point has the indices
+``floor(xyz / voxel_size)``. The three indices are packed into one int64 key, so sparse
+grids can be merged with sorting and :func:`numpy.unique` instead of a groupby.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+KEY_BITS = 21
+KEY_OFFSET = 2 ** (KEY_BITS - 1)
+_KEY_MASK = 2**KEY_BITS - 1
+VOXEL_AGGS = ("first", "mean", "min", "max", "sum")
+
+
+def voxel_indices(xyz: np.ndarray, voxel_size: float) -> np.ndarray:
+    """Indices of the voxels of points.
+
+    Args:
+        xyz (numpy.ndarray): Points with shape (n, 3).
+        voxel_size (float): Edge length of the voxels.
+
+    Returns:
+        numpy.ndarray: int64 indices with shape (n, 3).
+    """
+    return np.floor(np.asarray(xyz, dtype=np.float64) / voxel_size).astype(np.int64)
+
+
+def pack_keys(indices: np.ndarray) -> np.ndarray:
+    """One int64 key per voxel, ordered by x, y and z index.
+
+    Args:
+        indices (numpy.ndarray): Voxel indices with shape (n, 3).
+
+    Returns:
+        numpy.ndarray: Keys with shape (n,).
+
+    Raises:
+        ValueError: If an index is outside of +-2**20, the points are too far from the
+            origin for the voxel size.
+    """
+    if len(indices) > 0 and (indices.min() < -KEY_OFFSET or indices.max() >= KEY_OFFSET):
+        raise ValueError(f"voxel index out of range +-{KEY_OFFSET}, use a larger voxel_size")
+    shifted = indices + KEY_OFFSET
+    return (shifted[:, 0] << (2 * KEY_BITS)) | (shifted[:, 1] << KEY_BITS) | shifted[:, 2]
+
+
+def unpack_keys(keys: np.ndarray) -> np.ndarray:
+    """Voxel indices with shape (n, 3) of keys from :func:`pack_keys`."""
+    keys = np.asarray(keys, dtype=np.int64)
+    indices = np.stack([keys >> (2 * KEY_BITS), (keys >> KEY_BITS) & _KEY_MASK, keys & _KEY_MASK], axis=1)
+    return indices - KEY_OFFSET
+
+
+def group_points(xyz: np.ndarray, voxel_size: float) -> tuple[np.ndarray, np.ndarray]:
+    """Points grouped by voxel with one sort of the voxel keys.
+
+    Args:
+        xyz (numpy.ndarray): Points with shape (n, 3), points with NaN or infinite
+            coordinates are left out.
+        voxel_size (float): Edge length of the voxels.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Point numbers sorted by voxel key and the
+        start of each voxel in them, for :meth:`numpy.ufunc.reduceat`. The points of one
+        voxel are not in a particular order.
+
+    Raises:
+        ValueError: If the points are too far from the origin for the voxel size, see
+            :func:`pack_keys`.
+    """
+    finite = np.flatnonzero(np.isfinite(xyz).all(axis=1))
+    keys = pack_keys(voxel_indices(xyz[finite], voxel_size))
+    # not stable, but several times faster than a stable sort of random keys
+    sorting = np.argsort(keys)
+    keys = keys[sorting]
+    new_voxel = np.ones(len(keys), dtype=bool)
+    new_voxel[1:] = keys[1:] != keys[:-1]
+    return finite[sorting], np.flatnonzero(new_voxel)
+
+
+def first_points(order: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Number of the first point of each voxel of :func:`group_points`."""
+    return np.minimum.reduceat(order, starts)
+
+
+def aggregate_groups(values: np.ndarray, order: np.ndarray, starts: np.ndarray, how: str) -> np.ndarray:
+    """Statistic of the values of each voxel of :func:`group_points`.
+
+    Args:
+        values (numpy.ndarray): One value per point.
+        order (numpy.ndarray): Point numbers sorted by voxel.
+        starts (numpy.ndarray): Start of each voxel in order.
+        how (str): One of :data:`VOXEL_AGGS`, "first" is the value of the point with
+            the lowest number. Except for "first" the values must be numeric and NaN is
+            skipped like in pandas.
+
+    Returns:
+        numpy.ndarray: One value per voxel. Means of integers are float64, the other
+        statistics keep the dtype, except sums of integers which are int64.
+
+    Raises:
+        ValueError: If how is not one of :data:`VOXEL_AGGS`.
+    """
+    if how not in VOXEL_AGGS:
+        raise ValueError(f"how must be one of {VOXEL_AGGS}, got {how}")
+    if how == "first":
+        return values.take(first_points(order, starts))
+    grouped = values.take(order)
+    if how in ("min", "max"):
+        # fmin and fmax skip NaN unless all values of a voxel are NaN
+        return (np.fmin if how == "min" else np.fmax).reduceat(grouped, starts)
+    is_float = np.issubdtype(grouped.dtype, np.floating)
+    if is_float:
+        missing = np.isnan(grouped)
+        grouped = np.where(missing, 0.0, grouped)
+    total = np.add.reduceat(grouped, starts, dtype=np.float64 if is_float or how == "mean" else np.int64)
+    if how == "sum":
+        return total.astype(values.dtype) if is_float else total
+    counts = np.diff(np.append(starts, len(grouped)))
+    if is_float:
+        counts = counts - np.add.reduceat(missing, starts, dtype=np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / counts
+    return mean.astype(values.dtype) if is_float else mean
+
+
+class VoxelCounts:
+    """Sparse statistics per voxel which can be merged: number of points, number of
+    pointclouds with points in the voxel and the sum and count of one value column.
+
+    Args:
+        keys (numpy.ndarray): Sorted unique voxel keys, see :func:`pack_keys`.
+        points (numpy.ndarray): Number of points per voxel.
+        pointclouds (numpy.ndarray): Number of pointclouds per voxel.
+        value_sum (numpy.ndarray | None, optional): Sum of the values per voxel.
+        value_count (numpy.ndarray | None, optional): Number of values which are not
+            NaN per voxel.
+    """
+
+    def __init__(
+        self,
+        keys: np.ndarray,
+        points: np.ndarray,
+        pointclouds: np.ndarray,
+        value_sum: np.ndarray | None = None,
+        value_count: np.ndarray | None = None,
+    ):
+        self.keys = keys
+        self.points = points
+        self.pointclouds = pointclouds
+        self.value_sum = value_sum
+        self.value_count = value_count
+
+    @classmethod
+    def from_points(
+        cls, xyz: np.ndarray, voxel_size: float, bounds: tuple | None = None, values: np.ndarray | None = None
+    ) -> VoxelCounts:
+        """Statistics of the points of one pointcloud.
+
+        Args:
+            xyz (numpy.ndarray): Points with shape (n, 3), points with NaN or infinite
+                coordinates are ignored.
+            voxel_size (float): Edge length of the voxels.
+            bounds (tuple | None, optional): Minimum and maximum corner, points outside
+                are ignored. Defaults to ``None``.
+            values (numpy.ndarray | None, optional): Value per point to sum per voxel,
+                NaN and infinite values are ignored. Defaults to ``None``.
+
+        Returns:
+            VoxelCounts: Statistics, each voxel counts as one pointcloud.
+        """
+        keep = np.isfinite(xyz).all(axis=1)
+        if bounds is not None:
+            keep &= np.all((xyz >= bounds[0]) & (xyz <= bounds[1]), axis=1)
+        keys = pack_keys(voxel_indices(xyz[keep], voxel_size))
+        keys, inverse, points = np.unique(keys, return_inverse=True, return_counts=True)
+        value_sum = value_count = None
+        if values is not None:
+            values = values[keep]
+            finite = np.isfinite(values)
+            value_sum = np.bincount(inverse[finite], weights=values[finite], minlength=len(keys))
+            value_count = np.bincount(inverse[finite], minlength=len(keys))
+        return cls(keys, points, np.ones(len(keys), dtype=np.int64), value_sum, value_count)
+
+    @classmethod
+    def merge(cls, parts: list[VoxelCounts]) -> VoxelCounts:
+        """Combine the statistics of disjoint sets of pointclouds.
+
+        Args:
+            parts (list[VoxelCounts]): Statistics, all with or all without values.
+
+        Returns:
+            VoxelCounts: Statistics of all pointclouds.
+        """
+        if len(parts) == 1:
+            return parts[0]
+        keys, inverse = np.unique(np.concatenate([part.keys for part in parts]), return_inverse=True)
+
+        def total(arrays: list[np.ndarray]) -> np.ndarray:
+            return np.bincount(inverse, weights=np.concatenate(arrays), minlength=len(keys))
+
+        points = total([part.points for part in parts]).astype(np.int64)
+        pointclouds = total([part.pointclouds for part in parts]).astype(np.int64)
+        value_sum = value_count = None
+        if parts[0].value_sum is not None:
+            value_sum = total([part.value_sum for part in parts])
+            value_count = total([part.value_count for part in parts]).astype(np.int64)
+        return cls(keys, points, pointclouds, value_sum, value_count)
@@ -12,6 +12,8 @@ import pointcloudset
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
 DELIMITER = ";"
+# name of the index column written by dask.dataframe.to_parquet
+DASK_INDEX = "__null_dask_index__"
 
 
 def dataset_to_dir(dataset_in, file_path: Path, use_orig_filename: bool = True, **kwargs) -> Path:
@@ -33,15 +35,52 @@ def dataset_to_dir(dataset_in, file_path: Path, use_orig_filename: bool = True,
     empty_data = _get_empty_data(dataset_in)
     dataset_to_write = dataset_in._replace_empty_frames_with_nan(empty_data)
     data = dd.from_delayed(dataset_to_write.data)
-    data.to_parquet(folder, **kwargs)
-    meta = dataset_in.meta
-    meta["timestamps"] = [timestamp.strftime(DATETIME_FORMAT) for timestamp in dataset_in.timestamps]
+    with dataset_in.execution.activate():
+        data.to_parquet(folder, **kwargs)
+    meta_to_dir(folder, dataset_in.meta, dataset_in.timestamps, empty_data, dataset_in.frame_bounds)
+    _check_dir_contents(folder)
+    return folder.parent
+
+
+def part_to_dir(data: pd.DataFrame, folder: Path, number: int) -> None:
+    """Writes the data of one pointcloud as a part of a Dataset directory, in the same
+    layout as :func:`dataset_to_dir`. Used to write a Dataset one pointcloud at a time.
+
+    Args:
+        data (pandas.DataFrame): Data of the pointcloud, not empty.
+        folder (pathlib.Path): Directory of the Dataset.
+        number (int): Number of the pointcloud.
+    """
+    data.rename_axis(DASK_INDEX).to_parquet(folder.joinpath(f"part.{number}.parquet"), index=True)
+
+
+def meta_to_dir(
+    folder: Path,
+    meta: dict,
+    timestamps: list[datetime],
+    empty_data: pd.DataFrame,
+    frame_bounds: np.ndarray | None = None,
+) -> None:
+    """Writes the meta data of a Dataset directory. The meta dict is updated in place.
+
+    Args:
+        folder (pathlib.Path): Directory of the Dataset.
+        meta (dict): Meta data of the Dataset.
+        timestamps (list[datetime.datetime]): Timestamps of all pointclouds.
+        empty_data (pandas.DataFrame): Placeholder which was written for empty
+            pointclouds.
+        frame_bounds (numpy.ndarray | None, optional): Bounding box of each pointcloud,
+            see :attr:`pointcloudset.dataset.Dataset.frame_index`. Defaults to ``None``.
+    """
+    meta["timestamps"] = [timestamp.strftime(DATETIME_FORMAT) for timestamp in timestamps]
     meta["empty_data"] = empty_data.to_dict()
     meta["version"] = pointcloudset.__version__
+    if frame_bounds is None:
+        meta.pop("frame_bounds", None)
+    else:
+        meta["frame_bounds"] = frame_bounds.tolist()
     with open(folder.joinpath("meta.json"), "w") as outfile:
-        json.dump(dataset_in.meta, outfile)
-    _check_dir_contents(folder)
-    return folder.parent
+        json.dump(meta, outfile)
 
 
 def dataset_from_dir(dir: Path, ext: str) -> dict:
@@ -4,20 +4,28 @@ from typing import TYPE_CHECKING
 
 import dask
 
+from pointcloudset.pipeline.frame_store import FrameStore
+
 if TYPE_CHECKING:
     from pointcloudset import PointCloud
 
 
-def dataset_from_pointclouds(pointclouds: list[PointCloud]) -> dict:
+def dataset_from_pointclouds(pointclouds: list[PointCloud], frame_store: FrameStore | None = None) -> dict:
     """Convert a list of pointcloud pointclouds to a new dataset.
 
     Args:
         pointclouds (list[PointCloud]): A list of pointclouds.
+        frame_store (FrameStore | None, optional): Store which keeps the data of the
+            pointclouds within a memory limit and spills the rest to disk. Defaults to
+            ``None`` which means all data stays in memory.
 
     Returns:
         dict: For convertion to dataset.
     """
-    data = [dask.delayed(pointcloud.data) for pointcloud in pointclouds]
+    if frame_store is None:
+        data = [dask.delayed(pointcloud.data) for pointcloud in pointclouds]
+    else:
+        data = [frame_store.delayed(pointcloud.data) for pointcloud in pointclouds]
     timestamps = [pointcloud.timestamp for pointcloud in pointclouds]
     meta = {"orig_file": "from pointclouds list"}
     return {"data": data, "timestamps": timestamps, "meta": meta}
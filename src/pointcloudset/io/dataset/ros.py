@@ -56,6 +56,8 @@ from rosbags.rosbag2 import Reader as Reader2
 from rosbags.serde import deserialize_cdr, ros1_to_cdr
 from rosbags.typesys.types import sensor_msgs__msg__PointCloud2
 
+from pointcloudset.pipeline.frame_store import FrameStore
+
 _DATATYPES = {
     1: ("b", 1),
     2: ("B", 1),
@@ -86,6 +88,7 @@ def dataset_from_ros(
     end_frame_number: int = None,
     keep_zeros: bool = False,
     ext: Literal["BAG", "ROS2"] = "BAG",
+    frame_store: FrameStore | None = None,
 ) -> Union[dict, None]:
     """Reads a Dataset from a ROS1 bag of ROS2 mcap or db3 file.
 
@@ -98,6 +101,10 @@ def dataset_from_ros(
             Defaults to None.
         keep_zeros (bool, optional): If ``True`` keep zeros in frames, if ``False``
             do not keep zeros in frames. Defaults to False.
+        frame_store (FrameStore | None, optional): Store which keeps the pointclouds
+            within a memory limit and spills the rest to a local scratch directory, for
+            recordings which do not fit into memory. Defaults to ``None`` which means
+            all pointclouds stay in memory.
 
     Returns:
         Union[dict, None]: Dict to generate Dataset.
@@ -137,7 +144,11 @@ def dataset_from_ros(
                     msg = deserialize_cdr(ros1_to_cdr(rawdata, connection.msgtype), connection.msgtype)
                 elif rosversion == 2:
                     msg = deserialize_cdr(rawdata, connection.msgtype)
-                data_of_frame = delayed(_dataframe_from_message(msg, keep_zeros=keep_zeros))
+                data_of_frame = _dataframe_from_message(msg, keep_zeros=keep_zeros)
+                if frame_store is None:
+                    data_of_frame = delayed(data_of_frame)
+                else:
+                    data_of_frame = frame_store.delayed(data_of_frame)
                 data.append(data_of_frame)
 
     return {"data": data, "timestamps": timestamps, "meta": meta}
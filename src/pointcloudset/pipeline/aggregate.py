@@ -0,0 +1,621 @@
+"""
+Mergeable per key statistics to aggregate a Dataset in a single pass without a dask
+shuffle.
+
+Each frame is reduced to dense arrays with the count, sum, sum of squared deviations
+(Welford/Chan M2), minimum and maximum of every column per key. The key is the
+``original_id`` if all frames have one and the row number of the point otherwise,
+the same keys :meth:`pointcloudset.dataset_core.DatasetCore._agg` groups by. The
+states of all frames are merged in a tree reduction and turned into the same
+DataFrame as the dask groupby.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from dask import delayed
+
+from pointcloudset.config import DATASET_AGG_PERCENTILE_BINS, DATASET_BATCH_TARGET_MB
+from pointcloudset.pipeline.batch import auto_batch_size, batch_slices
+from pointcloudset.pipeline.execution import run_with_kernel_workers
+
+if TYPE_CHECKING:
+    from pointcloudset.dataset_core import DatasetCore
+
+SUPPORTED_STATS = ("count", "sum", "mean", "std", "var", "min", "max")
+KEY_COLUMN = "original_id"
+MERGE_FAN_IN = 8
+
+
+class Unsupported(Exception):
+    """Raised if the data or aggregation can not be handled with mergeable states."""
+
+
+def parse_agg(agg: str | list | dict, columns: list[str]) -> tuple[list[tuple[str, str]], bool]:
+    """Columns and statistics of an aggregation in the order of the dask result.
+
+    Args:
+        agg (str | list | dict): Aggregation as in :meth:`pandas.DataFrame.agg`.
+        columns (list[str]): Value columns of the data.
+
+    Returns:
+        tuple[list[tuple[str, str]], bool]: (column, statistic) pairs and whether the
+        result has two column levels.
+
+    Raises:
+        Unsupported: If a statistic is not supported or the dict mixes single
+            statistics and lists.
+    """
+    if isinstance(agg, str):
+        pairs, multi = [(column, agg) for column in columns], False
+    elif isinstance(agg, list):
+        pairs, multi = [(column, stat) for column in columns for stat in agg], True
+    elif isinstance(agg, dict):
+        values = list(agg.values())
+        if all(isinstance(value, str) for value in values):
+            pairs, multi = list(agg.items()), False
+        elif all(isinstance(value, list) for value in values):
+            pairs, multi = [(column, stat) for column, stats in agg.items() for stat in stats], True
+        else:
+            raise Unsupported("mixed dict")
+        if any(column not in columns for column in agg):
+            raise Unsupported("unknown column")
+    else:
+        raise Unsupported(f"agg of type {type(agg).__name__}")
+    if any(not isinstance(stat, str) or stat not in SUPPORTED_STATS for _, stat in pairs):
+        raise Unsupported("statistic")
+    return pairs, multi
+
+
+def max_keys(bytes_per_key: int) -> int:
+    """Number of keys of a dense state with ``bytes_per_key`` bytes per key which fits
+    the memory target of a task, :data:`pointcloudset.config.DATASET_BATCH_TARGET_MB`."""
+    return max(int(DATASET_BATCH_TARGET_MB * 1024**2) // bytes_per_key, 1)
+
+
+def _frame_keys(df: pd.DataFrame, by_original_id: bool, size: int) -> tuple[np.ndarray, np.ndarray | None]:
+    """Keys of the points of one frame as int64 and the mask of points with a key,
+    ``None`` if all points have one. The keys must be less than ``size``."""
+    keys = df[KEY_COLUMN].to_numpy() if by_original_id else df.index.to_numpy()
+    valid = None
+    if keys.dtype.kind == "f" and by_original_id:
+        # points without original_id are dropped like in a groupby
+        valid = ~np.isnan(keys)
+        keys = keys[valid]
+        if np.any(keys != np.floor(keys)):
+            raise Unsupported("non integer original_id")
+    elif keys.dtype.kind not in "iu":
+        raise Unsupported("non integer keys")
+    keys = keys.astype(np.int64, copy=False)
+    if len(keys) > 0 and (keys.min() < 0 or keys.max() >= size):
+        raise Unsupported("keys out of range")
+    return keys, valid
+
+
+class AggState:
+    """Count, sum, M2, min and max per key for several columns, stored as dense
+    arrays indexed by the key.
+
+    Args:
+        columns (list[str]): Value columns.
+        dtypes (dict): dtype of each column and of the key column.
+        by_original_id (bool): ``True`` if the keys are original_ids, ``False`` if they
+            are row numbers.
+        size (int): Number of keys.
+        need_moments (bool): Whether sum and M2 are needed.
+        need_extrema (bool): Whether min and max are needed.
+    """
+
+    def __init__(
+        self,
+        columns: list[str],
+        dtypes: dict,
+        by_original_id: bool,
+        size: int,
+        need_moments: bool,
+        need_extrema: bool,
+    ):
+        self.columns = columns
+        self.dtypes = dtypes
+        self.by_original_id = by_original_id
+        self.need_moments = need_moments
+        self.need_extrema = need_extrema
+        n_columns = len(columns)
+        self.rows = np.zeros(size, dtype=np.int64)
+        self.count = np.zeros((n_columns, size), dtype=np.int64)
+        if need_moments:
+            self.sum = np.zeros((n_columns, size))
+            self.m2 = np.zeros((n_columns, size))
+        if need_extrema:
+            self.min = np.full((n_columns, size), np.inf)
+            self.max = np.full((n_columns, size), -np.inf)
+            # integer columns keep their exact values
+            self.int_min = {}
+            self.int_max = {}
+            for i, column in enumerate(columns):
+                kind = np.dtype(dtypes[column]).kind
+                if kind in "iu":
+                    int_type = np.uint64 if kind == "u" else np.int64
+                    self.int_min[i] = np.full(size, np.iinfo(int_type).max, dtype=int_type)
+                    self.int_max[i] = np.full(size, np.iinfo(int_type).min, dtype=int_type)
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
+
+    @staticmethod
+    def bytes_per_key(columns: list[str], dtypes: dict, need_moments: bool, need_extrema: bool) -> int:
+        """Memory of the arrays of a state per key."""
+        n_int = sum(np.dtype(dtypes[column]).kind in "iu" for column in columns) if need_extrema else 0
+        return 8 + len(columns) * (8 + 16 * need_moments + 16 * need_extrema) + 16 * n_int
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, columns: list[str], need_moments: bool, need_extrema: bool, keyless: bool = False
+    ) -> AggState:
+        """Statistics of one frame.
+
+        With ``keyless`` all points have the key 0 and the original_id is not a value
+        column, so the state holds the statistics of all points.
+
+        Raises:
+            Unsupported: If the columns differ from the first frame, a column is not
+                numeric or the keys are not non negative integers for which the state
+                fits :data:`pointcloudset.config.DATASET_BATCH_TARGET_MB`.
+        """
+        by_original_id = KEY_COLUMN in df.columns and KEY_COLUMN not in columns
+        value_columns = [column for column in df.columns if column != KEY_COLUMN or not by_original_id]
+        if value_columns != columns:
+            raise Unsupported("columns differ between frames")
+        dtypes = dict(df.dtypes.items())
+        if any(dtype.kind not in "iuf" for dtype in dtypes.values()):
+            raise Unsupported("non numeric column")
+        if keyless:
+            return cls._keyless_from_frame(df, columns, dtypes, by_original_id, need_moments, need_extrema)
+        limit = max_keys(cls.bytes_per_key(columns, dtypes, need_moments, need_extrema))
+        keys, valid = _frame_keys(df, by_original_id, limit)
+        size = int(keys.max()) + 1 if len(keys) > 0 else 0
+        state = cls(columns, dtypes, by_original_id, size, need_moments, need_extrema)
+        rows = np.bincount(keys, minlength=size)
+        state.rows = rows
+        # one conversion of the whole frame, selecting columns by label is slow per frame
+        positions = [i for i, column in enumerate(df.columns) if column != KEY_COLUMN or not by_original_id]
+        values = df.to_numpy(dtype=np.float64)
+        if len(positions) < values.shape[1]:
+            values = values[:, positions]
+        if valid is not None:
+            values = values[valid]
+        finite = ~np.isnan(values)
+        int_values = {i: df.iloc[:, positions[i]].to_numpy() for i in state.int_min} if need_extrema else {}
+        if valid is not None:
+            int_values = {i: column_values[valid] for i, column_values in int_values.items()}
+        if rows.max(initial=0) <= 1:
+            # with unique keys (always for row numbers) the statistics are the values
+            state.count[:, keys] = finite.T
+            if need_moments:
+                state.sum[:, keys] = np.where(finite, values, 0.0).T
+            if need_extrema:
+                state.min[:, keys] = np.where(finite, values, np.inf).T
+                state.max[:, keys] = np.where(finite, values, -np.inf).T
+                for i, column_values in int_values.items():
+                    state.int_min[i][keys] = column_values
+                    state.int_max[i][keys] = column_values
+            return state
+        for i in range(len(columns)):
+            finite_keys = keys[finite[:, i]]
+            finite_values = values[finite[:, i], i]
+            count = np.bincount(finite_keys, minlength=size)
+            state.count[i] = count
+            if need_moments:
+                total = np.bincount(finite_keys, weights=finite_values, minlength=size)
+                state.sum[i] = total
+                mean = np.divide(total, count, out=np.zeros(size), where=count > 0)
+                state.m2[i] = np.bincount(finite_keys, weights=(finite_values - mean[finite_keys]) ** 2, minlength=size)
+            if need_extrema:
+                np.minimum.at(state.min[i], finite_keys, finite_values)
+                np.maximum.at(state.max[i], finite_keys, finite_values)
+                if i in int_values:
+                    np.minimum.at(state.int_min[i], keys, int_values[i])
+                    np.maximum.at(state.int_max[i], keys, int_values[i])
+        return state
+
+    @classmethod
+    def _keyless_from_frame(
+        cls,
+        df: pd.DataFrame,
+        columns: list[str],
+        dtypes: dict,
+        by_original_id: bool,
+        need_moments: bool,
+        need_extrema: bool,
+    ) -> AggState:
+        state = cls(columns, dtypes, False, 1, need_moments, need_extrema)
+        positions = [i for i, column in enumerate(df.columns) if column != KEY_COLUMN or not by_original_id]
+        values = df.to_numpy(dtype=np.float64)
+        if len(positions) < values.shape[1]:
+            values = values[:, positions]
+        finite = ~np.isnan(values)
+        count = finite.sum(axis=0)
+        state.rows[0] = len(values)
+        state.count[:, 0] = count
+        if need_moments:
+            total = np.where(finite, values, 0.0).sum(axis=0)
+            mean = np.divide(total, count, out=np.zeros(len(columns)), where=count > 0)
+            state.sum[:, 0] = total
+            state.m2[:, 0] = np.where(finite, (values - mean) ** 2, 0.0).sum(axis=0)
+        if need_extrema:
+            state.min[:, 0] = np.min(values, axis=0, initial=np.inf, where=finite)
+            state.max[:, 0] = np.max(values, axis=0, initial=-np.inf, where=finite)
+            for i in state.int_min:
+                column_values = df.iloc[:, positions[i]].to_numpy()
+                state.int_min[i][0] = column_values.min(initial=state.int_min[i][0])
+                state.int_max[i][0] = column_values.max(initial=state.int_max[i][0])
+        return state
+
+    def _resized(self, size: int) -> AggState:
+        if size == self.size:
+            return self
+        state = AggState(self.columns, self.dtypes, self.by_original_id, size, self.need_moments, self.need_extrema)
+        n = self.size
+        state.rows[:n] = self.rows
+        state.count[:, :n] = self.count
+        if self.need_moments:
+            state.sum[:, :n] = self.sum
+            state.m2[:, :n] = self.m2
+        if self.need_extrema:
+            state.min[:, :n] = self.min
+            state.max[:, :n] = self.max
+            for i in self.int_min:
+                state.int_min[i][:n] = self.int_min[i]
+                state.int_max[i][:n] = self.int_max[i]
+        return state
+
+    def merge(self, other: AggState, inplace: bool = False) -> AggState:
+        """Combine the statistics of two disjoint sets of frames.
+
+        Args:
+            other (AggState): Statistics of the other frames.
+            inplace (bool, optional): Reuse the arrays of this state if possible.
+                Defaults to ``False``.
+
+        Returns:
+            AggState: Statistics of all frames.
+
+        Raises:
+            Unsupported: If one state is keyed by original_id and the other by row
+                number or the dtypes differ.
+        """
+        if self.by_original_id != other.by_original_id:
+            raise Unsupported("original_id missing in some frames")
+        if self.dtypes != other.dtypes:
+            raise Unsupported("dtypes differ between frames")
+        size = max(self.size, other.size)
+        if size != self.size:
+            a = self._resized(size)
+        else:
+            a = self if inplace else self._copy()
+        b = other._resized(size)
+        count = a.count + b.count
+        if a.need_moments:
+            mean_a = np.divide(a.sum, a.count, out=np.zeros_like(a.sum), where=a.count > 0)
+            mean_b = np.divide(b.sum, b.count, out=np.zeros_like(b.sum), where=b.count > 0)
+            correction = np.divide(
+                (mean_b - mean_a) ** 2 * a.count * b.count,
+                count,
+                out=np.zeros_like(a.sum),
+                where=count > 0,
+            )
+            a.m2 += b.m2 + correction
+            a.sum += b.sum
+        if a.need_extrema:
+            np.minimum(a.min, b.min, out=a.min)
+            np.maximum(a.max, b.max, out=a.max)
+            for i in a.int_min:
+                np.minimum(a.int_min[i], b.int_min[i], out=a.int_min[i])
+                np.maximum(a.int_max[i], b.int_max[i], out=a.int_max[i])
+        a.count = count
+        a.rows = a.rows + b.rows
+        return a
+
+    def _copy(self) -> AggState:
+        state = AggState.__new__(AggState)
+        state.__dict__.update(self.__dict__)
+        state.rows = self.rows.copy()
+        state.count = self.count.copy()
+        if self.need_moments:
+            state.sum = self.sum.copy()
+            state.m2 = self.m2.copy()
+        if self.need_extrema:
+            state.min = self.min.copy()
+            state.max = self.max.copy()
+            state.int_min = {i: array.copy() for i, array in self.int_min.items()}
+            state.int_max = {i: array.copy() for i, array in self.int_max.items()}
+        return state
+
+    def statistic(self, column: str, stat: str, present: np.ndarray) -> np.ndarray:
+        """Values of one statistic of one column for the keys in ``present``."""
+        i = self.columns.index(column)
+        count = self.count[i, present]
+        dtype = self.dtypes[column]
+        if stat == "count":
+            return count
+        if stat in ("min", "max"):
+            if i in self.int_min:
+                values = (self.int_min if stat == "min" else self.int_max)[i][present]
+                return values.astype(dtype)
+            values = (self.min if stat == "min" else self.max)[i, present]
+            values = np.where(count > 0, values, np.nan)
+            return values.astype(dtype)
+        if stat == "sum":
+            total = self.sum[i, present]
+            if np.dtype(dtype).kind in "iu":
+                total = np.rint(total).astype(np.int64)
+            return total.astype(dtype)
+        if stat == "mean":
+            return np.divide(self.sum[i, present], count, out=np.full(len(count), np.nan), where=count > 0)
+        variance = np.divide(self.m2[i, present], count - 1, out=np.full(len(count), np.nan), where=count > 1)
+        return np.sqrt(variance) if stat == "std" else variance
+
+    def to_frame(self, pairs: list[tuple[str, str]], multi: bool) -> pd.DataFrame:
+        """Same DataFrame as the dask groupby aggregation of
+        :meth:`pointcloudset.dataset_core.DatasetCore._agg`."""
+        present = np.flatnonzero(self.rows)
+        data = {}
+        for column, stat in pairs:
+            data[(column, stat) if multi else column] = self.statistic(column, stat, present)
+        if self.by_original_id:
+            n_key = ("N", "") if multi else "N"
+            id_key = (KEY_COLUMN, "") if multi else KEY_COLUMN
+            data[n_key] = self.rows[present]
+            data[id_key] = present.astype(self.dtypes[KEY_COLUMN])
+            df = pd.DataFrame(data)
+        else:
+            df = pd.DataFrame(data, index=pd.Index(present, name="dummy"))
+        if multi:
+            df.columns = pd.MultiIndex.from_tuples(list(data.keys()))
+        return df
+
+
+def _batch_state(frames: list[pd.DataFrame], columns: list[str], need_moments: bool, need_extrema: bool):
+    state = None
+    try:
+        for frame in frames:
+            if len(frame) == 0:
+                # empty frames do not add groups, and their dtypes are meaningless
+                continue
+            frame_state = AggState.from_frame(frame, columns, need_moments, need_extrema)
+            state = frame_state if state is None else state.merge(frame_state, inplace=True)
+    except Unsupported as error:
+        return error
+    return state
+
+
+def _batch_histogram(
+    frames: list[pd.DataFrame],
+    columns: list[str],
+    by_original_id: bool,
+    low: np.ndarray,
+    high: np.ndarray,
+    bins: int,
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Histograms per key between ``low`` and ``high`` of the columns of a batch.
+
+    The histograms are sparse, the sorted numbers ``key * bins + bin`` of the bins with
+    values and their counts per column, so they take memory per point of the batch and
+    not per key and bin.
+    """
+    size = low.shape[1]
+    width = (high - low) / bins
+    codes = [[np.empty(0, dtype=np.int64)] for _ in columns]
+    for frame in frames:
+        if len(frame) == 0:
+            continue
+        keys, valid = _frame_keys(frame, by_original_id, size)
+        for i, column in enumerate(columns):
+            values = frame[column].to_numpy(dtype=np.float64)
+            if valid is not None:
+                values = values[valid]
+            finite = ~np.isnan(values)
+            column_keys = keys[finite]
+            column_width = width[i, column_keys]
+            offset = values[finite] - low[i, column_keys]
+            bin_number = np.divide(offset, column_width, out=np.zeros_like(offset), where=column_width > 0)
+            bin_number = np.clip(bin_number.astype(np.int64), 0, bins - 1)
+            codes[i].append(column_keys * bins + bin_number)
+    return [np.unique(np.concatenate(column_codes), return_counts=True) for column_codes in codes]
+
+
+def _sum_histograms(histograms: list) -> list[tuple[np.ndarray, np.ndarray]] | Unsupported:
+    for histogram in histograms:
+        if isinstance(histogram, Unsupported):
+            return histogram
+    result = []
+    for column_histograms in zip(*histograms, strict=True):
+        codes, inverse = np.unique(np.concatenate([codes for codes, _ in column_histograms]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([counts for _, counts in column_histograms]))
+        result.append((codes, counts.astype(np.int64)))
+    return result
+
+
+def _dense_histogram(codes: np.ndarray, counts: np.ndarray, size: int, bins: int) -> np.ndarray:
+    """Counts with shape (keys, bins) of a sparse histogram of :func:`_batch_histogram`."""
+    histogram = np.zeros(size * bins, dtype=np.int64)
+    histogram[codes] = counts
+    return histogram.reshape(size, bins)
+
+
+def _histogram_order_statistic(
+    histogram: np.ndarray, cumulative: np.ndarray, low: np.ndarray, high: np.ndarray, rank: np.ndarray
+) -> np.ndarray:
+    """Value of the ``rank``-th smallest value (0 based) per key, assuming the values
+    of a bin are spread evenly over it."""
+    bins = histogram.shape[1]
+    bin_number = np.minimum((cumulative <= rank[:, None]).sum(axis=1), bins - 1)
+    rows = np.arange(len(bin_number))
+    in_bin = histogram[rows, bin_number]
+    before = cumulative[rows, bin_number] - in_bin
+    fraction = np.divide(rank - before + 0.5, in_bin, out=np.zeros(len(rank)), where=in_bin > 0)
+    values = low + (bin_number + np.clip(fraction, 0.0, 1.0)) * (high - low) / bins
+    return np.clip(values, low, high)
+
+
+def histogram_percentiles(
+    histogram: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    percentile: float,
+) -> np.ndarray:
+    """Percentile per key from histograms with equal bins between low and high, with
+    linear interpolation between the closest ranks like :func:`numpy.percentile`. The
+    error is at most one bin width.
+
+    Args:
+        histogram (numpy.ndarray): Counts with shape (keys, bins).
+        low (numpy.ndarray): Lower edge per key, the minimum.
+        high (numpy.ndarray): Upper edge per key, the maximum.
+        percentile (float): Percentile between 0 and 100.
+
+    Returns:
+        numpy.ndarray: Percentile per key, NaN for keys without values.
+    """
+    cumulative = np.cumsum(histogram, axis=1, dtype=np.int64)
+    n_values = cumulative[:, -1]
+    rank = percentile / 100 * np.maximum(n_values - 1, 0)
+    lower_rank = np.floor(rank)
+    lower = _histogram_order_statistic(histogram, cumulative, low, high, lower_rank)
+    upper = _histogram_order_statistic(histogram, cumulative, low, high, np.minimum(lower_rank + 1, n_values - 1))
+    values = lower + (rank - lower_rank) * (upper - lower)
+    # the extreme percentiles are known exactly
+    if percentile <= 0:
+        values = low
+    elif percentile >= 100:
+        values = high
+    return np.where(n_values > 0, values, np.nan)
+
+
+def _merge_states(states: list):
+    for state in states:
+        if isinstance(state, Unsupported):
+            return state
+    states = [state for state in states if state is not None]
+    if not states:
+        return None
+    try:
+        return _merge_all(states)
+    except Unsupported as error:
+        return error
+
+
+def _merge_all(states: list[AggState]) -> AggState:
+    merged = states[0]._copy()
+    for state in states[1:]:
+        merged = merged.merge(state, inplace=True)
+    return merged
+
+
+def _tree_reduce(dataset: DatasetCore, batch_func, merge_func, first: pd.DataFrame, *args, labels=None):
+    """Apply ``batch_func(frames, *args)`` to batches of frames and combine the results
+    with ``merge_func(results)`` in a tree. If ``labels`` with one value per frame are
+    given, the labels of the frames of the batch are passed as last argument."""
+    batch_size = auto_batch_size(
+        len(dataset),
+        int(first.memory_usage(index=False).sum()),
+        int(DATASET_BATCH_TARGET_MB * 1024**2),
+        n_workers=dataset.execution.num_workers,
+    )
+    kernel_workers = dataset.execution.kernel_workers()
+    results = [
+        delayed(run_with_kernel_workers)(
+            kernel_workers, batch_func, dataset.data[frames], *args, *(() if labels is None else (labels[frames],))
+        )
+        for frames in batch_slices(len(dataset), batch_size)
+    ]
+    while len(results) > 1:
+        results = [
+            delayed(merge_func)(results[start : start + MERGE_FAN_IN]) for start in range(0, len(results), MERGE_FAN_IN)
+        ]
+    result = dataset.execution.compute(delayed(merge_func)(results))[0]
+    if isinstance(result, Unsupported):
+        raise result
+    return result
+
+
+def percentile_name(percentile: float) -> str:
+    """Name of a percentile statistic, for example "p90"."""
+    return f"p{percentile:g}"
+
+
+def aggregate_by_key(
+    dataset: DatasetCore,
+    agg: str | list | dict,
+    require_original_id: bool = False,
+    percentiles: list[float] | None = None,
+) -> pd.DataFrame:
+    """Aggregate a Dataset per original_id or row number with mergeable states.
+
+    Args:
+        dataset (DatasetCore): Dataset to aggregate.
+        agg (str | list | dict): Aggregation with the statistics in
+            :data:`SUPPORTED_STATS`.
+        require_original_id (bool, optional): Only aggregate per original_id.
+            Defaults to ``False``.
+        percentiles (list[float] | None, optional): Percentiles between 0 and 100 to
+            add for each aggregated column. They are interpolated from histograms with
+            :data:`pointcloudset.config.DATASET_AGG_PERCENTILE_BINS` bins between the
+            minimum and maximum of each key, computed in a second pass. Defaults to
+            ``None``.
+
+    Returns:
+        pandas.DataFrame: Same result as ``dataset._agg(agg).compute()``, sorted by
+        the key. Percentile columns are named like the statistics, for example
+        "p90", and are placed before "N".
+
+    Raises:
+        Unsupported: If the aggregation or data is not supported, for example non
+            numeric columns or original_ids in some frames only.
+    """
+    first = dataset.execution.for_single_task().compute(dataset.data[0])[0]
+    by_original_id = KEY_COLUMN in first.columns
+    if require_original_id and not by_original_id:
+        raise Unsupported("original_id missing")
+    columns = [column for column in first.columns if column != KEY_COLUMN or not by_original_id]
+    pairs, multi = parse_agg(agg, columns)
+    stats = {stat for _, stat in pairs}
+    need_moments = bool(stats & {"sum", "mean", "std", "var"})
+    need_extrema = bool(stats & {"min", "max"}) or bool(percentiles)
+    state = _tree_reduce(dataset, _batch_state, _merge_states, first, columns, need_moments, need_extrema)
+    if state is None:
+        raise Unsupported("no data")
+    if require_original_id and not state.by_original_id:
+        raise Unsupported("original_id missing")
+    df = state.to_frame(pairs, multi)
+    if not percentiles:
+        return df
+    percentile_columns = list(dict.fromkeys(column for column, _ in pairs))
+    indices = [columns.index(column) for column in percentile_columns]
+    low = np.where(np.isfinite(state.min[indices]), state.min[indices], 0.0)
+    high = np.where(np.isfinite(state.max[indices]), state.max[indices], 0.0)
+    histogram = _tree_reduce(
+        dataset,
+        _batch_histogram,
+        _sum_histograms,
+        first,
+        percentile_columns,
+        state.by_original_id,
+        delayed(low),
+        delayed(high),
+        DATASET_AGG_PERCENTILE_BINS,
+    )
+    present = np.flatnonzero(state.rows)
+    position = len(pairs)
+    for i, column in enumerate(percentile_columns):
+        column_histogram = _dense_histogram(*histogram[i], state.size, DATASET_AGG_PERCENTILE_BINS)[present]
+        for percentile in percentiles:
+            values = histogram_percentiles(column_histogram, low[i, present], high[i, present], percentile)
+            name = (column, percentile_name(percentile)) if multi else f"{column} {percentile_name(percentile)}"
+            df.insert(position, name, values)
+            position += 1
+    return df
@@ -0,0 +1,99 @@
+"""
+Grouping of consecutive frames into batches to reduce the number of dask tasks.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+
+from dask import delayed
+from dask.base import tokenize
+from dask.delayed import Delayed
+
+BATCH_KEY_PREFIX = "pointcloudset-batch-"
+"""Prefix of the dask keys of :func:`delayed_batch`."""
+
+
+def batch_slices(n_frames: int, batch_size: int) -> list[slice]:
+    """Split ``n_frames`` consecutive frames into slices of at most ``batch_size``.
+
+    Args:
+        n_frames (int): Number of frames.
+        batch_size (int): Maximum number of frames per batch. Must be >= 1.
+
+    Returns:
+        list[slice]: Slices covering all frames in order.
+
+    Raises:
+        ValueError: If ``batch_size`` is less than 1.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+    return [slice(start, min(start + batch_size, n_frames)) for start in range(0, n_frames, batch_size)]
+
+
+def auto_batch_size(
+    n_frames: int,
+    frame_nbytes: int,
+    target_bytes: int,
+    n_workers: int | None = None,
+    batches_per_worker: int = 4,
+) -> int:
+    """Choose a batch size from the size of a typical frame.
+
+    Batches are filled up to ``target_bytes`` but never so large that there are
+    fewer than ``batches_per_worker`` batches per worker, so that small datasets
+    still run in parallel.
+
+    Args:
+        n_frames (int): Number of frames.
+        frame_nbytes (int): Memory usage of a typical frame in bytes.
+        target_bytes (int): Target memory usage of one batch in bytes.
+        n_workers (int | None, optional): Number of parallel workers. Defaults to
+            the number of CPUs.
+        batches_per_worker (int, optional): Minimum number of batches per worker.
+            Defaults to 4.
+
+    Returns:
+        int: Number of frames per batch, at least 1.
+    """
+    if n_frames < 1:
+        return 1
+    n_workers = n_workers or os.cpu_count() or 1
+    by_bytes = max(1, target_bytes // max(1, frame_nbytes))
+    by_parallelism = max(1, math.ceil(n_frames / (n_workers * batches_per_worker)))
+    return int(min(by_bytes, by_parallelism))
+
+
+def run_batch(func, elements: list, timestamps: list) -> list:
+    """Run a per-frame function over one batch of frames.
+
+    Args:
+        func (Callable): Function with signature ``func(element, timestamp)``.
+        elements (list): Frame data of the batch.
+        timestamps (list): Timestamps of the batch.
+
+    Returns:
+        list: One result per frame, in order.
+    """
+    return [func(element, timestamp) for element, timestamp in zip(elements, timestamps, strict=True)]
+
+
+def delayed_batch(func, *args) -> Delayed:
+    """Dask delayed call of a function which returns a list of results for consecutive
+    frames, like :func:`run_batch`.
+
+    The key starts with :data:`BATCH_KEY_PREFIX`, so that
+    :class:`pointcloudset.pipeline.delayed_result.DelayedResult` can compute all frames
+    taken from one batch together instead of the batch once per frame.
+
+    Args:
+        func (Callable): Function which returns a list.
+        *args: Arguments of func, may be dask delayed objects.
+
+    Returns:
+        dask.delayed.Delayed: The delayed call.
+    """
+    name = getattr(func, "__name__", "batch")
+    return delayed(func)(*args, dask_key_name=f"{BATCH_KEY_PREFIX}{name}-{tokenize(func, *args)}")
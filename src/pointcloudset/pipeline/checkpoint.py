@@ -0,0 +1,268 @@
+"""
+On-disk checkpoints of intermediate Datasets, keyed by a fingerprint of the source
+data and of the functions applied to it.
+"""
+
+from __future__ import annotations
+
+import inspect
+import os
+import shutil
+import types
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from dask.base import tokenize
+
+import pointcloudset
+from pointcloudset.config import CHECKPOINT_DIR, CHECKPOINT_MAX_SIZE_GB
+
+if TYPE_CHECKING:
+    from pointcloudset import Dataset
+
+_TMP_PREFIX = "tmp-"
+_META_FILE = "meta.json"
+
+
+def source_fingerprint(file_path: Path, **kwargs) -> str:
+    """Fingerprint of a file or directory from which a Dataset is read.
+
+    Uses the absolute path, size and modification time of all files, so it changes
+    when the source is modified, without reading the data.
+
+    Args:
+        file_path (pathlib.Path): File or directory.
+        **kwargs: Keyword arguments used to read the file.
+
+    Returns:
+        str: Fingerprint.
+    """
+    file_path = file_path.resolve()
+    files = sorted(path for path in file_path.rglob("*") if path.is_file()) if file_path.is_dir() else [file_path]
+    signature = []
+    for path in files:
+        stat = path.stat()
+        signature.append((str(path.relative_to(file_path.parent)), stat.st_size, stat.st_mtime_ns))
+    return tokenize(str(file_path), signature, kwargs)
+
+
+def function_fingerprint(func: Callable, kwargs: dict) -> str:
+    """Fingerprint of a function applied to a Dataset and its keyword arguments.
+
+    Uses the source code (bytecode if the source is not available), default
+    arguments and closure variables of the function and the pointcloudset version.
+    Changes in other functions called by ``func`` are not detected.
+
+    Args:
+        func (Callable): Function.
+        kwargs (dict): Keyword arguments passed to the function.
+
+    Returns:
+        str: Fingerprint.
+    """
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = None
+    code = getattr(func, "__code__", None)
+    bytecode = None
+    if code is not None:
+        constants = [const for const in code.co_consts if not isinstance(const, types.CodeType)]
+        bytecode = (code.co_code, repr(constants), code.co_names)
+    closure = [cell.cell_contents for cell in getattr(func, "__closure__", None) or []]
+    return tokenize(
+        getattr(func, "__module__", None),
+        getattr(func, "__qualname__", repr(func)),
+        source,
+        bytecode,
+        getattr(func, "__defaults__", None),
+        closure,
+        kwargs,
+        pointcloudset.__version__,
+    )
+
+
+class CheckpointCache:
+    """Directory with checkpoints of Datasets in the native format, one sub directory
+    per fingerprint.
+
+    Loading a checkpoint marks it as used. When storing a new checkpoint the least
+    recently used ones are deleted until the cache is below its size limit. The
+    checkpoint which was just stored is always kept.
+
+    Args:
+        cache_dir (pathlib.Path | None, optional): Directory of the cache. Defaults to
+            :data:`pointcloudset.config.CHECKPOINT_DIR`.
+        max_size_gb (float | None, optional): Maximum size of all checkpoints in GB.
+            Defaults to :data:`pointcloudset.config.CHECKPOINT_MAX_SIZE_GB`.
+        max_entries (int | None, optional): Maximum number of checkpoints. Defaults to
+            ``None`` which means no limit.
+
+    Raises:
+        ValueError: If ``max_size_gb`` is not positive or ``max_entries`` is less
+            than 1.
+
+    Examples:
+
+        .. code-block:: python
+
+            cache = CheckpointCache(Path("checkpoints"), max_size_gb=50)
+            cache.entries()
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path | None = None,
+        max_size_gb: float | None = None,
+        max_entries: int | None = None,
+    ):
+        cache_dir = CHECKPOINT_DIR if cache_dir is None else cache_dir
+        max_size_gb = CHECKPOINT_MAX_SIZE_GB if max_size_gb is None else max_size_gb
+        if not isinstance(cache_dir, Path):
+            raise TypeError("expecting a pathlib Path object")
+        if max_size_gb <= 0:
+            raise ValueError(f"max_size_gb must be > 0, got {max_size_gb}")
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(f"max_entries must be >= 1, got {max_entries}")
+        self.cache_dir = cache_dir
+        self.max_size_gb = max_size_gb
+        self.max_entries = max_entries
+
+    def path(self, fingerprint: str) -> Path:
+        """Directory of the checkpoint with this fingerprint."""
+        return self.cache_dir.joinpath(fingerprint)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return self.path(fingerprint).joinpath(_META_FILE).is_file()
+
+    def load(self, dataset: Dataset) -> Dataset | None:
+        """Load the checkpoint of a Dataset.
+
+        Args:
+            dataset (Dataset): Dataset to look up by its fingerprint.
+
+        Returns:
+            Dataset | None: The Dataset read from the checkpoint with the same
+            fingerprint and execution settings or ``None`` if there is no checkpoint.
+        """
+        fingerprint = dataset.fingerprint
+        if fingerprint not in self:
+            return None
+        path = self.path(fingerprint)
+        os.utime(path.joinpath(_META_FILE))
+        loaded = type(dataset).from_file(path)
+        return type(dataset)(
+            loaded.data,
+            loaded.timestamps,
+            loaded.meta,
+            execution=dataset.execution,
+            fingerprint=fingerprint,
+            frame_bounds=loaded.frame_bounds,
+        )
+
+    def store(self, dataset: Dataset) -> Dataset:
+        """Compute a Dataset, write it as a checkpoint and evict old checkpoints.
+
+        Args:
+            dataset (Dataset): Dataset to store.
+
+        Returns:
+            Dataset: The Dataset read from the checkpoint.
+        """
+        fingerprint = dataset.fingerprint
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_dir.joinpath(f"{_TMP_PREFIX}{uuid.uuid4().hex}")
+        # to_file adds keys to meta, the dataset itself should stay unchanged
+        to_write = type(dataset)(
+            dataset.data,
+            dataset.timestamps,
+            dict(dataset.meta),
+            execution=dataset.execution,
+            frame_bounds=dataset.frame_bounds,
+        )
+        try:
+            to_write.to_file(tmp_path, use_orig_filename=False)
+            if fingerprint not in self:
+                # left incomplete by an interrupted run
+                shutil.rmtree(self.path(fingerprint), ignore_errors=True)
+            os.replace(tmp_path, self.path(fingerprint))
+        except OSError:
+            # written in the meantime by another process
+            if fingerprint not in self:
+                raise
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict(keep=fingerprint)
+        return self.load(dataset)
+
+    def entries(self) -> list[tuple[str, int, float]]:
+        """All checkpoints, least recently used first.
+
+        Returns:
+            list[tuple[str, int, float]]: Fingerprint, size in bytes and time of last
+            use as a POSIX timestamp of each checkpoint.
+        """
+        if not self.cache_dir.is_dir():
+            return []
+        entries = []
+        for path in self.cache_dir.iterdir():
+            if path.name.startswith(_TMP_PREFIX) or path.name not in self:
+                continue
+            size = sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+            entries.append((path.name, size, path.joinpath(_META_FILE).stat().st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self) -> int:
+        """Size of all checkpoints in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep: str | None = None) -> list[str]:
+        """Delete the least recently used checkpoints until the size and number limits
+        are met.
+
+        Args:
+            keep (str | None, optional): Fingerprint of a checkpoint which is never
+                deleted. Defaults to ``None``.
+
+        Returns:
+            list[str]: Fingerprints of the deleted checkpoints.
+        """
+        entries = self.entries()
+        total_size = sum(size for _, size, _ in entries)
+        max_size = self.max_size_gb * 1024**3
+        n_entries = len(entries)
+        deleted = []
+        for fingerprint, size, _ in entries:
+            too_many = self.max_entries is not None and n_entries > self.max_entries
+            if total_size <= max_size and not too_many:
+                break
+            if fingerprint == keep:
+                continue
+            shutil.rmtree(self.path(fingerprint), ignore_errors=True)
+            total_size -= size
+            n_entries -= 1
+            deleted.append(fingerprint)
+        return deleted
+
+    def clear(self) -> None:
+        """Delete all checkpoints."""
+        for fingerprint, _, _ in self.entries():
+            shutil.rmtree(self.path(fingerprint), ignore_errors=True)
+
+
+def persist(dataset: Dataset, cache: CheckpointCache) -> Dataset:
+    """Load a Dataset from the cache or compute and store it.
+
+    Args:
+        dataset (Dataset): Dataset to persist.
+        cache (CheckpointCache): Cache to use.
+
+    Returns:
+        Dataset: The Dataset read from the checkpoint.
+    """
+    loaded = cache.load(dataset)
+    if loaded is None:
+        loaded = cache.store(dataset)
+    return loaded
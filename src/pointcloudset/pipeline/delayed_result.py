@@ -1,20 +1,297 @@
+"""
+Pipeline post processing and related functions.
+"""
+
 from __future__ import annotations
 
+import itertools
 from collections import UserList
+from collections.abc import Iterator
 from typing import Any
 
-import dask
+import numpy as np
+import pandas as pd
+from dask import delayed
+
+from pointcloudset.pipeline.batch import BATCH_KEY_PREFIX
+from pointcloudset.pipeline.execution import Execution
+
+
+def _outer_batches(item) -> frozenset[str]:
+    """Keys of the batches of :func:`pointcloudset.pipeline.batch.delayed_batch` a dask
+    delayed object is taken from, without the batches which only feed into these."""
+    graph = item.__dask_graph__() if hasattr(item, "__dask_graph__") else None
+    dependencies = getattr(graph, "dependencies", None)
+    if dependencies is None:
+        return frozenset()
+    batches = {name for name in graph.layers if name.startswith(BATCH_KEY_PREFIX)}
+    inner = set()
+    stack = [name for batch in batches for name in dependencies[batch]]
+    while stack:
+        name = stack.pop()
+        if name not in inner:
+            inner.add(name)
+            stack.extend(dependencies.get(name, ()))
+    return frozenset(batches - inner)
 
 
 class DelayedResult(UserList):
-    def __init__(self, data):
-        self.data = data
+    def __init__(
+        self,
+        data: list | None = None,
+        batches: list | None = None,
+        batch_lengths: list[int] | None = None,
+        execution: Execution | None = None,
+    ):
+        """Results of :meth:`pointcloudset.dataset.Dataset.apply` as dask delayed objects.
+
+        Args:
+            data (list | None): One dask delayed object per pointcloud.
+            batches (list | None): Alternative to data: dask delayed objects which each
+                return a list of results for consecutive pointclouds. The delayed objects
+                per pointcloud are only generated when needed.
+            batch_lengths (list[int] | None): Number of results in each batch.
+            execution (Execution | None): Scheduler settings used by compute. Defaults
+                to the globally active dask scheduler.
+        """
+        self._data = data
+        self._batches = batches
+        self._batch_lengths = batch_lengths
+        # the objects generated from the batches, to detect changes of the list
+        self._batch_items: list | None = None
+        self.execution = Execution() if execution is None else execution
+
+    @property
+    def data(self) -> list:
+        """One dask delayed object per pointcloud."""
+        if self._data is None:
+            self._data = [
+                batch[i]
+                for batch, length in zip(self._batches, self._batch_lengths, strict=True)
+                for i in range(length)
+            ]
+            self._batch_items = list(self._data)
+        return self._data
+
+    @data.setter
+    def data(self, data: list):
+        self._data = data
+        self._batches = None
+
+    def _uses_batches(self) -> bool:
+        if self._batches is None:
+            return False
+        if self._data is None:
+            return True
+        if len(self._data) != len(self._batch_items) or any(
+            item is not batch_item for item, batch_item in zip(self._data, self._batch_items, strict=True)
+        ):
+            # the list was changed, for example with __setitem__ or append
+            self._batches = None
+            self._batch_items = None
+            return False
+        return True
+
+    def __len__(self) -> int:
+        if self._data is None:
+            return sum(self._batch_lengths)
+        return len(self._data)
 
     def compute(self) -> list:
-        return list(dask.compute(*self.data))
+        if self._uses_batches():
+            return list(itertools.chain.from_iterable(self.execution.compute(*self._batches)))
+        return list(self.execution.compute(*self.data))
+
+    def _units(self) -> tuple[list, list[int]]:
+        """Dask delayed objects which are computed as one task, each returning a list of
+        consecutive results, and the index of the first result of each.
+
+        Consecutive results taken from the same batch of a batched
+        :meth:`pointcloudset.dataset.Dataset.apply` are computed together, so the batch
+        is computed once and not once per result.
+        """
+        if self._uses_batches():
+            lengths = self._batch_lengths
+            return self._batches, [0, *itertools.accumulate(lengths)][:-1]
+        groups = []
+        starts = []
+        previous = frozenset()
+        for number, item in enumerate(self.data):
+            batches = _outer_batches(item)
+            if batches & previous:
+                groups[-1].append(item)
+            else:
+                groups.append([item])
+                starts.append(number)
+            previous = batches
+        return [delayed(list)(group) for group in groups], starts
+
+    def _iter_units(self, ordered: bool, max_in_flight: int | None) -> Iterator[tuple[int, list]]:
+        """Compute the units with at most ``max_in_flight`` tasks running or waiting to
+        be consumed and yield the first result index and the list of results of each."""
+        units, starts = self._units()
+        max_in_flight = self.execution.default_in_flight() if max_in_flight is None else max_in_flight
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be >= 1, got {max_in_flight}")
+        with self.execution.submitter() as (submit, wait_first):
+            pending = {}
+            finished = {}
+            next_submit = 0
+            next_yield = 0
+            try:
+                while next_yield < len(units):
+                    while next_submit < len(units) and len(pending) + len(finished) < max_in_flight:
+                        pending[submit(units[next_submit])] = next_submit
+                        next_submit += 1
+                    for future in wait_first(list(pending)):
+                        unit_number = pending.pop(future)
+                        finished[unit_number] = future.result()
+                    if ordered:
+                        while next_yield in finished:
+                            yield starts[next_yield], finished.pop(next_yield)
+                            next_yield += 1
+                    else:
+                        for unit_number in list(finished):
+                            yield starts[unit_number], finished.pop(unit_number)
+                            next_yield += 1
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def stream(self, max_in_flight: int | None = None) -> Iterator[Any]:
+        """Iterate over the results in order while they are computed.
+
+        Only ``max_in_flight`` tasks are running or waiting to be consumed at any
+        time, so the memory usage does not grow with the length of the Dataset.
+
+        Args:
+            max_in_flight (int | None, optional): Maximum number of tasks in flight.
+                Defaults to two per worker.
+
+        Yields:
+            Any: One result per pointcloud, in order.
+
+        Raises:
+            ValueError: If ``max_in_flight`` is less than 1.
+
+        Examples:
+
+            .. code-block:: python
+
+                for n_points in dataset.apply(len).stream():
+                    print(n_points)
+        """
+        for _, results in self._iter_units(ordered=True, max_in_flight=max_in_flight):
+            yield from results
+
+    def as_completed(self, max_in_flight: int | None = None) -> Iterator[tuple[int, Any]]:
+        """Iterate over the results in the order in which they finish.
+
+        Like :meth:`stream` but slow pointclouds do not hold back the results of the
+        following ones.
+
+        Args:
+            max_in_flight (int | None, optional): Maximum number of tasks in flight.
+                Defaults to two per worker.
+
+        Yields:
+            tuple[int, Any]: Number of the pointcloud and its result.
+
+        Raises:
+            ValueError: If ``max_in_flight`` is less than 1.
+        """
+        for start, results in self._iter_units(ordered=False, max_in_flight=max_in_flight):
+            yield from enumerate(results, start=start)
+
+    def to_numpy(self, dtype=None, max_in_flight: int | None = None) -> np.ndarray:
+        """Collect scalar or array results into one NumPy array while streaming.
+
+        The array is allocated from the shape of the first result and filled as the
+        results arrive, without an intermediate list of objects. Without dtype it is
+        cast up when a result needs a larger dtype, so the dtype does not depend on the
+        order in which the results finish.
+
+        Args:
+            dtype (optional): dtype of the array. Defaults to
+                :func:`numpy.result_type` of all results.
+            max_in_flight (int | None, optional): Maximum number of tasks in flight.
+                Defaults to two per worker.
+
+        Returns:
+            numpy.ndarray: Array with shape ``(len(self), *result_shape)``.
+
+        Raises:
+            ValueError: If the results have different shapes.
+        """
+        array = None
+        for pointcloud_number, res in self.as_completed(max_in_flight=max_in_flight):
+            res = np.asarray(res)
+            if array is None:
+                array = np.empty((len(self), *res.shape), dtype=res.dtype if dtype is None else dtype)
+            if res.shape != array.shape[1:]:
+                raise ValueError(f"result {pointcloud_number} has shape {res.shape}, expected {array.shape[1:]}")
+            if dtype is None and np.result_type(array.dtype, res.dtype) != array.dtype:
+                array = array.astype(np.result_type(array.dtype, res.dtype))
+            array[pointcloud_number] = res
+        if array is None:
+            return np.empty(0, dtype=dtype)
+        return array
+
+    def to_pandas(self, columns: list[str] | None = None, max_in_flight: int | None = None) -> pd.DataFrame:
+        """Collect results into a pandas DataFrame with one row per pointcloud while
+        streaming.
+
+        Results can be scalars, 1d arrays, dicts or pandas Series. For dicts and Series
+        the keys of the first result are the columns. The values are written into one
+        preallocated NumPy array per column, with :func:`numpy.result_type` of the
+        values of all results as dtype.
+
+        Args:
+            columns (list[str] | None, optional): Column names for scalar and array
+                results. Defaults to ``None`` which means "value" for scalars and
+                numbered columns for arrays.
+            max_in_flight (int | None, optional): Maximum number of tasks in flight.
+                Defaults to two per worker.
+
+        Returns:
+            pandas.DataFrame: One row per pointcloud.
+
+        Raises:
+            ValueError: If the results have different keys or shapes.
+        """
+        arrays = None
+        keys = None
+        for pointcloud_number, res in self.as_completed(max_in_flight=max_in_flight):
+            if isinstance(res, pd.Series):
+                res = res.to_dict()
+            if not isinstance(res, dict):
+                res = np.asarray(res)
+                if res.ndim > 1:
+                    raise ValueError(f"result {pointcloud_number} has {res.ndim} dimensions, expected at most 1")
+                res = dict(enumerate(np.atleast_1d(res)))
+            if arrays is None:
+                keys = list(res.keys())
+                arrays = {key: np.empty(len(self), dtype=np.asarray(value).dtype) for key, value in res.items()}
+            if list(res.keys()) != keys:
+                raise ValueError(f"result {pointcloud_number} has keys {list(res.keys())}, expected {keys}")
+            for key, value in res.items():
+                value_dtype = np.asarray(value).dtype
+                if np.result_type(arrays[key].dtype, value_dtype) != arrays[key].dtype:
+                    arrays[key] = arrays[key].astype(np.result_type(arrays[key].dtype, value_dtype))
+                arrays[key][pointcloud_number] = value
+        if arrays is None:
+            return pd.DataFrame(columns=columns)
+        df = pd.DataFrame(arrays)
+        if columns is not None:
+            df.columns = columns
+        elif keys == [0]:
+            df.columns = ["value"]
+        return df
 
     def __getitem__(self, pointcloud_number: slice | int) -> DelayedResult | Any:
-        if isinstance(pointcloud_number, (slice, int)):
-            return super().__getitem__(pointcloud_number).compute()
+        if isinstance(pointcloud_number, slice):
+            return DelayedResult(self.data[pointcloud_number], execution=self.execution).compute()
+        elif isinstance(pointcloud_number, int):
+            return self.execution.for_single_task().compute(self.data[pointcloud_number])[0]
         else:
             raise TypeError(f"Wrong type {type(pointcloud_number).__name__}")
@@ -0,0 +1,325 @@
+"""
+Execution settings for the dask computations of a Dataset.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextlib
+import importlib
+import os
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Literal
+
+import cloudpickle
+import dask
+import dask.multiprocessing
+
+SCHEDULERS = ("threads", "processes", "synchronous", "distributed")
+
+_CLIENTS: dict[tuple, Any] = {}
+_PROCESS_POOLS: dict[int | None, ProcessPoolExecutor] = {}
+
+_kernel_workers_global: int | None = None
+_kernel_workers_local = threading.local()
+
+
+def set_kernel_workers(workers: int | None) -> None:
+    """Set the number of threads used inside a single pointcloudset kernel, for example
+    the KDTree queries of :func:`pointcloudset.filter.stat.remove_radius_outlier` or
+    :func:`pointcloudset.cluster.get_cluster_labels`.
+
+    Args:
+        workers (int | None): Number of threads, -1 for all CPU cores or ``None`` to
+            choose automatically. Automatic means all CPU cores when called directly
+            and a share of the CPU cores when running inside a parallel Dataset
+            computation, so that dask workers and kernel threads do not oversubscribe
+            the CPU.
+
+    Raises:
+        ValueError: If workers is 0 or less than -1.
+    """
+    global _kernel_workers_global
+    if workers is not None and (workers == 0 or workers < -1):
+        raise ValueError(f"workers must be >= 1, -1 or None, got {workers}")
+    _kernel_workers_global = workers
+
+
+def kernel_workers() -> int:
+    """Number of threads a pointcloudset kernel may use, in the convention of the
+    ``workers`` argument of :meth:`scipy.spatial.KDTree.query`.
+
+    Returns:
+        int: The value set with :func:`set_kernel_workers`, otherwise the share of the
+        CPU cores of the surrounding Dataset computation or -1 (all CPU cores).
+    """
+    if _kernel_workers_global is not None:
+        return _kernel_workers_global
+    return getattr(_kernel_workers_local, "workers", -1)
+
+
+@contextlib.contextmanager
+def kernel_workers_context(workers: int) -> Iterator[None]:
+    """Context manager which sets the automatic kernel threads for the current thread.
+    Used around the tasks of Dataset computations, for example by
+    :meth:`pointcloudset.dataset.Dataset.apply`.
+
+    Args:
+        workers (int): Number of threads or -1 for all CPU cores.
+    """
+    previous = getattr(_kernel_workers_local, "workers", None)
+    _kernel_workers_local.workers = workers
+    try:
+        yield
+    finally:
+        if previous is None:
+            del _kernel_workers_local.workers
+        else:
+            _kernel_workers_local.workers = previous
+
+
+def run_with_kernel_workers(workers: int, func: Callable[..., Any], *args) -> Any:
+    """Call ``func(*args)`` inside :func:`kernel_workers_context`, to wrap dask tasks.
+
+    Args:
+        workers (int): Number of threads or -1 for all CPU cores.
+        func (Callable[..., Any]): Function to call.
+        *args: Arguments of func.
+
+    Returns:
+        Any: The result of func.
+    """
+    with kernel_workers_context(workers):
+        return func(*args)
+
+
+def _process_pool(num_workers: int | None) -> ProcessPoolExecutor:
+    """Process pool which is kept alive between computations, so that the worker
+    processes are started and pointcloudset is imported only once."""
+    if num_workers not in _PROCESS_POOLS:
+        pool = ProcessPoolExecutor(num_workers, mp_context=dask.multiprocessing.get_context())
+        atexit.register(pool.shutdown)
+        _PROCESS_POOLS[num_workers] = pool
+    return _PROCESS_POOLS[num_workers]
+
+
+def _compute_pickled(payload: bytes, workers: int) -> Any:
+    """Compute a cloudpickled dask collection in a worker process."""
+    return _compute_synchronous(cloudpickle.loads(payload), workers)
+
+
+def _compute_synchronous(collection, workers: int) -> Any:
+    with kernel_workers_context(workers):
+        return dask.compute(collection, scheduler="synchronous")[0]
+
+
+class Execution:
+    """Scheduler, number of workers and memory limit used to compute a Dataset.
+
+    The default ``Execution()`` uses whatever dask scheduler is globally active.
+
+    Per pointcloud code which holds the GIL (pandas filtering, Python loops in
+    clustering) does not scale with threads. For such workloads use
+    ``scheduler="processes"`` or ``scheduler="distributed"``. The process pool is
+    kept alive between computations. dask fuses linear chains of tasks for the
+    process scheduler, so chained :meth:`pointcloudset.dataset.Dataset.apply` calls
+    run in one worker and only the final results are sent back instead of every
+    intermediate pointcloud.
+
+    Args:
+        scheduler (str | None, optional): "threads", "processes", "synchronous" or
+            "distributed" (a local :class:`dask.distributed.LocalCluster`, needs the
+            ``distributed`` package). Defaults to ``None`` which uses the globally
+            active dask scheduler.
+        num_workers (int | None, optional): Number of workers. Defaults to ``None``
+            which means one worker per CPU core.
+        memory_limit (str | int | None, optional): Memory limit per worker, for
+            example "4GB". Only supported with the distributed scheduler. Defaults to
+            ``None``.
+
+    Raises:
+        ValueError: If the scheduler is not supported, ``num_workers`` is less than 1 or
+            a memory limit is given for a scheduler other than "distributed".
+
+    Examples:
+
+        .. code-block:: python
+
+            dataset.with_execution("processes", num_workers=8).apply(func).compute()
+    """
+
+    def __init__(
+        self,
+        scheduler: Literal["threads", "processes", "synchronous", "distributed"] | None = None,
+        num_workers: int | None = None,
+        memory_limit: str | int | None = None,
+    ):
+        if scheduler is not None and scheduler not in SCHEDULERS:
+            raise ValueError(f"scheduler must be one of {SCHEDULERS}, got {scheduler}")
+        if num_workers is not None and num_workers < 1:
+            raise ValueError(f"num_workers must be >= 1, got {num_workers}")
+        if memory_limit is not None and scheduler != "distributed":
+            raise ValueError("memory_limit is only supported with the distributed scheduler")
+        self.scheduler = scheduler
+        self.num_workers = num_workers
+        self.memory_limit = memory_limit
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(scheduler={self.scheduler!r}, num_workers={self.num_workers!r}, "
+            f"memory_limit={self.memory_limit!r})"
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Execution):
+            return NotImplemented
+        return (self.scheduler, self.num_workers, self.memory_limit) == (
+            other.scheduler,
+            other.num_workers,
+            other.memory_limit,
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.scheduler, self.num_workers, self.memory_limit))
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator[None]:
+        """Context manager which makes these settings the active dask configuration.
+
+        All dask computations inside the context use this execution, including the
+        ones triggered indirectly, for example when writing a Dataset to parquet.
+        """
+        settings = {}
+        if self.scheduler == "distributed":
+            settings["scheduler"] = self.client().get
+        elif self.scheduler == "processes":
+            settings["scheduler"] = "processes"
+            settings["pool"] = _process_pool(self.num_workers)
+        elif self.scheduler is not None:
+            settings["scheduler"] = self.scheduler
+        if self.num_workers is not None and self.scheduler != "distributed":
+            settings["num_workers"] = self.num_workers
+        with dask.config.set(settings):
+            yield
+
+    def compute(self, *args, **kwargs) -> tuple:
+        """Compute dask collections with these settings, same as :func:`dask.compute`.
+
+        Returns:
+            tuple: The computed results.
+        """
+        with self.activate():
+            return dask.compute(*args, **kwargs)
+
+    def kernel_workers(self) -> int:
+        """Number of kernel threads per task, so that all parallel tasks together use
+        each CPU core once.
+
+        Returns:
+            int: -1 (all CPU cores) for the synchronous scheduler, otherwise the number
+            of CPU cores divided by the number of parallel workers, at least 1.
+        """
+        if self._active_scheduler() == "synchronous":
+            return -1
+        cpu_count = os.cpu_count() or 1
+        return max(1, cpu_count // self._active_num_workers())
+
+    def _active_scheduler(self) -> str:
+        """Name of the scheduler, resolving ``None`` with the active dask configuration."""
+        if self.scheduler is not None:
+            return self.scheduler
+        scheduler = dask.config.get("scheduler", None)
+        if scheduler in ("synchronous", "sync", "single-threaded"):
+            return "synchronous"
+        if scheduler in ("processes", "multiprocessing"):
+            return "processes"
+        # threads or a custom scheduler, e.g. a distributed client set globally
+        return "threads"
+
+    def _active_num_workers(self) -> int:
+        if self.num_workers is not None:
+            return self.num_workers
+        if self.scheduler is None and isinstance(dask.config.get("scheduler", None), str | None):
+            return dask.config.get("num_workers", None) or os.cpu_count() or 1
+        return os.cpu_count() or 1
+
+    def default_in_flight(self) -> int:
+        """Default number of tasks in flight when streaming results: two per worker,
+        one for the synchronous scheduler.
+
+        Returns:
+            int: Number of tasks.
+        """
+        if self._active_scheduler() == "synchronous":
+            return 1
+        return 2 * self._active_num_workers()
+
+    @contextlib.contextmanager
+    def submitter(self) -> Iterator[tuple[Callable[[Any], Any], Callable[[list], set]]]:
+        """Context manager to compute dask collections one by one as futures, used to
+        stream results instead of computing everything at once.
+
+        Yields:
+            tuple: ``submit(collection) -> future`` and ``wait_first(futures) -> done``
+            which blocks until at least one of the futures is done. The futures have a
+            ``result()`` method. Except on a distributed cluster the collections are
+            computed with the kernel threads of :meth:`kernel_workers`.
+        """
+        scheduler = self._active_scheduler()
+        workers = self.kernel_workers()
+        if scheduler == "distributed":
+            distributed = importlib.import_module("dask.distributed")
+            client = self.client()
+            yield client.compute, lambda futures: set(distributed.wait(futures, return_when="FIRST_COMPLETED").done)
+        elif scheduler == "processes":
+            pool = _process_pool(self.num_workers)
+            yield (
+                lambda collection: pool.submit(_compute_pickled, cloudpickle.dumps(collection), workers),
+                lambda futures: wait(futures, return_when=FIRST_COMPLETED).done,
+            )
+        else:
+            max_workers = 1 if scheduler == "synchronous" else self._active_num_workers()
+            with ThreadPoolExecutor(max_workers) as pool:
+                yield (
+                    lambda collection: pool.submit(_compute_synchronous, collection, workers),
+                    lambda futures: wait(futures, return_when=FIRST_COMPLETED).done,
+                )
+
+    def for_single_task(self) -> Execution:
+        """Settings to compute a single task, for example one pointcloud.
+        Starting a process pool for a single task costs more than it saves, so the
+        process scheduler is replaced by the synchronous one.
+
+        Returns:
+            Execution: Settings for a single task.
+        """
+        if self.scheduler == "processes":
+            return Execution(scheduler="synchronous")
+        return self
+
+    def client(self):
+        """The dask distributed client of a local cluster with these settings.
+        The cluster is started on first use and then reused.
+
+        Returns:
+            dask.distributed.Client: Client connected to the local cluster.
+
+        Raises:
+            ImportError: If the ``distributed`` package is not installed.
+        """
+        key = (self.num_workers, self.memory_limit)
+        if key not in _CLIENTS:
+            try:
+                distributed = importlib.import_module("dask.distributed")
+            except ImportError as error:
+                raise ImportError(
+                    "The distributed scheduler needs the distributed package: pip install 'dask[distributed]'"
+                ) from error
+            cluster_kwargs = {"n_workers": self.num_workers, "threads_per_worker": 1, "processes": True}
+            if self.memory_limit is not None:
+                cluster_kwargs["memory_limit"] = self.memory_limit
+            cluster = distributed.LocalCluster(**cluster_kwargs)
+            _CLIENTS[key] = distributed.Client(cluster, set_as_default=False)
+        return _CLIENTS[key]
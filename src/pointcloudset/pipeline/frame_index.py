@@ -0,0 +1,113 @@
+"""
+Index of the bounding boxes of the pointclouds of a Dataset, to find the pointclouds
+which touch a region without loading all of them.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+from pointcloudset.pointcloud import PointCloud
+
+BOUNDS_COLUMNS = ["min x", "min y", "min z", "max x", "max y", "max z"]
+
+
+def pointcloud_bounds(pointcloud: PointCloud) -> np.ndarray:
+    """Axis aligned bounding box of a pointcloud as one array.
+
+    Args:
+        pointcloud (PointCloud): PointCloud.
+
+    Returns:
+        numpy.ndarray: Minimum x, y, z and maximum x, y, z, NaN for an empty pointcloud.
+    """
+    if len(pointcloud) == 0:
+        return np.full(6, np.nan)
+    xyz = pointcloud.get_xyz(np.float64)
+    return np.concatenate([np.nanmin(xyz, axis=0), np.nanmax(xyz, axis=0)])
+
+
+def parse_box(box: pd.DataFrame | Sequence) -> tuple[np.ndarray, np.ndarray]:
+    """Minimum and maximum corner of a query box.
+
+    Args:
+        box (pandas.DataFrame | Sequence): Either a DataFrame like
+            :attr:`pointcloudset.pointcloud.PointCloud.bounding_box` with the rows "min"
+            and "max" and some of the columns x, y, and z, or the two corners
+            ``((min_x, min_y, min_z), (max_x, max_y, max_z))``. Missing columns and
+            infinite values do not limit the box.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Minimum and maximum corner.
+
+    Raises:
+        ValueError: If the box is not valid or the minimum is larger than the maximum.
+    """
+    if isinstance(box, pd.DataFrame):
+        if not {"min", "max"} <= set(box.index) or not set(box.columns) & {"x", "y", "z"}:
+            raise ValueError("box needs the rows min and max and at least one of the columns x, y and z")
+        lower = np.array([box.loc["min", dim] if dim in box.columns else -np.inf for dim in "xyz"], dtype=np.float64)
+        upper = np.array([box.loc["max", dim] if dim in box.columns else np.inf for dim in "xyz"], dtype=np.float64)
+    else:
+        try:
+            lower, upper = (np.asarray(corner, dtype=np.float64) for corner in box)
+        except (TypeError, ValueError) as error:
+            raise ValueError("box must be a DataFrame or two corners with x, y and z") from error
+        if lower.shape != (3,) or upper.shape != (3,):
+            raise ValueError("box must be a DataFrame or two corners with x, y and z")
+    if np.any(np.isnan(lower)) or np.any(np.isnan(upper)) or np.any(lower > upper):
+        raise ValueError("the minimum of the box must not be larger than the maximum")
+    return lower, upper
+
+
+class FrameIndex:
+    """Bounding boxes of all pointclouds of a Dataset as sorted interval arrays.
+
+    The pointclouds are sorted by their minimum x, so a query only checks the
+    pointclouds which start before the end of the box in x.
+
+    Args:
+        bounds (numpy.ndarray): Array with shape (pointclouds, 6) as returned by
+            :func:`pointcloud_bounds` for each pointcloud.
+
+    Raises:
+        ValueError: If bounds does not have 6 columns.
+    """
+
+    def __init__(self, bounds: np.ndarray):
+        bounds = np.asarray(bounds, dtype=np.float64)
+        if bounds.size == 0:
+            bounds = bounds.reshape(0, 6)
+        if bounds.ndim != 2 or bounds.shape[1] != 6:
+            raise ValueError(f"bounds must have the shape (pointclouds, 6), got {bounds.shape}")
+        self.bounds = bounds
+        # NaN (empty pointclouds) is sorted to the end and never matches
+        self._order = np.argsort(self.bounds[:, 0], kind="stable")
+        self._sorted_min_x = self.bounds[self._order, 0]
+
+    def __len__(self) -> int:
+        return len(self.bounds)
+
+    def to_frame(self) -> pd.DataFrame:
+        """The bounding boxes as a DataFrame with one row per pointcloud."""
+        return pd.DataFrame(self.bounds, columns=BOUNDS_COLUMNS)
+
+    def intersecting(self, box: pd.DataFrame | Sequence) -> np.ndarray:
+        """Numbers of the pointclouds whose bounding box intersects a box.
+
+        Args:
+            box (pandas.DataFrame | Sequence): Query box, see :func:`parse_box`.
+
+        Returns:
+            numpy.ndarray: Sorted numbers of the pointclouds. A pointcloud whose bounding
+            box intersects the box may still have no point inside of it.
+        """
+        lower, upper = parse_box(box)
+        n_candidates = np.searchsorted(self._sorted_min_x, upper[0], side="right")
+        candidates = self._order[:n_candidates]
+        bounds = self.bounds[candidates]
+        inside = np.all(bounds[:, :3] <= upper, axis=1) & np.all(bounds[:, 3:] >= lower, axis=1)
+        return np.sort(candidates[inside])
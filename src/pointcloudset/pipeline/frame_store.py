@@ -0,0 +1,231 @@
+"""
+Out-of-core storage of the pointclouds of Datasets which are read into memory, like
+ROS bag files, with a memory limit. Pointclouds beyond the limit are spilled to a local
+scratch directory and read again when they are used.
+"""
+
+from __future__ import annotations
+
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+from dask import delayed
+from dask.delayed import Delayed
+from pyarrow import feather
+
+from pointcloudset.config import FRAME_STORE_MEMORY_LIMIT_MB
+
+
+def _load_frame(frame: StoredFrame) -> pd.DataFrame:
+    return frame.load()
+
+
+class StoredFrame:
+    """Reference to one DataFrame in a :class:`FrameStore`.
+
+    A pickled reference, for example sent to another process by the dask processes
+    scheduler, contains the DataFrame itself since the store is not shared between
+    processes.
+    """
+
+    def __init__(self, store: FrameStore, key: int):
+        self.store = store
+        self.key = key
+
+    def load(self) -> pd.DataFrame:
+        """The DataFrame, read from the scratch directory if it was spilled."""
+        return self.store.get(self.key)
+
+    def __reduce__(self):
+        return _LoadedFrame, (self.load(),)
+
+
+class _LoadedFrame:
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+
+    def load(self) -> pd.DataFrame:
+        return self.data
+
+
+class FrameStore:
+    """Keeps DataFrames in memory up to a memory limit and spills the least recently
+    used ones to a scratch directory in the uncompressed Arrow IPC (feather) format.
+
+    Spilled DataFrames are read again when they are used and kept in memory while they
+    fit into the limit. The files are written once and deleted with the store, when it is
+    garbage collected or closed. All methods are thread safe.
+
+    Args:
+        memory_limit_mb (float | None, optional): Maximum memory of the DataFrames kept
+            in memory in MB. Defaults to
+            :data:`pointcloudset.config.FRAME_STORE_MEMORY_LIMIT_MB`.
+        scratch_dir (pathlib.Path | None, optional): Directory in which a temporary
+            directory for the spilled DataFrames is created. Should be on a fast local
+            disk. Defaults to ``None`` which means the system temporary directory.
+
+    Raises:
+        ValueError: If memory_limit_mb is negative.
+        TypeError: If scratch_dir is not a pathlib Path.
+
+    Examples:
+
+        .. code-block:: python
+
+            store = FrameStore(memory_limit_mb=16_000, scratch_dir=Path("/scratch"))
+            dataset = pointcloudset.Dataset.from_file(bag_file, topic="lidar/points", frame_store=store)
+            store.stats()
+    """
+
+    def __init__(self, memory_limit_mb: float | None = None, scratch_dir: Path | None = None):
+        memory_limit_mb = FRAME_STORE_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        if memory_limit_mb < 0:
+            raise ValueError(f"memory_limit_mb must be >= 0, got {memory_limit_mb}")
+        if scratch_dir is not None and not isinstance(scratch_dir, Path):
+            raise TypeError("expecting a pathlib Path object")
+        self.memory_limit = int(memory_limit_mb * 1024**2)
+        if scratch_dir is not None:
+            scratch_dir.mkdir(parents=True, exist_ok=True)
+        self.folder = Path(tempfile.mkdtemp(prefix="pointcloudset-frames-", dir=scratch_dir))
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.folder, ignore_errors=True)
+        self._lock = threading.Lock()
+        self._resident: OrderedDict[int, pd.DataFrame] = OrderedDict()
+        self._nbytes: dict[int, int] = {}
+        self._spilled: dict[int, int] = {}
+        self._resident_bytes = 0
+        self._next_key = 0
+
+    def __len__(self) -> int:
+        return len(self._nbytes)
+
+    def __repr__(self) -> str:
+        stats = self.stats()
+        return (
+            f"{self.__class__.__name__}(frames={stats['frames']}, resident={stats['resident_frames']}, "
+            f"spilled={stats['spilled_frames']}, memory_limit_mb={self.memory_limit / 1024**2:g})"
+        )
+
+    def __dask_tokenize__(self):
+        # where the data is stored does not change the data
+        return self.__class__.__name__
+
+    def _path(self, key: int) -> Path:
+        return self.folder.joinpath(f"{key}.arrow")
+
+    def _spill(self, key: int, data: pd.DataFrame) -> None:
+        path = self._path(key)
+        feather.write_feather(pa.Table.from_pandas(data), path, compression="uncompressed")
+        self._spilled[key] = path.stat().st_size
+
+    def _make_room(self, nbytes: int) -> None:
+        while self._resident and self._resident_bytes + nbytes > self.memory_limit:
+            key, data = self._resident.popitem(last=False)
+            self._resident_bytes -= self._nbytes[key]
+            if key not in self._spilled:
+                self._spill(key, data)
+
+    def _keep(self, key: int, data: pd.DataFrame) -> None:
+        nbytes = self._nbytes[key]
+        if nbytes > self.memory_limit:
+            if key not in self._spilled:
+                self._spill(key, data)
+            return
+        self._make_room(nbytes)
+        self._resident[key] = data
+        self._resident_bytes += nbytes
+
+    def put(self, data: pd.DataFrame) -> StoredFrame:
+        """Add a DataFrame. The least recently used DataFrames are spilled if the
+        memory limit is exceeded.
+
+        Args:
+            data (pandas.DataFrame): DataFrame, which must not be changed afterwards.
+
+        Returns:
+            StoredFrame: Reference to the DataFrame.
+
+        Raises:
+            ValueError: If the store is closed.
+        """
+        with self._lock:
+            if not self._finalizer.alive:
+                raise ValueError("the FrameStore is closed")
+            key = self._next_key
+            self._next_key += 1
+            self._nbytes[key] = int(data.memory_usage(index=True, deep=True).sum())
+            self._keep(key, data)
+        return StoredFrame(self, key)
+
+    def delayed(self, data: pd.DataFrame) -> Delayed:
+        """Add a DataFrame and return a dask delayed object which loads it, to be used
+        as an element of :attr:`pointcloudset.dataset.Dataset.data`.
+
+        Args:
+            data (pandas.DataFrame): DataFrame, which must not be changed afterwards.
+
+        Returns:
+            dask.delayed.Delayed: Delayed DataFrame.
+        """
+        # a random key like dask.delayed(data), hashing the data would read all of it
+        name = f"stored-frame-{uuid.uuid4().hex}"
+        return delayed(_load_frame)(self.put(data), dask_key_name=name)
+
+    def get(self, key: int) -> pd.DataFrame:
+        """A DataFrame of the store, read from the scratch directory if it was spilled.
+
+        Args:
+            key (int): Key of the DataFrame, see :class:`StoredFrame`.
+
+        Returns:
+            pandas.DataFrame: The DataFrame.
+
+        Raises:
+            KeyError: If there is no DataFrame with this key.
+            ValueError: If the store is closed.
+        """
+        with self._lock:
+            if not self._finalizer.alive:
+                raise ValueError("the FrameStore is closed")
+            if key in self._resident:
+                self._resident.move_to_end(key)
+                return self._resident[key]
+            if key not in self._spilled:
+                raise KeyError(key)
+            data = feather.read_table(self._path(key), memory_map=False).to_pandas()
+            self._keep(key, data)
+        return data
+
+    def stats(self) -> dict[str, int]:
+        """Memory and disk usage of the store.
+
+        Returns:
+            dict[str, int]: Number of all, resident and spilled DataFrames ("frames",
+            "resident_frames", "spilled_frames"), memory of the resident DataFrames and
+            the memory limit in bytes ("resident_bytes", "memory_limit_bytes") and size
+            of the spilled files in bytes ("spilled_bytes"). DataFrames which were read
+            again after spilling count as resident and spilled.
+        """
+        with self._lock:
+            return {
+                "frames": len(self._nbytes),
+                "resident_frames": len(self._resident),
+                "spilled_frames": len(self._spilled),
+                "resident_bytes": self._resident_bytes,
+                "spilled_bytes": sum(self._spilled.values()),
+                "memory_limit_bytes": self.memory_limit,
+            }
+
+    def close(self) -> None:
+        """Delete all DataFrames and the scratch directory. Datasets using the store can
+        not be computed afterwards."""
+        with self._lock:
+            self._resident.clear()
+            self._resident_bytes = 0
+            self._finalizer()
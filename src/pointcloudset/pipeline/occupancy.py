@@ -0,0 +1,194 @@
+"""
+Voxel occupancy of a whole Dataset: how many points and pointclouds hit each voxel,
+accumulated as sparse counts per batch of pointclouds and merged in a tree.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from pointcloudset.geometry.voxel import KEY_OFFSET, VoxelCounts, pack_keys, unpack_keys, voxel_indices
+from pointcloudset.pipeline.aggregate import _tree_reduce
+from pointcloudset.pipeline.frame_index import parse_box
+from pointcloudset.pointcloud import PointCloud
+
+if TYPE_CHECKING:
+    from pointcloudset.dataset_core import DatasetCore
+
+
+def _batch_counts(
+    frames: list[pd.DataFrame], voxel_size: float, bounds: tuple | None, value_column: str | None
+) -> VoxelCounts:
+    parts = []
+    for frame in frames:
+        xyz = frame[["x", "y", "z"]].to_numpy(dtype=np.float64)
+        values = None if value_column is None else frame[value_column].to_numpy(dtype=np.float64)
+        parts.append(VoxelCounts.from_points(xyz, voxel_size, bounds, values))
+    return VoxelCounts.merge(parts)
+
+
+def dataset_voxel_occupancy(
+    dataset: DatasetCore,
+    voxel_size: float,
+    bounds: pd.DataFrame | Sequence | None = None,
+    value_column: str | None = None,
+) -> VoxelGrid:
+    """Number of points and pointclouds per voxel over all pointclouds, see
+    :meth:`pointcloudset.dataset.Dataset.voxel_occupancy`.
+
+    Args:
+        dataset (DatasetCore): Dataset.
+        voxel_size (float): Edge length of the voxels.
+        bounds (pandas.DataFrame | Sequence | None, optional): Box in the format of
+            :func:`pointcloudset.pipeline.frame_index.parse_box`, points outside are
+            ignored. Defaults to ``None``.
+        value_column (str | None, optional): Column to average per voxel. Defaults to
+            ``None``.
+
+    Returns:
+        VoxelGrid: Sparse grid of the occupied voxels.
+
+    Raises:
+        ValueError: If voxel_size is not positive, bounds is not valid, the value
+            column does not exist or the points are too far from the origin for the
+            voxel size.
+    """
+    if not voxel_size > 0:
+        raise ValueError(f"voxel_size must be > 0, got {voxel_size}")
+    box = None if bounds is None else parse_box(bounds)
+    first = dataset.execution.for_single_task().compute(dataset.data[0])[0]
+    if value_column is not None and value_column not in first.columns:
+        raise ValueError(f"column {value_column} does not exist")
+    counts = _tree_reduce(dataset, _batch_counts, VoxelCounts.merge, first, voxel_size, box, value_column)
+    return VoxelGrid(counts, voxel_size, value_column)
+
+
+class VoxelGrid:
+    """Sparse grid with the number of points and pointclouds per occupied voxel,
+    returned by :meth:`pointcloudset.dataset.Dataset.voxel_occupancy`.
+
+    Only occupied voxels are stored, sorted by their x, y and z index.
+
+    Args:
+        counts (VoxelCounts): Statistics per voxel.
+        voxel_size (float): Edge length of the voxels.
+        value_column (str | None, optional): Name of the column averaged per voxel.
+            Defaults to ``None``.
+
+    Examples:
+
+        .. code-block:: python
+
+            grid = dataset.voxel_occupancy(0.5, value_column="intensity")
+            grid.query(np.array([[10.0, 2.0, 0.0]]))
+            grid.to_pointcloud().to_file(Path("occupancy.csv"))
+    """
+
+    def __init__(self, counts: VoxelCounts, voxel_size: float, value_column: str | None = None):
+        self.counts = counts
+        self.voxel_size = voxel_size
+        self.value_column = value_column
+
+    def __len__(self) -> int:
+        return len(self.counts.keys)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(voxel_size={self.voxel_size:g}, voxels={len(self)})"
+
+    @property
+    def indices(self) -> np.ndarray:
+        """Voxel indices of the occupied voxels with shape (voxels, 3)."""
+        return unpack_keys(self.counts.keys)
+
+    @property
+    def centers(self) -> np.ndarray:
+        """Centers of the occupied voxels with shape (voxels, 3)."""
+        return (self.indices + 0.5) * self.voxel_size
+
+    @property
+    def points(self) -> np.ndarray:
+        """Number of points per occupied voxel."""
+        return self.counts.points
+
+    @property
+    def pointclouds(self) -> np.ndarray:
+        """Number of pointclouds with at least one point per occupied voxel."""
+        return self.counts.pointclouds
+
+    @property
+    def mean(self) -> np.ndarray | None:
+        """Mean of the value column per occupied voxel, NaN if all values were NaN and
+        ``None`` without a value column."""
+        if self.counts.value_sum is None:
+            return None
+        count = self.counts.value_count
+        return np.divide(self.counts.value_sum, count, out=np.full(len(count), np.nan), where=count > 0)
+
+    def query(self, xyz: np.ndarray) -> pd.DataFrame:
+        """Statistics of the voxels of arbitrary points.
+
+        Args:
+            xyz (numpy.ndarray): Points with shape (n, 3).
+
+        Returns:
+            pandas.DataFrame: One row per point with the columns "points",
+            "pointclouds" and the mean of the value column, 0 and NaN for empty voxels.
+            Points with NaN or infinite coordinates and points outside of the range of
+            voxel indices are in empty voxels.
+        """
+        xyz = np.atleast_2d(np.asarray(xyz, dtype=np.float64))
+        scaled = np.floor(xyz / self.voxel_size)
+        # no voxel outside of the range of pack_keys is occupied
+        found = np.all((scaled >= -KEY_OFFSET) & (scaled < KEY_OFFSET), axis=1)
+        keys = pack_keys(voxel_indices(xyz[found], self.voxel_size))
+        position = np.searchsorted(self.counts.keys, keys)
+        in_grid = position < len(self)
+        in_grid[in_grid] = self.counts.keys[position[in_grid]] == keys[in_grid]
+        found[found] = in_grid
+        position = position[in_grid]
+        points = np.zeros(len(xyz), dtype=np.int64)
+        points[found] = self.points[position]
+        pointclouds = np.zeros(len(xyz), dtype=np.int64)
+        pointclouds[found] = self.pointclouds[position]
+        data = {"points": points, "pointclouds": pointclouds}
+        if self.value_column is not None:
+            mean = np.full(len(xyz), np.nan)
+            mean[found] = self.mean[position]
+            data[f"{self.value_column} mean"] = mean
+        return pd.DataFrame(data)
+
+    def to_frame(self) -> pd.DataFrame:
+        """The occupied voxels as a DataFrame.
+
+        Returns:
+            pandas.DataFrame: Voxel centers x, y, z, the voxel indices "i", "j", "k",
+            "points", "pointclouds" and the mean of the value column.
+        """
+        centers = self.centers
+        indices = self.indices
+        data = {
+            "x": centers[:, 0],
+            "y": centers[:, 1],
+            "z": centers[:, 2],
+            "i": indices[:, 0],
+            "j": indices[:, 1],
+            "k": indices[:, 2],
+            "points": self.points,
+            "pointclouds": self.pointclouds,
+        }
+        if self.value_column is not None:
+            data[f"{self.value_column} mean"] = self.mean
+        return pd.DataFrame(data)
+
+    def to_pointcloud(self) -> PointCloud:
+        """The voxel centers as a PointCloud with the statistics as columns, to plot the
+        occupancy or write it with :meth:`pointcloudset.pointcloud.PointCloud.to_file`.
+
+        Returns:
+            PointCloud: One point per occupied voxel.
+        """
+        return PointCloud(data=self.to_frame(), orig_file="voxel occupancy")
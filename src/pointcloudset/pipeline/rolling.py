@@ -0,0 +1,207 @@
+"""
+Sliding windows of consecutive pointclouds of a Dataset.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, Any, Literal
+
+from dask.base import tokenize
+
+from pointcloudset.config import DATASET_BATCH_TARGET_MB
+from pointcloudset.pipeline.batch import auto_batch_size, batch_slices, delayed_batch
+from pointcloudset.pipeline.checkpoint import function_fingerprint
+from pointcloudset.pipeline.delayed_result import DelayedResult
+from pointcloudset.pipeline.execution import kernel_workers_context
+from pointcloudset.pointcloud import PointCloud
+
+if TYPE_CHECKING:
+    from pointcloudset import Dataset
+
+
+def sliding_windows(pointclouds: Iterable[PointCloud], window: int, step: int = 1) -> Iterator[list[PointCloud]]:
+    """Windows of consecutive pointclouds, collected in a ring buffer so that each
+    pointcloud is read once.
+
+    Args:
+        pointclouds (Iterable[PointCloud]): Pointclouds in order.
+        window (int): Number of pointclouds per window.
+        step (int, optional): Number of pointclouds between the starts of two
+            windows. Defaults to 1.
+
+    Yields:
+        list[PointCloud]: The pointclouds of each full window, oldest first.
+    """
+    buffer: deque[PointCloud] = deque(maxlen=window)
+    for i, pointcloud in enumerate(pointclouds):
+        buffer.append(pointcloud)
+        if len(buffer) == window and (i - window + 1) % step == 0:
+            yield list(buffer)
+
+
+def _run_windows(func, elements: list, timestamps: list, window: int, step: int) -> list:
+    pointclouds = (
+        PointCloud(data=element, timestamp=timestamp) for element, timestamp in zip(elements, timestamps, strict=True)
+    )
+    return [func(pointclouds_in) for pointclouds_in in sliding_windows(pointclouds, window, step)]
+
+
+class Rolling:
+    """Sliding windows over the pointclouds of a Dataset, created with
+    :meth:`pointcloudset.dataset.Dataset.rolling`.
+
+    A window ends at every ``step``-th pointcloud once ``window`` pointclouds are
+    available, like a pandas rolling window with ``min_periods=window``. Each
+    pointcloud is computed once and shared between the overlapping windows.
+
+    Args:
+        dataset (Dataset): Dataset.
+        window (int): Number of consecutive pointclouds per window.
+        step (int, optional): Number of pointclouds between the starts of two
+            windows. Defaults to 1.
+
+    Raises:
+        ValueError: If window or step is less than 1.
+
+    Examples:
+
+        .. code-block:: python
+
+            for pointclouds in dataset.rolling(5):
+                print(len(pointclouds))
+    """
+
+    def __init__(self, dataset: Dataset, window: int, step: int = 1):
+        if window < 1:
+            raise ValueError(f"window must be >= 1, got {window}")
+        if step < 1:
+            raise ValueError(f"step must be >= 1, got {step}")
+        self.dataset = dataset
+        self.window = window
+        self.step = step
+
+    def __len__(self) -> int:
+        return max(0, (len(self.dataset) - self.window) // self.step + 1)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(window={self.window}, step={self.step}, windows={len(self)})"
+
+    def __iter__(self) -> Iterator[list[PointCloud]]:
+        return self.iter_windows()
+
+    def iter_windows(self, max_in_flight: int | None = None) -> Iterator[list[PointCloud]]:
+        """Compute the windows one after another. The upcoming pointclouds are computed
+        in parallel while the current window is used.
+
+        Args:
+            max_in_flight (int | None, optional): Maximum number of pointclouds computed
+                ahead. Defaults to ``None``, see
+                :meth:`pointcloudset.pipeline.delayed_result.DelayedResult.stream`.
+
+        Yields:
+            list[PointCloud]: The pointclouds of each window, oldest first.
+        """
+        dataset = self.dataset
+        frames = DelayedResult(dataset.data, execution=dataset.execution).stream(max_in_flight)
+        pointclouds = (
+            PointCloud(data=df, orig_file=dataset.meta.get("orig_file", ""), timestamp=timestamp)
+            for df, timestamp in zip(frames, dataset.timestamps, strict=True)
+        )
+        yield from sliding_windows(pointclouds, self.window, self.step)
+
+    def apply(
+        self,
+        func: Callable[[list[PointCloud]], PointCloud] | Callable[[list[PointCloud]], Any],
+        warn: bool = True,
+        batch_size: int | Literal["auto"] = "auto",
+        **kwargs,
+    ) -> Dataset | DelayedResult:
+        """Applies a function to each window, lazily like
+        :meth:`pointcloudset.dataset.Dataset.apply`.
+
+        Consecutive windows are processed in one dask task which slides over its
+        pointclouds. The pointclouds at the borders of the tasks are shared in the dask
+        graph, so each pointcloud is computed once per computation.
+
+        Args:
+            func (Callable[[list[PointCloud]], PointCloud] | Callable[[list[PointCloud]], Any]):
+                Function which gets the list of pointclouds of a window, oldest first. If
+                it returns a PointCloud and has the according type hint a new Dataset
+                will be generated, with the timestamp of the last pointcloud of each
+                window.
+            warn (bool): If ``True`` warning if result is not a Dataset, if ``False``
+                warning is turned off.
+            batch_size (int | "auto", optional): Number of windows per dask task. If
+                "auto" it is chosen like in :meth:`pointcloudset.dataset.Dataset.apply`.
+                Defaults to "auto".
+            **kwargs: Keyword arguments to pass to func.
+
+        Returns:
+            Dataset | DelayedResult: One result per window.
+
+        Raises:
+            ValueError: If the Dataset has less pointclouds than a window.
+
+        Examples:
+
+            .. code-block:: python
+
+                def accumulate(pointclouds: list[PointCloud]) -> PointCloud:
+                    return PointCloud(
+                        pd.concat([pointcloud.data for pointcloud in pointclouds], ignore_index=True),
+                        timestamp=pointclouds[-1].timestamp,
+                    )
+
+                dense = dataset.rolling(5).apply(accumulate)
+        """
+        # imported here because pointcloudset.dataset imports this module
+        from pointcloudset.dataset import _is_pipline_returing_pointcloud
+
+        returns_pointcloud = _is_pipline_returing_pointcloud(func, warn=warn)
+        dataset = self.dataset
+        window = self.window
+        step = self.step
+        n_windows = len(self)
+        if n_windows == 0:
+            raise ValueError(f"window {window} is larger than the Dataset with {len(dataset)} pointclouds")
+        kernel_workers = dataset.execution.kernel_workers()
+
+        def window_func(pointclouds: list[PointCloud]):
+            with kernel_workers_context(kernel_workers):
+                res = func(pointclouds, **kwargs)
+            if returns_pointcloud:
+                if not res._has_data():
+                    res = PointCloud(columns=pointclouds[-1].data.columns)
+                return res.data
+            return res
+
+        if batch_size == "auto":
+            first = dataset[0]
+            batch_size = auto_batch_size(
+                n_windows,
+                int(first.data.memory_usage(index=False).sum()) * max(step, window),
+                int(DATASET_BATCH_TARGET_MB * 1024**2),
+                n_workers=dataset.execution.num_workers,
+            )
+        slices = batch_slices(n_windows, batch_size)
+        batches = []
+        for windows in slices:
+            frames = slice(windows.start * step, (windows.stop - 1) * step + window)
+            batches.append(
+                delayed_batch(_run_windows, window_func, dataset.data[frames], dataset.timestamps[frames], window, step)
+            )
+        batch_lengths = [windows.stop - windows.start for windows in slices]
+        results = DelayedResult(batches=batches, batch_lengths=batch_lengths, execution=dataset.execution)
+        if not returns_pointcloud:
+            return results
+        return type(dataset)(
+            data=results.data,
+            timestamps=[dataset.timestamps[i * step + window - 1] for i in range(n_windows)],
+            meta=dataset.meta,
+            execution=dataset.execution,
+            fingerprint=lambda: tokenize(
+                dataset.fingerprint, "rolling", window, step, function_fingerprint(func, kwargs)
+            ),
+        )
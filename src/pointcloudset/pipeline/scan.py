@@ -0,0 +1,145 @@
+"""
+Sequential scan over a Dataset with state carried from pointcloud to pointcloud.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+
+from pointcloudset.io.dataset.dir import meta_to_dir, part_to_dir
+from pointcloudset.pipeline.delayed_result import DelayedResult
+from pointcloudset.pipeline.execution import kernel_workers_context
+from pointcloudset.pointcloud import PointCloud
+
+if TYPE_CHECKING:
+    from pointcloudset import Dataset
+
+# Maximum number of pointclouds waiting to be written, so that a slow disk does not
+# fill the memory.
+MAX_PENDING_WRITES = 4
+
+
+class _OutputWriter:
+    """Writes output pointclouds to a Dataset directory on a background thread, in the
+    layout of :func:`pointcloudset.io.dataset.dir.dataset_to_dir`.
+
+    Empty pointclouds are written as parts without rows, with the dtypes of the first
+    pointcloud with data, instead of the placeholder point of
+    :meth:`pointcloudset.dataset.Dataset.to_file`. So a pointcloud with a single point
+    is never read back as empty.
+    """
+
+    def __init__(self, folder: Path):
+        if not isinstance(folder, Path):
+            raise TypeError("expecting a pathlib Path object")
+        if len(folder.suffix) != 0:
+            raise ValueError("expecting a path not a filename")
+        if folder.exists() and any(folder.iterdir()):
+            raise ValueError(f"output_dir {folder} is not empty")
+        folder.mkdir(parents=True, exist_ok=True)
+        self.folder = folder
+        self.empty: pd.DataFrame | None = None
+        self.waiting_empty: list[int] = []
+        self.columns = None
+        self.pool = ThreadPoolExecutor(1)
+        self.pending: deque[Future] = deque()
+
+    def _submit(self, data: pd.DataFrame, number: int) -> None:
+        self.pending.append(self.pool.submit(part_to_dir, data, self.folder, number))
+        while len(self.pending) > MAX_PENDING_WRITES:
+            self.pending.popleft().result()
+
+    def _write_waiting(self) -> None:
+        for number in self.waiting_empty:
+            self._submit(self.empty, number)
+        self.waiting_empty = []
+
+    def write(self, pointcloud: PointCloud, number: int) -> None:
+        if not isinstance(pointcloud, PointCloud):
+            raise TypeError(f"output_dir needs a PointCloud as output, got {type(pointcloud).__name__}")
+        self.columns = pointcloud.data.columns
+        if not pointcloud._has_data():
+            if self.empty is None:
+                # the dtypes are only known from a pointcloud with data
+                self.waiting_empty.append(number)
+            else:
+                self._submit(self.empty, number)
+            return
+        if self.empty is None:
+            self.empty = pointcloud.data.iloc[:0]
+            self._write_waiting()
+        self._submit(pointcloud.data, number)
+
+    def close(self, meta: dict, timestamps: list) -> None:
+        columns = ["x", "y", "z"] if self.columns is None else list(self.columns)
+        if self.empty is None:
+            self.empty = pd.DataFrame({column: pd.Series(dtype=np.float64) for column in columns})
+            self._write_waiting()
+        for future in self.pending:
+            future.result()
+        self.pool.shutdown()
+        # no placeholder points were written, NaN never matches a point when reading
+        placeholder = pd.DataFrame({column: [np.nan] for column in columns})
+        meta_to_dir(self.folder, dict(meta), timestamps, placeholder)
+
+    def abort(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+
+def scan(
+    dataset: Dataset,
+    func: Callable[..., tuple[Any, Any]],
+    init_state: Any,
+    max_in_flight: int | None = None,
+    output_dir: Path | None = None,
+    **kwargs,
+) -> tuple[Any, list | Dataset]:
+    """Runs ``func(state, pointcloud) -> (state, output)`` over the pointclouds in
+    order. See :meth:`pointcloudset.dataset.Dataset.scan`.
+
+    Args:
+        dataset (Dataset): Dataset to scan.
+        func (Callable[..., tuple[Any, Any]]): Step function.
+        init_state (Any): State passed with the first pointcloud.
+        max_in_flight (int | None, optional): Number of pointclouds computed ahead.
+        output_dir (pathlib.Path | None, optional): Directory to write the outputs to.
+        **kwargs: Keyword arguments to pass to func.
+
+    Returns:
+        tuple[Any, list | Dataset]: Final state and the outputs.
+    """
+    writer = None if output_dir is None else _OutputWriter(output_dir)
+    frames = DelayedResult(dataset.data, execution=dataset.execution).stream(max_in_flight)
+    state = init_state
+    outputs = []
+    # func runs while the following pointclouds are computed
+    kernel_workers = dataset.execution.kernel_workers()
+    try:
+        for number, (df, timestamp) in enumerate(zip(frames, dataset.timestamps, strict=True)):
+            pointcloud = PointCloud(data=df, orig_file=dataset.meta.get("orig_file", ""), timestamp=timestamp)
+            with kernel_workers_context(kernel_workers):
+                state, output = func(state, pointcloud, **kwargs)
+            if writer is None:
+                outputs.append(output)
+            else:
+                writer.write(output, number)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        frames.close()
+    if writer is None:
+        return state, outputs
+    writer.close(dataset.meta, dataset.timestamps)
+    loaded = type(dataset).from_file(output_dir)
+    return state, type(dataset)(
+        loaded.data, loaded.timestamps, loaded.meta, execution=dataset.execution, fingerprint=loaded.fingerprint
+    )
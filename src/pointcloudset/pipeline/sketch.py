@@ -0,0 +1,303 @@
+"""
+Mergeable quantile sketches and fixed bin histograms to summarize columns over a whole
+Dataset in one parallel pass with bounded memory.
+
+The quantile sketch is a KLL sketch: values are kept in levels of sorted buffers, a
+value in level ``h`` stands for ``2**h`` input values. A full level is compacted by
+keeping every second value, starting at a random offset, and moving them one level up.
+Sketches of different frames are merged by concatenating their levels and compacting
+again, so the result does not depend on how the frames are batched.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from pointcloudset.config import DATASET_QUANTILE_SKETCH_K
+from pointcloudset.pipeline.aggregate import KEY_COLUMN, _tree_reduce
+
+if TYPE_CHECKING:
+    from pointcloudset.dataset_core import DatasetCore
+
+MIN_LEVEL_CAPACITY = 8
+_CAPACITY_DECAY = 2 / 3
+
+
+class QuantileSketch:
+    """Mergeable approximate quantiles of a stream of values.
+
+    Memory is about ``3 * k`` values, independent of the number of values added. The
+    rank error is typically below ``4 / k``. Up to ``k`` values the quantiles are exact. The
+    minimum and maximum are always exact. NaN values are ignored.
+
+    Args:
+        k (int, optional): Accuracy parameter. Defaults to
+            :data:`pointcloudset.config.DATASET_QUANTILE_SKETCH_K`.
+        seed (int | None, optional): Seed of the random compaction offsets. Defaults to
+            0, which makes the results reproducible.
+
+    Raises:
+        ValueError: If k is less than 8.
+
+    Examples:
+
+        .. code-block:: python
+
+            sketch = QuantileSketch().update(values1).merge(QuantileSketch().update(values2))
+            sketch.quantile([0.5, 0.99])
+    """
+
+    def __init__(self, k: int | None = None, seed: int | None = 0):
+        k = DATASET_QUANTILE_SKETCH_K if k is None else k
+        if k < MIN_LEVEL_CAPACITY:
+            raise ValueError(f"k must be >= {MIN_LEVEL_CAPACITY}, got {k}")
+        self.k = k
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(MIN_LEVEL_CAPACITY, int(np.ceil(self.k * _CAPACITY_DECAY**depth)))
+
+    def _compress(self) -> None:
+        while True:
+            full = [level for level, items in enumerate(self.levels) if len(items) > self._capacity(level)]
+            if not full:
+                return
+            level = full[0]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # with an odd number of values the largest one stays in the level
+            n_pairs = len(items) // 2
+            offset = int(self._rng.integers(2))
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[offset : 2 * n_pairs : 2]])
+            self.levels[level] = items[2 * n_pairs :]
+
+    def update(self, values: np.ndarray) -> QuantileSketch:
+        """Add values.
+
+        Args:
+            values (numpy.ndarray): Values of any shape, NaN values are ignored.
+
+        Returns:
+            QuantileSketch: The sketch itself.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: QuantileSketch) -> QuantileSketch:
+        """Add all values of another sketch.
+
+        Args:
+            other (QuantileSketch): Sketch with the same k.
+
+        Returns:
+            QuantileSketch: The sketch itself.
+
+        Raises:
+            ValueError: If the sketches have a different k.
+        """
+        if other.k != self.k:
+            raise ValueError(f"can not merge sketches with k {self.k} and {other.k}")
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantile(self, q: float | list[float] | np.ndarray) -> float | np.ndarray:
+        """Approximate quantiles with linear interpolation between the closest ranks,
+        like :func:`numpy.quantile`.
+
+        Args:
+            q (float | list[float] | numpy.ndarray): Quantiles between 0 and 1.
+
+        Returns:
+            float | numpy.ndarray: Quantile values, NaN if no values were added.
+
+        Raises:
+            ValueError: If a quantile is not between 0 and 1.
+        """
+        q_array = np.asarray(q, dtype=np.float64)
+        if np.any((q_array < 0) | (q_array > 1)):
+            raise ValueError("quantiles must be between 0 and 1")
+        if self.n == 0:
+            result = np.full(q_array.shape, np.nan)
+        else:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(items), 2.0**level) for level, items in enumerate(self.levels)])
+            order = np.argsort(items, kind="stable")
+            items = items[order]
+            weights = weights[order]
+            # rank of the middle of the input values each item stands for, 0 based
+            ranks = np.cumsum(weights) - (weights + 1) / 2
+            result = np.interp(q_array * (weights.sum() - 1), ranks, items)
+            result = np.where(q_array <= 0, self.min, np.where(q_array >= 1, self.max, result))
+        return float(result) if result.ndim == 0 else result
+
+
+def _batch_sketches(
+    frames: list[pd.DataFrame], columns: list[str], k: int, numbers: np.ndarray
+) -> dict[str, QuantileSketch]:
+    # seeded by the number of the first frame, so the compaction offsets of the batches
+    # are independent and still reproducible
+    seed = int(numbers[0]) if len(numbers) else 0
+    sketches = {column: QuantileSketch(k, seed=seed) for column in columns}
+    for frame in frames:
+        if len(frame) == 0:
+            continue
+        for column in columns:
+            sketches[column].update(frame[column].to_numpy(dtype=np.float64))
+    return sketches
+
+
+def _merge_sketches(sketches: list[dict[str, QuantileSketch]]) -> dict[str, QuantileSketch]:
+    # the sketches may be inputs of other tasks as well, so they are not changed
+    merged = copy.deepcopy(sketches[0])
+    for other in sketches[1:]:
+        for column, sketch in other.items():
+            merged[column].merge(sketch)
+    return merged
+
+
+def _batch_range(frames: list[pd.DataFrame], columns: list[str]) -> np.ndarray:
+    low_high = np.array([[np.inf] * len(columns), [-np.inf] * len(columns)])
+    for frame in frames:
+        if len(frame) == 0:
+            continue
+        values = frame[columns].to_numpy(dtype=np.float64)
+        low_high[0] = np.fmin(low_high[0], np.nanmin(values, axis=0, initial=np.inf))
+        low_high[1] = np.fmax(low_high[1], np.nanmax(values, axis=0, initial=-np.inf))
+    return low_high
+
+
+def _merge_ranges(ranges: list[np.ndarray]) -> np.ndarray:
+    return np.array([np.min([low for low, _ in ranges], axis=0), np.max([high for _, high in ranges], axis=0)])
+
+
+def _batch_histograms(frames: list[pd.DataFrame], columns: list[str], edges: list[np.ndarray]) -> list[np.ndarray]:
+    counts = [np.zeros(len(column_edges) - 1, dtype=np.int64) for column_edges in edges]
+    for frame in frames:
+        if len(frame) == 0:
+            continue
+        for i, column in enumerate(columns):
+            values = frame[column].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            counts[i] += np.histogram(values, bins=edges[i])[0]
+    return counts
+
+
+def _sum_counts(counts: list[list[np.ndarray]]) -> list[np.ndarray]:
+    return [np.sum(column_counts, axis=0) for column_counts in zip(*counts, strict=True)]
+
+
+def _first_frame(dataset: DatasetCore) -> pd.DataFrame:
+    return dataset.execution.for_single_task().compute(dataset.data[0])[0]
+
+
+def numeric_columns(frame: pd.DataFrame, columns: str | list[str] | None) -> list[str]:
+    """Columns to summarize: the given ones or all numeric columns except original_id.
+
+    Raises:
+        ValueError: If a column does not exist or is not numeric.
+    """
+    if columns is None:
+        return [column for column in frame.columns if column != KEY_COLUMN and frame[column].dtype.kind in "iuf"]
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    for column in columns:
+        if column not in frame.columns:
+            raise ValueError(f"column {column} does not exist")
+        if frame[column].dtype.kind not in "iuf":
+            raise ValueError(f"column {column} is not numeric")
+    return columns
+
+
+def dataset_sketches(
+    dataset: DatasetCore, columns: str | list[str] | None = None, k: int | None = None
+) -> dict[str, QuantileSketch]:
+    """Quantile sketches of columns over all pointclouds, computed in one parallel pass.
+
+    Args:
+        dataset (DatasetCore): Dataset to summarize.
+        columns (str | list[str] | None, optional): Columns. Defaults to ``None``
+            which means all numeric columns except original_id.
+        k (int | None, optional): Accuracy parameter of :class:`QuantileSketch`.
+            Defaults to :data:`pointcloudset.config.DATASET_QUANTILE_SKETCH_K`.
+
+    Returns:
+        dict[str, QuantileSketch]: Sketch per column.
+    """
+    k = DATASET_QUANTILE_SKETCH_K if k is None else k
+    if k < MIN_LEVEL_CAPACITY:
+        raise ValueError(f"k must be >= {MIN_LEVEL_CAPACITY}, got {k}")
+    first = _first_frame(dataset)
+    columns = numeric_columns(first, columns)
+    return _tree_reduce(dataset, _batch_sketches, _merge_sketches, first, columns, k, labels=np.arange(len(dataset)))
+
+
+def dataset_histograms(
+    dataset: DatasetCore,
+    columns: str | list[str] | None = None,
+    bins: int | np.ndarray = 10,
+    range: tuple[float, float] | None = None,
+) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Histograms of columns over all pointclouds, with the bins of
+    :func:`numpy.histogram`.
+
+    Args:
+        dataset (DatasetCore): Dataset to summarize.
+        columns (str | list[str] | None, optional): Columns. Defaults to ``None``
+            which means all numeric columns except original_id.
+        bins (int | numpy.ndarray, optional): Number of equal bins or the bin edges.
+            Defaults to 10.
+        range (tuple[float, float] | None, optional): Lower and upper edge of equal
+            bins. Defaults to ``None`` which uses the minimum and maximum of each
+            column, computed in an additional pass.
+
+    Returns:
+        dict[str, tuple[numpy.ndarray, numpy.ndarray]]: Counts and bin edges per column.
+        Values outside of the bins and NaN values are not counted.
+    """
+    first = _first_frame(dataset)
+    columns = numeric_columns(first, columns)
+    if np.ndim(bins) == 0:
+        if int(bins) < 1:
+            raise ValueError(f"bins must be >= 1, got {bins}")
+        if range is None:
+            low, high = _tree_reduce(dataset, _batch_range, _merge_ranges, first, columns)
+            ranges = [(low[i], high[i]) if np.isfinite(low[i]) else (0.0, 1.0) for i, _ in enumerate(columns)]
+        else:
+            ranges = [range] * len(columns)
+        edges = [np.histogram_bin_edges([], bins=int(bins), range=column_range) for column_range in ranges]
+    else:
+        column_edges = np.asarray(bins, dtype=np.float64)
+        if column_edges.ndim != 1 or len(column_edges) < 2 or np.any(np.diff(column_edges) < 0):
+            raise ValueError("bins must be an int or increasing bin edges")
+        edges = [column_edges] * len(columns)
+    counts = _tree_reduce(dataset, _batch_histograms, _sum_counts, first, columns, edges)
+    return {column: (counts[i], edges[i]) for i, column in enumerate(columns)}
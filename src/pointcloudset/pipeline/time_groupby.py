@@ -0,0 +1,177 @@
+"""
+Statistics of all points per time bin of a Dataset, reduced with mergeable states.
+"""
+
+from __future__ import annotations
+
+import datetime
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from pointcloudset.pipeline.aggregate import (
+    KEY_COLUMN,
+    SUPPORTED_STATS,
+    AggState,
+    Unsupported,
+    _tree_reduce,
+    parse_agg,
+)
+
+if TYPE_CHECKING:
+    from pointcloudset.dataset_core import DatasetCore
+
+
+def _batch_bin_states(
+    frames: list[pd.DataFrame], columns: list[str], need_moments: bool, need_extrema: bool, frame_bins: np.ndarray
+) -> dict[int, AggState] | Unsupported:
+    states = {}
+    try:
+        for frame, time_bin in zip(frames, frame_bins, strict=True):
+            if len(frame) == 0:
+                continue
+            state = AggState.from_frame(frame, columns, need_moments, need_extrema, keyless=True)
+            states[time_bin] = state if time_bin not in states else states[time_bin].merge(state, inplace=True)
+    except Unsupported as error:
+        return error
+    return states
+
+
+def _merge_bin_states(results: list[dict[int, AggState] | Unsupported]) -> dict[int, AggState] | Unsupported:
+    for result in results:
+        if isinstance(result, Unsupported):
+            return result
+    merged: dict[int, AggState] = {}
+    try:
+        for states in results:
+            for time_bin, state in states.items():
+                merged[time_bin] = (
+                    state._copy() if time_bin not in merged else merged[time_bin].merge(state, inplace=True)
+                )
+    except Unsupported as error:
+        return error
+    return merged
+
+
+class TimeGroupBy:
+    """Pointclouds of a Dataset grouped into time bins by their timestamps, created with
+    :meth:`pointcloudset.dataset.Dataset.groupby_time`.
+
+    The bins are the ones of :meth:`pandas.Series.resample`. The pointclouds are
+    assigned to the bins from the timestamps alone, no pointcloud is computed for
+    that.
+
+    Args:
+        dataset (DatasetCore): Dataset.
+        freq (str | datetime.timedelta | pandas.DateOffset): Length of the bins, for
+            example ``"1s"`` or ``"1min"``.
+        origin (str | datetime.datetime, optional): Start of the first bin as in
+            :meth:`pandas.Series.resample`. Defaults to "start_day", so bins of one
+            second start at full seconds.
+
+    Raises:
+        ValueError: If the Dataset is empty or freq is not a valid frequency.
+
+    Examples:
+
+        .. code-block:: python
+
+            dataset.groupby_time("1s").agg({"intensity": ["mean", "max"]})
+    """
+
+    def __init__(
+        self,
+        dataset: DatasetCore,
+        freq: str | datetime.timedelta | pd.DateOffset,
+        origin: str | datetime.datetime = "start_day",
+    ):
+        if len(dataset) == 0:
+            raise ValueError("can not group an empty Dataset")
+        self.dataset = dataset
+        self.freq = pd.tseries.frequencies.to_offset(freq)
+        numbers = pd.Series(np.arange(len(dataset)), index=pd.DatetimeIndex(dataset.timestamps))
+        pointclouds = numbers.resample(self.freq, origin=origin).count()
+        self.bins = pointclouds.index.rename("timestamp")
+        """Start of each time bin."""
+        self.pointclouds = pointclouds.to_numpy()
+        """Number of pointclouds per time bin."""
+        self._frame_bins = np.repeat(np.arange(len(pointclouds)), self.pointclouds)
+
+    def __len__(self) -> int:
+        return len(self.bins)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(freq={self.freq.freqstr}, bins={len(self)})"
+
+    def agg(self, agg: str | list | dict) -> pd.DataFrame:
+        """Aggregate all points of each time bin, like
+        ``all_points.resample(freq).agg(agg)`` on a DataFrame of all points indexed by
+        their timestamp, but without building it.
+
+        Each batch of pointclouds is reduced to mergeable states per time bin (count,
+        sum, sum of squared deviations, minimum and maximum, see
+        :class:`pointcloudset.pipeline.aggregate.AggState`) which are combined in a
+        parallel tree reduction.
+
+        Args:
+            agg (str | list | dict): Statistics as in :meth:`pandas.DataFrame.agg`, any
+                of count, sum, mean, std, var, min and max. The original_id is not
+                aggregated.
+
+        Returns:
+            pandas.DataFrame: One row per time bin, indexed by the start of the bin,
+            with the statistics and the number of points "N" and pointclouds
+            "pointclouds" per bin. Bins without points have a count and sum of 0 and
+            NaN for the other statistics.
+
+        Raises:
+            ValueError: If a statistic is not supported, a column does not exist or is
+                not numeric, or the columns differ between the pointclouds.
+
+        Examples:
+
+            .. code-block:: python
+
+                dataset.groupby_time("1min").agg(["min", "max"])
+        """
+        dataset = self.dataset
+        first = dataset.execution.for_single_task().compute(dataset.data[0])[0]
+        columns = [column for column in first.columns if column != KEY_COLUMN]
+        try:
+            pairs, multi = parse_agg(agg, columns)
+        except Unsupported as error:
+            raise ValueError(f"agg needs existing columns and the statistics {SUPPORTED_STATS}, got {agg}") from error
+        stats = {stat for _, stat in pairs}
+        need_moments = bool(stats & {"sum", "mean", "std", "var"})
+        need_extrema = bool(stats & {"min", "max"})
+        try:
+            states = _tree_reduce(
+                dataset,
+                _batch_bin_states,
+                _merge_bin_states,
+                first,
+                columns,
+                need_moments,
+                need_extrema,
+                labels=self._frame_bins,
+            )
+        except Unsupported as error:
+            raise ValueError(f"can not aggregate this data per time bin: {error}") from error
+        present = np.array([0])
+        data = {}
+        for column, stat in pairs:
+            empty = 0 if stat in ("count", "sum") else np.nan
+            values = [
+                states[time_bin].statistic(column, stat, present)[0] if time_bin in states else empty
+                for time_bin in range(len(self))
+            ]
+            data[(column, stat) if multi else column] = pd.Series(values).to_numpy()
+        data[("N", "") if multi else "N"] = [
+            states[time_bin].rows[0] if time_bin in states else 0 for time_bin in range(len(self))
+        ]
+        data[("pointclouds", "") if multi else "pointclouds"] = self.pointclouds
+        df = pd.DataFrame(data, index=self.bins)
+        if multi:
+            df.columns = pd.MultiIndex.from_tuples(list(data.keys()))
+        return df
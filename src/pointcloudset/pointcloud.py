@@ -17,6 +17,11 @@ from pointcloudset.config import (
 )
 from pointcloudset.diff import ALL_DIFFS
 from pointcloudset.filter import ALL_FILTERS
+from pointcloudset.filter.select import Selection
+from pointcloudset.geometry import voxel
+from pointcloudset.geometry.normals import estimate_normals
+from pointcloudset.geometry.ransac import check_ransac_arguments, ransac_plane
+from pointcloudset.geometry.sampling import farthest_point_indices, stratified_indices
 from pointcloudset.io import (
     POINTCLOUD_FROM_FILE,
     POINTCLOUD_FROM_INSTANCE,
@@ -33,7 +38,9 @@ class PointCloud(PointCloudCore):
     photogrammetry  or simular.
 
     One PointCloud consists mainly of a pandas.DataFrame (.data) with the point
-    coordinates and all associated per-point attributes.
+    coordinates and all associated per-point attributes. It can also be created from a
+    dict of numpy arrays or a structured array. Filters keep the columns as numpy
+    arrays and the DataFrame is only built when .data is used.
 
     Note that the index of the points is not preserved when applying processing.
     Therefore, a new PointCloud object is generated at each processing stage.
@@ -319,7 +326,7 @@ class PointCloud(PointCloudCore):
         else:
             raise ValueError("Unsupported diff. Check docstring")
 
-    def filter(self, name: Literal["quantile", "value", "radiusoutlier"], *args, **kwargs) -> PointCloud:
+    def filter(self, name: Literal["quantile", "value", "radiusoutlier", "statistical"], *args, **kwargs) -> PointCloud:
         """Filters a PointCloud according to criteria.
 
         Args:
@@ -327,6 +334,7 @@ class PointCloud(PointCloudCore):
                 "quantile": :func:`pointcloudset.filter.stat.quantile_filter` \n
                 "value": :func:`pointcloudset.filter.stat.value_filter` \n
                 "radiusoutlier": :func:`pointcloudset.filter.stat.remove_radius_outlier` \n
+                "statistical": :func:`pointcloudset.filter.stat.remove_statistical_outlier` \n
             *args: Positional arguments to pass to func.
             **kwargs: Keyword arguments to pass to func.
 
@@ -345,6 +353,10 @@ class PointCloud(PointCloudCore):
             .. code-block:: python
 
                 filteredpointcloud = testpointcloud.filter("value","intensity",">",100)
+
+            .. code-block:: python
+
+                filteredpointcloud = testpointcloud.filter("statistical", k=20, std_ratio=2.0)
         """
         name = name.upper()
         if name in ALL_FILTERS:
@@ -370,9 +382,7 @@ class PointCloud(PointCloudCore):
 
                 limitedpointcloud = testpointcloud.limit("x", -1.0, 1.0).limit("intensity", 0.0, 50.0)
         """
-        if maxvalue < minvalue:
-            raise ValueError("maxvalue must be greater than minvalue")
-        return self.filter("value", dim, ">=", minvalue).filter("value", dim, "<=", maxvalue)
+        return self.select({dim: (minvalue, maxvalue)})
 
     def limit_less(self, dim: str, value: float) -> PointCloud:
         """Limit the range if a diminsion to a value.
@@ -392,7 +402,7 @@ class PointCloud(PointCloudCore):
 
                 limitedpointcloud = testpointcloud.limit_less("x",1.0)
         """
-        return self.filter("value", dim, "<", value)
+        return self.select({dim: ("<", value)})
 
     def limit_greater(self, dim: str, value: float) -> PointCloud:
         """Limit the range if a diminsion to a value.
@@ -412,7 +422,48 @@ class PointCloud(PointCloudCore):
 
                 limitedpointcloud = testpointcloud.limit_greater("x",10.0)
         """
-        return self.filter("value", dim, ">", value)
+        return self.select({dim: (">", value)})
+
+    def select(self, conditions: str | dict | None = None, lazy: bool = False, **kwargs) -> PointCloud | Selection:
+        """Select the points which fulfil all conditions. The conditions are combined into
+        one mask and the points are gathered once, instead of once per condition as with
+        chained filters.
+
+        Args:
+            conditions (str | dict | None, optional): Either a dict of column names and
+                conditions or an expression of :func:`pandas.eval` with the column names
+                as variables like ``"x > 0 and intensity < 50"``. A condition is either
+                ``(min, max)`` for ``min <= value <= max`` or ``(relation, value)`` with
+                any operator as string like ``(">", 20)``. Defaults to ``None``.
+            lazy (bool, optional): Return a
+                :class:`pointcloudset.filter.select.Selection` which can be chained
+                further and gathers the points with ``compute()``. Defaults to ``False``.
+            **kwargs: Conditions for columns whose names are valid keywords.
+
+        Returns:
+            PointCloud | Selection: PointCloud with the selected points, or the lazy
+            selection.
+
+        Raises:
+            ValueError: If a condition is not valid.
+            KeyError: If a column does not exist.
+
+        Examples:
+
+            .. code-block:: python
+
+                cropped = testpointcloud.select(x=(-10, 10), y=(-5, 5), intensity=(">", 20))
+
+            .. code-block:: python
+
+                cropped = testpointcloud.select("x > 0 and intensity < 50")
+
+            .. code-block:: python
+
+                cropped = testpointcloud.select(x=(-10, 10), lazy=True).limit("y", -5, 5).compute()
+        """
+        selection = Selection(self, np.ones(len(self), dtype=bool)).select(conditions, **kwargs)
+        return selection if lazy else selection.compute()
 
     def apply_filter(self, filter_result: np.ndarray | list[int]) -> PointCloud:
         """Generating a new PointCloud by removing points according to a call of the
@@ -428,15 +479,31 @@ class PointCloud(PointCloudCore):
             TypeError: If the filter_result has the wrong type.
 
         """
-        if isinstance(filter_result, np.ndarray):
+        if not isinstance(filter_result, (np.ndarray, list)):
+            raise TypeError("Wrong filter_result expecting array with boolean values orlist of indices")
+        spatial_index = self._spatial_index
+        arrays = self._column_arrays()
+        if arrays is not None:
+            # the new pointcloud keeps numpy arrays, the DataFrame is built when needed
+            indices = np.asarray(filter_result)
+            if indices.dtype == bool:
+                if len(indices) != len(self):
+                    raise IndexError(f"boolean filter_result of length {len(indices)} for {len(self)} points")
+                # taking the same indices from each column is faster than boolean masks
+                indices = np.flatnonzero(indices)
+            elif indices.size == 0:
+                indices = indices.astype(np.intp)
+            new_data = {name: values.take(indices, axis=0) for name, values in arrays.items()}
+        elif isinstance(filter_result, np.ndarray):
             # dataframe-based filters
             new_data = self.data.loc[filter_result].reset_index(drop=True)
-        elif isinstance(filter_result, list):
+        else:
             # list of integer indices
             new_data = self.data.iloc[filter_result].reset_index(drop=True)
-        else:
-            raise TypeError("Wrong filter_result expecting array with boolean values orlist of indices")
-        return PointCloud(new_data, timestamp=self.timestamp)
+        filtered = PointCloud(new_data, timestamp=self.timestamp)
+        if spatial_index is not None:
+            filtered._spatial_index = spatial_index.subset(filter_result)
+        return filtered
 
     def get_cluster(
         self,
@@ -468,8 +535,8 @@ class PointCloud(PointCloudCore):
             raise ValueError(f"min_points must be >= 1, got {min_points}")
         if len(self) == 0:
             raise ValueError("Cannot cluster an empty PointCloud")
-        xyz = np.asarray(self.xyz, dtype=np.float64)
-        return get_cluster_labels(xyz=xyz, eps=eps, min_points=min_points)
+        index = self.spatial_index
+        return get_cluster_labels(xyz=index.xyz, eps=eps, min_points=min_points, tree=index.tree)
 
     def take_cluster(self, cluster_number: int, cluster_labels: pandas.DataFrame) -> PointCloud:
         """Takes only the points belonging to the cluster_number.
@@ -492,6 +559,54 @@ class PointCloud(PointCloudCore):
         bool_array = (cluster_labels["cluster"] == cluster_number).values
         return self.apply_filter(bool_array)
 
+    def estimate_normals(
+        self,
+        k: int | None = None,
+        radius: float | None = None,
+        viewpoint: np.ndarray | None = None,
+    ) -> PointCloud:
+        """Estimate the normal and curvature of each point from the covariance of its
+        neighbourhood, see :func:`pointcloudset.geometry.normals.estimate_normals`.
+
+        The neighbours are queried on :attr:`spatial_index` in chunks under the memory
+        budget :data:`pointcloudset.config.NORMALS_MEMORY_BUDGET_MB` and all covariance
+        matrices of a chunk are decomposed at once.
+
+        Note:
+            Adds the columns "nx", "ny", "nz" and "curvature" to the data of the
+            pointcloud.
+
+        Args:
+            k (int | None, optional): Number of neighbours including the point itself.
+                Must be >= 3. Defaults to ``None``.
+            radius (float | None, optional): Search radius. Must be positive. With k,
+                at most k neighbours within the radius are used. Defaults to ``None``.
+            viewpoint (numpy.ndarray | None, optional): [x, y, z] towards which the
+                normals point. Defaults to ``None`` which is the origin, the sensor
+                position.
+
+        Returns:
+            PointCloud: PointCloud with unit normals and the curvature, the smallest
+            eigenvalue of the covariance divided by the sum of all eigenvalues. Both are
+            NaN for points with fewer than 3 neighbours.
+
+        Raises:
+            ValueError: If neither k nor radius is given, k is less than 3 or radius is
+                not positive.
+
+        Examples:
+
+            .. code-block:: python
+
+                pointcloud = pointcloud.estimate_normals(k=20)
+                ground = pointcloud.limit("nz", 0.95, 1.0)
+        """
+        normals, curvature = estimate_normals(self.spatial_index, k=k, radius=radius, viewpoint=viewpoint)
+        for number, column in enumerate(("nx", "ny", "nz")):
+            self._add_column(column, normals[:, number])
+        self._add_column("curvature", curvature)
+        return self
+
     def plane_segmentation(
         self,
         distance_threshold: float,
@@ -499,21 +614,28 @@ class PointCloud(PointCloudCore):
         num_iterations: int,
         return_plane_model: bool = False,
         seed: int = 42,
+        confidence: float = 0.999,
     ) -> PointCloud | dict:
         """Segments a plane in the point cloud using the RANSAC algorithm.
 
-        After finding the best consensus set the plane is refit via SVD on all
-        inliers, so the returned model is more accurate than the initial sample.
+        The plane hypotheses are fitted and scored in batches, see
+        :func:`pointcloudset.geometry.ransac.ransac_plane`, and the search stops early
+        once the inlier ratio of the best plane gives the requested confidence. After
+        finding the best consensus set the plane is refit on all inliers, so the
+        returned model is more accurate than the initial sample.
 
         Args:
             distance_threshold (float): Max distance a point can be from the plane
                 model, and still be considered as an inlier.
             ransac_n (int): Number of points sampled per iteration to fit a candidate
                 plane. Must be >= 3.
-            num_iterations (int): Number of RANSAC iterations. Must be >= 1.
+            num_iterations (int): Maximum number of RANSAC iterations. Must be >= 1.
             return_plane_model (bool, optional): Return also plane model parameters
                 if ``True``. Defaults to ``False``.
             seed (int, optional): Random seed for reproducibility. Defaults to 42.
+            confidence (float, optional): Probability that one of the samples contained
+                only inliers before stopping early. ``1.0`` always runs
+                num_iterations. Defaults to 0.999.
 
         Returns:
             PointCloud or dict: PointCloud with inliers or a dict of PointCloud with inliers and the
@@ -522,49 +644,22 @@ class PointCloud(PointCloudCore):
         Raises:
             ValueError: If the point cloud is empty, ``distance_threshold`` is not
                 positive, ``ransac_n`` is less than 3 or exceeds the number of points,
-                or ``num_iterations`` is less than 1.
+                ``num_iterations`` is less than 1 or ``confidence`` is not in (0, 1].
         """
         if len(self) == 0:
             raise ValueError("Cannot segment a plane in an empty PointCloud")
-        if distance_threshold <= 0:
-            raise ValueError(f"distance_threshold must be positive, got {distance_threshold}")
-        if ransac_n < 3:
-            raise ValueError(f"ransac_n must be >= 3 to define a plane, got {ransac_n}")
+        check_ransac_arguments(distance_threshold, ransac_n, num_iterations, confidence)
         if ransac_n > len(self):
             raise ValueError(f"ransac_n ({ransac_n}) exceeds number of points ({len(self)})")
-        if num_iterations < 1:
-            raise ValueError(f"num_iterations must be >= 1, got {num_iterations}")
 
-        xyz = self.points.xyz
-        n = len(xyz)
-        rng = np.random.default_rng(seed)
-        best_inliers: list[int] = []
-        best_model = np.zeros(4)
-
-        for _ in range(num_iterations):
-            sample = xyz[rng.choice(n, ransac_n, replace=False)]
-            centroid = sample.mean(axis=0)
-            _, _, Vt = np.linalg.svd(sample - centroid)
-            normal = Vt[-1]
-            norm_len = np.linalg.norm(normal)
-            if norm_len < 1e-10:
-                continue
-            normal = normal / norm_len
-            d = -np.dot(normal, centroid)
-            dists = np.abs(xyz @ normal + d)
-            inliers = np.where(dists <= distance_threshold)[0].tolist()
-            if len(inliers) > len(best_inliers):
-                best_inliers = inliers
-
-        # Refit plane on all inliers for a more accurate final model.
-        if best_inliers:
-            inlier_xyz = xyz[best_inliers]
-            centroid = inlier_xyz.mean(axis=0)
-            _, _, Vt = np.linalg.svd(inlier_xyz - centroid)
-            normal = Vt[-1]
-            normal = normal / np.linalg.norm(normal)
-            d = -np.dot(normal, centroid)
-            best_model = np.array([*normal, d])
+        best_inliers, best_model = ransac_plane(
+            self.get_xyz(np.float64),
+            distance_threshold,
+            ransac_n,
+            num_iterations,
+            np.random.default_rng(seed),
+            confidence=confidence,
+        )
 
         inlier_pointcloud = self.apply_filter(best_inliers)
         if return_plane_model:
@@ -572,19 +667,266 @@ class PointCloud(PointCloudCore):
         else:
             return inlier_pointcloud
 
+    def segment_planes(
+        self,
+        distance_threshold: float,
+        max_planes: int,
+        min_inliers: int,
+        ransac_n: int = 3,
+        num_iterations: int = 1000,
+        seed: int = 42,
+        confidence: float = 0.999,
+    ) -> dict:
+        """Segments several planes one after the other, like the ground and walls, with
+        the RANSAC algorithm of :meth:`plane_segmentation`.
+
+        Each plane is searched in the points left over by the previous ones. The
+        coordinates of the remaining points are compacted in one buffer, so no
+        PointCloud or DataFrame is built until the residual at the end.
+
+        Args:
+            distance_threshold (float): Max distance a point can be from the plane
+                model, and still be considered as an inlier.
+            max_planes (int): Maximum number of planes. Must be >= 1.
+            min_inliers (int): The search stops at the first plane with fewer inliers.
+                Must be >= 1.
+            ransac_n (int, optional): Number of points sampled per iteration to fit a
+                candidate plane. Must be >= 3. Defaults to 3.
+            num_iterations (int, optional): Maximum number of RANSAC iterations per
+                plane. Must be >= 1. Defaults to 1000.
+            seed (int, optional): Random seed for reproducibility. Defaults to 42.
+            confidence (float, optional): Confidence for stopping early, see
+                :meth:`plane_segmentation`. Defaults to 0.999.
+
+        Returns:
+            dict: ``"plane_models"``, an array with one plane model [a, b, c, d] per row,
+            ``"inliers"``, a list with the sorted point numbers of the inliers of each
+            plane, which can be passed to :meth:`apply_filter`, and ``"residual"``, the
+            PointCloud of the points which are on none of the planes, including the
+            points with NaN or infinite coordinates.
+
+        Raises:
+            ValueError: If ``distance_threshold`` is not positive, ``max_planes`` or
+                ``min_inliers`` is less than 1, ``ransac_n`` is less than 3,
+                ``num_iterations`` is less than 1 or ``confidence`` is not in (0, 1].
+
+        Examples:
+
+            .. code-block:: python
+
+                planes = pointcloud.segment_planes(0.05, max_planes=4, min_inliers=500)
+                ground = pointcloud.apply_filter(planes["inliers"][0])
+                objects = planes["residual"]
+        """
+        check_ransac_arguments(distance_threshold, ransac_n, num_iterations, confidence)
+        if max_planes < 1:
+            raise ValueError(f"max_planes must be >= 1, got {max_planes}")
+        if min_inliers < 1:
+            raise ValueError(f"min_inliers must be >= 1, got {min_inliers}")
+
+        rng = np.random.default_rng(seed)
+        xyz = self.get_xyz(np.float64)
+        # only finite points go into the buffer, the others stay in the residual
+        finite = np.isfinite(xyz).all(axis=1)
+        numbers = np.flatnonzero(finite)
+        xyz = xyz[numbers]
+        remaining = len(xyz)
+        plane_models = []
+        inliers = []
+        while len(plane_models) < max_planes and remaining >= max(ransac_n, min_inliers):
+            plane_inliers, plane_model = ransac_plane(
+                xyz[:remaining], distance_threshold, ransac_n, num_iterations, rng, confidence=confidence
+            )
+            if len(plane_inliers) < min_inliers:
+                break
+            plane_models.append(plane_model)
+            inliers.append(numbers[plane_inliers])
+            keep = np.ones(remaining, dtype=bool)
+            keep[plane_inliers] = False
+            # move the remaining points to the front, in their original order
+            xyz[: remaining - len(plane_inliers)] = xyz[:remaining][keep]
+            numbers[: remaining - len(plane_inliers)] = numbers[:remaining][keep]
+            remaining -= len(plane_inliers)
+        return {
+            "plane_models": np.array(plane_models).reshape(-1, 4),
+            "inliers": inliers,
+            "residual": self.apply_filter(np.sort(np.concatenate([numbers[:remaining], np.flatnonzero(~finite)]))),
+        }
+
     def random_down_sample(self, number_of_points: int) -> PointCloud:
         """Function to downsample input pointcloud into output pointcloud randomly.
-        Made
+        See :meth:`voxel_down_sample` for a downsampling which keeps the spatial
+        distribution.
 
         Args:
             number_of_points ([int]): number_of_points
 
         Returns:
-            PointCloud: subsampled PointCloud
+            PointCloud: subsampled PointCloud with the points in their original order.
+
+        Raises:
+            ValueError: If number_of_points is larger than the number of points.
         """
-        new_data = self.data.sample(number_of_points).reset_index()
+        rng = np.random.default_rng()
+        return self.apply_filter(np.sort(rng.choice(len(self), number_of_points, replace=False)))
+
+    def voxel_down_sample(
+        self,
+        voxel_size: float,
+        agg: Literal["centroid", "first", "mean"] = "centroid",
+        column_agg: dict[str, str] | None = None,
+    ) -> PointCloud:
+        """Downsample the PointCloud to one point per occupied voxel of a regular grid,
+        which keeps the spatial distribution of the points unlike
+        :meth:`random_down_sample`.
+
+        The voxels are aligned with the origin, see :mod:`pointcloudset.geometry.voxel`.
+        The points are grouped by sorting integer voxel keys and each column is reduced
+        per voxel with :func:`numpy.ufunc.reduceat`, without a groupby or a Python loop.
+
+        Args:
+            voxel_size (float): Edge length of the voxels. Must be positive.
+            agg (Literal["centroid", "first", "mean"], optional): "centroid" takes the
+                mean of x, y and z and the other columns of the first point of each
+                voxel, "first" keeps the first point of each voxel and "mean" takes the
+                mean of all numeric columns except original_id. Defaults to "centroid".
+            column_agg (dict[str, str] | None, optional): Statistics for single columns
+                instead of agg, any of "first", "mean", "min", "max" and "sum". Defaults
+                to ``None``.
+
+        Returns:
+            PointCloud: One point per voxel, in the order of the first point of each
+            voxel. Points with NaN coordinates are left out. NaN values of other
+            columns are skipped by the statistics.
+
+        Raises:
+            ValueError: If voxel_size is not positive, agg or a statistic is not valid,
+                a statistic other than "first" is used on a column which is not numeric
+                or the points are too far from the origin for the voxel size.
+            KeyError: If a column of column_agg does not exist.
+
+        Examples:
+
+            .. code-block:: python
+
+                smaller = pointcloud.voxel_down_sample(0.1, column_agg={"intensity": "max"})
+                dataset.apply(pointcloudset.PointCloud.voxel_down_sample, voxel_size=0.1)
+        """
+        if voxel_size <= 0:
+            raise ValueError(f"voxel_size must be positive, got {voxel_size}")
+        if agg not in ("centroid", "first", "mean"):
+            raise ValueError(f"agg must be 'centroid', 'first' or 'mean', got {agg}")
+        column_agg = {} if column_agg is None else column_agg
+        for column, how in column_agg.items():
+            if column not in self.columns:
+                raise KeyError(f"choose any of {self.columns}, got {column}")
+            if how not in voxel.VOXEL_AGGS:
+                raise ValueError(f"statistic of {column} must be one of {voxel.VOXEL_AGGS}, got {how}")
+        arrays = self._column_arrays()
+        as_frame = arrays is None
+        if as_frame:
+            data = self.data
+            if isinstance(data.columns, pandas.MultiIndex) or not data.columns.is_unique:
+                raise ValueError("voxel_down_sample needs unique column names")
+            arrays = {name: data[name].array for name in data.columns}
+        order, starts = voxel.group_points(self.get_xyz(np.float64), voxel_size)
+        # the voxels are sorted by their keys, put them in the order of their first point
+        voxel_order = np.argsort(voxel.first_points(order, starts))
+        new_data = {}
+        for name, values in arrays.items():
+            numeric = pandas.api.types.is_numeric_dtype(values.dtype) and not pandas.api.types.is_bool_dtype(
+                values.dtype
+            )
+            if name in column_agg:
+                how = column_agg[name]
+            elif (agg == "mean" and numeric and name != "original_id") or (
+                agg == "centroid" and name in ("x", "y", "z")
+            ):
+                how = "mean"
+            else:
+                how = "first"
+            if how != "first":
+                if not numeric:
+                    raise ValueError(f"{how} needs a numeric column, {name} is {values.dtype}")
+                if not isinstance(values, np.ndarray):
+                    values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            new_data[name] = voxel.aggregate_groups(values, order, starts, how).take(voxel_order)
+        if as_frame:
+            new_data = pandas.DataFrame(new_data)
         return PointCloud(new_data, timestamp=self.timestamp)
 
+    def farthest_point_sample(self, number_of_points: int, seed: int | None = 42) -> PointCloud:
+        """Downsample the PointCloud with farthest point sampling: starting at a random
+        point, the point farthest away from all points picked so far is added until
+        there are number_of_points, which covers the whole pointcloud evenly.
+
+        The samples are computed on the blocks of :attr:`spatial_index`, see
+        :func:`pointcloudset.geometry.sampling.farthest_point_indices`, and the loop is
+        compiled with Numba if the ``numba`` extra is installed.
+
+        Args:
+            number_of_points (int): Number of points to keep.
+            seed (int | None, optional): Seed of the random first point. Defaults to 42.
+                ``None`` picks a different first point each time.
+
+        Returns:
+            PointCloud: The picked points in the order they were picked, so the first k
+            points are the farthest point sample of size k. Points with NaN coordinates
+            are left out.
+
+        Raises:
+            ValueError: If number_of_points is negative or larger than the number of
+                points with finite coordinates.
+
+        Examples:
+
+            .. code-block:: python
+
+                keypoints = pointcloud.farthest_point_sample(4096)
+        """
+        index = self.spatial_index
+        finite = np.isfinite(index.xyz).all(axis=1)
+        numbers = None
+        if not finite.all():
+            numbers = np.flatnonzero(finite)
+            index = index.subset(numbers)
+        if not 0 <= number_of_points <= len(index):
+            raise ValueError(f"number_of_points must be between 0 and {len(index)}, got {number_of_points}")
+        start = int(np.random.default_rng(seed).integers(len(index))) if len(index) > 0 else 0
+        picked = farthest_point_indices(index, number_of_points, start=start)
+        return self.apply_filter(picked if numbers is None else numbers[picked])
+
+    def stratified_sample(self, number_of_points: int, voxel_size: float, seed: int | None = 42) -> PointCloud:
+        """Downsample the PointCloud to a fixed number of random points spread over a
+        regular voxel grid: every occupied voxel gets one point before any voxel gets a
+        second one, unlike :meth:`random_down_sample` which keeps mostly the dense parts.
+
+        See :func:`pointcloudset.geometry.sampling.stratified_indices`.
+
+        Args:
+            number_of_points (int): Number of points to keep.
+            voxel_size (float): Edge length of the voxels. Must be positive.
+            seed (int | None, optional): Seed of the random choice. Defaults to 42.
+
+        Returns:
+            PointCloud: Subsampled PointCloud with the points in their original order.
+            Points with NaN coordinates are left out.
+
+        Raises:
+            ValueError: If voxel_size is not positive, number_of_points is negative or
+                larger than the number of points with finite coordinates.
+
+        Examples:
+
+            .. code-block:: python
+
+                sample = pointcloud.stratified_sample(10000, voxel_size=0.5)
+        """
+        if voxel_size <= 0:
+            raise ValueError(f"voxel_size must be positive, got {voxel_size}")
+        picked = stratified_indices(self.get_xyz(np.float64), number_of_points, voxel_size, np.random.default_rng(seed))
+        return self.apply_filter(picked)
+
     def _add_original_id_from_index(self) -> PointCloud:
         """Add orginal ID column from index."""
-        return self._add_column("original_id", self.data.index)
+        return self._add_column("original_id", np.arange(len(self)))
@@ -2,18 +2,25 @@ from __future__ import annotations
 
 import traceback
 import warnings
+from collections.abc import Mapping
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
 
+from pointcloudset.geometry.spatial_index import SpatialIndex
+
 
 class _PointCloudView:
     """Minimal geometry view used internally for point coordinates.
     This was necessary to keep the similar API after removing pyntcloud dependency"""
 
-    def __init__(self, data: pd.DataFrame):
-        self._data = data
+    def __init__(self, owner: PointCloudCore):
+        self._owner = owner
+
+    @property
+    def _data(self) -> pd.DataFrame:
+        return self._owner.data
 
     @staticmethod
     def _warn_deprecated(attribute: str) -> None:
@@ -32,23 +39,47 @@ class _PointCloudView:
     @property
     def xyz(self) -> np.ndarray:
         self._warn_deprecated("xyz")
-        return self._data[["x", "y", "z"]].to_numpy()
+        return self._owner.xyz
 
     @property
     def centroid(self) -> np.ndarray:
         self._warn_deprecated("centroid")
-        return self._data[["x", "y", "z"]].to_numpy().mean(axis=0)
+        return self._owner.xyz.mean(axis=0)
+
+
+_XYZ_DTYPES = (np.dtype(np.float32), np.dtype(np.float64))
+
+
+def _columns_from_arrays(data: Mapping | np.ndarray) -> dict[str, np.ndarray]:
+    """Column arrays of a dict of arrays or a structured array, checked for equal lengths."""
+    if isinstance(data, np.ndarray):
+        if data.dtype.names is None:
+            raise TypeError("Data argument must be a structured array if it is a numpy array")
+        columns = {name: data[name] for name in data.dtype.names}
+    else:
+        columns = {name: np.asarray(values) for name, values in data.items()}
+    if not {"x", "y", "z"}.issubset(columns):
+        raise ValueError("Data must have x, y and z coordinates")
+    lengths = {values.shape for values in columns.values()}
+    if len(lengths) != 1 or len(next(iter(lengths))) != 1:
+        raise ValueError("all columns of data must be one dimensional arrays of the same length")
+    return columns
 
 
 class PointCloudCore:
     """
     PointCloudCore Class with all the main methods and properties of the
     PointCloud Class.
+
+    The data is either a DataFrame or a dict of contiguous numpy arrays, one per
+    column. Pointclouds created from arrays, for example by filters, keep the arrays and
+    build the DataFrame only when :attr:`data` is used, so chains of filters work on
+    the arrays.
     """
 
     def __init__(
         self,
-        data: pd.DataFrame = None,
+        data: pd.DataFrame | Mapping[str, np.ndarray] | np.ndarray = None,
         orig_file: str = "",
         timestamp: datetime = None,
         columns: list = ["x", "y", "z"],
@@ -57,6 +88,10 @@ class PointCloudCore:
         """Timestamp."""
         self.orig_file = orig_file
         """Path to orginal file. Defaults to empty."""
+        self.points = _PointCloudView(self)
+        self._columns: dict[str, np.ndarray] | None = None
+        self._xyz_cache: dict[np.dtype | None, np.ndarray] = {}
+        self._spatial_index: SpatialIndex | None = None
 
         if data is None:
             # "empty" PointCloud with one line of all nans. This is necessary in order
@@ -80,31 +115,166 @@ class PointCloudCore:
         return self.timestamp.strftime("%A, %B %d, %Y %H:%M:%S.%f")
 
     @property
-    def data(self):
-        """All the data, x,y,z and auxiliary data such as intensity, range and more."""
+    def data(self) -> pd.DataFrame:
+        """All the data, x,y,z and auxiliary data such as intensity, range and more.
+
+        The DataFrame may be changed in place, so using it drops the coordinates cached
+        by :meth:`get_xyz`.
+        """
+        if self._columns is not None:
+            self.__data = pd.DataFrame(self._columns, copy=False)
+            self._columns = None
+        self._clear_caches()
         return self.__data
 
+    @data.setter
+    def data(self, df: pd.DataFrame | Mapping[str, np.ndarray] | np.ndarray):
+        if isinstance(df, pd.DataFrame):
+            if not {"x", "y", "z"}.issubset(df.columns):
+                raise ValueError("Data must have x, y and z coordinates")
+            self._update_data(df)
+            self._check_index()
+        elif isinstance(df, (Mapping, np.ndarray)):
+            self._columns = _columns_from_arrays(df)
+            self.__data = None
+            self._clear_caches()
+        else:
+            raise TypeError("Data argument must be a DataFrame, a dict of arrays or a structured array")
+
+    @property
+    def columns(self) -> list:
+        """Names of the columns of the data, without building the DataFrame."""
+        if self._columns is not None:
+            return list(self._columns)
+        return list(self.__data.columns)
+
+    def column_values(self, name: str) -> np.ndarray:
+        """Values of one column as a numpy array, without building the DataFrame.
+
+        Args:
+            name (str): Name of the column.
+
+        Returns:
+            numpy.ndarray: Values of the column, which must not be changed.
+
+        Raises:
+            KeyError: If the column does not exist.
+        """
+        if self._columns is not None:
+            return self._columns[name]
+        return self.__data[name].to_numpy()
+
+    def _column_arrays(self) -> dict[str, np.ndarray] | None:
+        """All columns as numpy arrays, ``None`` if the DataFrame has columns which are
+        not plain numpy arrays, like categorical columns."""
+        if self._columns is not None:
+            return self._columns
+        df = self.__data
+        if isinstance(df.columns, pd.MultiIndex) or not df.columns.is_unique:
+            return None
+        if not all(isinstance(dtype, np.dtype) for dtype in df.dtypes):
+            return None
+        return {name: df[name].to_numpy() for name in df.columns}
+
+    def get_xyz(self, dtype: type | str | None = None) -> np.ndarray:
+        """The x, y and z coordinates as one C-contiguous, read-only array.
+
+        The array is cached until the data is reassigned or used, see :attr:`data`, so
+        all algorithms working on the same pointcloud share one copy of the coordinates.
+
+        Args:
+            dtype (type | str | None, optional): numpy.float32 or numpy.float64. Defaults
+                to ``None`` which is the common dtype of the x, y and z columns.
+
+        Returns:
+            numpy.ndarray: Coordinates with shape (n, 3). Use ``numpy.array(xyz)`` for a
+            copy which can be changed.
+
+        Raises:
+            ValueError: If dtype is not float32 or float64.
+
+        Examples:
+
+            .. code-block:: python
+
+                xyz = pointcloud.get_xyz(np.float64)
+        """
+        if dtype is not None:
+            dtype = np.dtype(dtype)
+            if dtype not in _XYZ_DTYPES:
+                raise ValueError(f"dtype must be float32 or float64, got {dtype}")
+        if None not in self._xyz_cache:
+            if self._columns is not None:
+                xyz = np.column_stack([self._columns["x"], self._columns["y"], self._columns["z"]])
+            else:
+                xyz = np.ascontiguousarray(self.__data[["x", "y", "z"]].to_numpy())
+            xyz.flags.writeable = False
+            self._xyz_cache[None] = xyz
+        xyz = self._xyz_cache[None]
+        if dtype is None or xyz.dtype == dtype:
+            return xyz
+        if dtype not in self._xyz_cache:
+            converted = xyz.astype(dtype)
+            converted.flags.writeable = False
+            self._xyz_cache[dtype] = converted
+        return self._xyz_cache[dtype]
+
+    def _clear_caches(self):
+        """Drop the cached coordinates and spatial index after the data changed."""
+        self._xyz_cache.clear()
+        self._spatial_index = None
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """KDTree of the points with radius, k nearest neighbour and box queries, shared
+        by all neighbour based methods like the radiusoutlier filter, the nearest
+        neighbour diff and :meth:`pointcloudset.pointcloud.PointCloud.get_cluster`.
+
+        It is built on the first neighbour query and dropped together with the cached
+        coordinates, see :meth:`get_xyz`. Filters pass the coordinates of the kept points
+        on to the index of the filtered pointcloud.
+        """
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(self.get_xyz(np.float64))
+        return self._spatial_index
+
     @property
     def xyz(self) -> np.ndarray:
-        return self.data[["x", "y", "z"]].to_numpy()
+        """The x, y and z coordinates as a read-only array, see :meth:`get_xyz`."""
+        return self.get_xyz()
 
     @property
     def centroid(self) -> np.ndarray:
-        return self.xyz.mean(axis=0)
-
-    @data.setter
-    def data(self, df: pd.DataFrame):
-        if not isinstance(df, pd.DataFrame):
-            raise TypeError("Data argument must be a DataFrame")
-        elif not {"x", "y", "z"}.issubset(df.columns):
-            raise ValueError("Data must have x, y and z coordinates")
-        self._update_data(df)
-        self._check_index()
+        xyz = self.get_xyz()
+        # the mean of each column view uses pairwise summation like the DataFrame, the
+        # mean over the rows of the buffer does not
+        return np.array([xyz[:, axis].mean() for axis in range(3)])
 
     @property
     def bounding_box(self) -> pd.DataFrame:
         """The axis aligned boundary box as a :class:`pandas.DataFrame`."""
-        return self.data[["x", "y", "z"]].agg(["min", "max"])
+        xyz = self.get_xyz()
+        if len(xyz) == 0:
+            return pd.DataFrame(np.full((2, 3), np.nan), index=["min", "max"], columns=["x", "y", "z"])
+        with warnings.catch_warnings():
+            # like pandas, the minimum of a column with only NaN is NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            bounds = np.stack([np.nanmin(xyz, axis=0), np.nanmax(xyz, axis=0)])
+        return pd.DataFrame(bounds, index=["min", "max"], columns=["x", "y", "z"])
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_xyz_cache"] = {}
+        state["_spatial_index"] = None
+        return state
+
+    def __setstate__(self, state: dict):
+        # pointclouds pickled by older versions only have the DataFrame
+        state.setdefault("_columns", None)
+        state.setdefault("_xyz_cache", {})
+        state.setdefault("_spatial_index", None)
+        self.__dict__.update(state)
+        self.points = _PointCloudView(self)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.data}, {self.timestamp}, {self.orig_file})"
@@ -113,7 +283,9 @@ class PointCloudCore:
         return f"pointcloud: with {len(self)} points, data:{list(self.data.columns)}, from {self.timestamp_str}"
 
     def __len__(self) -> int:
-        return len(self.data)
+        if self._columns is not None:
+            return len(self._columns["x"])
+        return len(self.__data)
 
     def __getitem__(self, id: int | slice) -> pd.DataFrame:
         if isinstance(id, slice):
@@ -126,11 +298,12 @@ class PointCloudCore:
     def _update_data(self, df: pd.DataFrame):
         """Utility function. Implicitly called when self.data is assigned."""
         self.__data = df
-        self.points = _PointCloudView(self.__data)
+        self._columns = None
+        self._clear_caches()
 
     def _check_index(self):
         """A private function to check if the index of self.data is sane."""
-        if len(self) > 0:
+        if self._columns is None and len(self) > 0:
             assert self.data.index[0] == 0, "index should start with 0"
             assert self.data.index[-1] + 1 == len(self), "index should be as long as the data"
             assert self.data.index.is_monotonic_increasing, "index should be monotonic increasing"
@@ -140,9 +313,20 @@ class PointCloudCore:
 
         Args:
             column_name (str): name of the new column.
-            values (numpy.ndarray): Values of the new column.
+            values (numpy.ndarray): Values of the new column. Like for a DataFrame, a
+                :class:`pandas.Series` is aligned by its index.
         """
-        self.data[column_name] = values
+        is_array = isinstance(values, np.ndarray) and values.ndim == 1 and values.dtype.kind != "O"
+        is_scalar = np.isscalar(values) and not isinstance(values, str)
+        if self._columns is not None and (is_array or is_scalar):
+            self._columns[column_name] = np.broadcast_to(np.asarray(values), (len(self),)).copy()
+        elif self._columns is not None:
+            # everything else is added to the DataFrame built from the arrays
+            self.data[column_name] = values
+        else:
+            self.__data[column_name] = values
+        if column_name in ("x", "y", "z"):
+            self._clear_caches()
         return self
 
     def _has_data(self) -> bool:
@@ -152,7 +336,7 @@ class PointCloudCore:
         Returns:
             bool: ``True`` if the pointcloudset pointcloud contains data.
         """
-        return not self.data.empty
+        return len(self) > 0
 
     @property
     def has_original_id(self) -> bool:
@@ -163,7 +347,7 @@ class PointCloudCore:
             bool: ``True`` if the PointCloud contains original_id data, ``False`` if PointCloud
             does not contain original_id data.
         """
-        return "original_id" in self.data.columns
+        return "original_id" in self.columns
 
     def _contains_original_id_number(self, original_id: int) -> bool:
         """Check if pointcloudset pointcloud contains a specific original_id.
@@ -174,7 +358,7 @@ class PointCloudCore:
         Returns:
             bool: ``True`` if the original_id exists.
         """
-        return original_id in self.data["original_id"].values
+        return original_id in self.column_values("original_id")
 
     def describe(self) -> pd.DataFrame:
         """Generate descriptive statistics based on PointCloud.data.describe() and therefore on
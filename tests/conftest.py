@@ -312,3 +312,35 @@ def testpointcloud_300k(testpointcloud_300k_df: pd.DataFrame) -> PointCloud:
         timestamp=datetime.datetime(2020, 1, 1),
         orig_file="/synthetic/testpointcloud_300k",
     )
+
+
+@pytest.fixture(scope="session")
+def testdataset_small_frames() -> Dataset:
+    """Synthetic Dataset with many small pointclouds where dask task overhead dominates."""
+    rng = np.random.default_rng(20261019)
+    start = datetime.datetime(2020, 1, 1)
+    pointclouds = [
+        PointCloud(
+            data=pd.DataFrame(rng.uniform(-1.0, 1.0, size=(20, 4)), columns=["x", "y", "z", "intensity"]),
+            timestamp=start + datetime.timedelta(milliseconds=100 * i),
+        )
+        for i in range(2000)
+    ]
+    return Dataset.from_instance("pointclouds", pointclouds)
+
+
+@pytest.fixture(scope="session")
+def testdataset_original_id() -> Dataset:
+    """Synthetic Dataset of a sensor with 64 beams, each frame with a random subset of
+    the original_ids, some repeated, some NaN values and an empty frame."""
+    rng = np.random.default_rng(20261020)
+    start = datetime.datetime(2020, 1, 1)
+    pointclouds = []
+    for i in range(30):
+        n_points = int(rng.integers(20, 60))
+        data = pd.DataFrame(rng.normal(size=(n_points, 4)), columns=["x", "y", "z", "intensity"])
+        data.loc[rng.random(n_points) < 0.1, "intensity"] = np.nan
+        data["original_id"] = rng.integers(0, 64, n_points).astype("uint32")
+        pointclouds.append(PointCloud(data=data, timestamp=start + datetime.timedelta(milliseconds=100 * i)))
+    pointclouds[5] = PointCloud(columns=pointclouds[0].data.columns, timestamp=pointclouds[5].timestamp)
+    return Dataset.from_instance("pointclouds", pointclouds)
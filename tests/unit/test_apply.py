@@ -1,6 +1,8 @@
 import datetime
 from datetime import UTC
 
+import pandas as pd
+import pytest
 import pytest_check as check
 
 from pointcloudset import Dataset, PointCloud
@@ -82,3 +84,43 @@ def test_apply_empty_frame_res(testdataset_with_empty_frame: Dataset):
     check.is_false(second_frame._has_data())
     check.equal(len(second_frame), 0)
     check.equal(list(first_frame.data.columns), list(second_frame.data.columns))
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 3, "auto"])
+def test_apply_batch_size(testdataset_vz6000: Dataset, batch_size):
+    def pipeline1(pointcloud: PointCloud):
+        return pointcloud.data.x.max()
+
+    testset_result = testdataset_vz6000.apply(func=pipeline1, batch_size=batch_size)
+    check.equal(type(testset_result), DelayedResult)
+    check.equal(len(testset_result), len(testdataset_vz6000))
+    check.equal(testset_result.compute(), testdataset_vz6000.apply(func=pipeline1).compute())
+    check.equal(testset_result[1], testdataset_vz6000[1].data.x.max())
+
+
+def test_apply_batch_size_dataset(testdataset_small_frames: Dataset):
+    def pipeline1(pointcloud: PointCloud) -> PointCloud:
+        return pointcloud.limit("x", 0, 1)
+
+    testset_result = testdataset_small_frames.apply(func=pipeline1, batch_size=64)
+    check.equal(type(testset_result), Dataset)
+    check.equal(len(testset_result), len(testdataset_small_frames))
+    check.equal(testset_result.timestamps, testdataset_small_frames.timestamps)
+    pd.testing.assert_frame_equal(testset_result[100].data, pipeline1(testdataset_small_frames[100]).data)
+
+
+def test_apply_batch_size_wrong(testdataset_vz6000: Dataset):
+    with pytest.raises(ValueError, match="batch_size"):
+        testdataset_vz6000.apply(len, warn=False, batch_size=0)
+
+
+@pytest.mark.slow
+def test_apply_batch_size_overhead(testdataset_small_frames: Dataset):
+    """Benchmark: per pointcloud tasks against batched tasks on many small frames."""
+
+    def npoints(pointcloud: PointCloud) -> int:
+        return len(pointcloud)
+
+    for batch_size in [None, 1, 8, 64, "auto"]:
+        res = testdataset_small_frames.apply(npoints, batch_size=batch_size).compute()
+        check.equal(sum(res), 20 * len(testdataset_small_frames))
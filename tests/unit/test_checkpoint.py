@@ -0,0 +1,141 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from pointcloudset import Dataset, PointCloud
+from pointcloudset.pipeline.checkpoint import CheckpointCache, function_fingerprint
+
+CALLS = {"crop": 0}
+
+
+def crop(pointcloud: PointCloud, limit: float = 0.5) -> PointCloud:
+    CALLS["crop"] += 1
+    return pointcloud.limit("x", 0.0, limit)
+
+
+def crop_y(pointcloud: PointCloud, limit: float = 0.5) -> PointCloud:
+    return pointcloud.limit("y", 0.0, limit)
+
+
+def n_points(pointcloud: PointCloud) -> int:
+    return len(pointcloud)
+
+
+@pytest.fixture
+def dataset(testdataset_small_frames: Dataset) -> Dataset:
+    return testdataset_small_frames[0:20]
+
+
+def test_fingerprint(dataset: Dataset):
+    check.equal(dataset.apply(crop).fingerprint, dataset.apply(crop).fingerprint)
+    check.not_equal(dataset.apply(crop).fingerprint, dataset.apply(crop, limit=0.2).fingerprint)
+    check.not_equal(dataset.apply(crop).fingerprint, dataset.apply(crop_y).fingerprint)
+    check.not_equal(dataset.apply(crop).fingerprint, dataset.fingerprint)
+    check.equal(dataset[2:5].fingerprint, dataset[2:5].fingerprint)
+    check.not_equal(dataset[2:5].fingerprint, dataset[2:6].fingerprint)
+    check.equal(dataset.with_execution("synchronous").fingerprint, dataset.fingerprint)
+
+
+def test_function_fingerprint_closure():
+    def make(limit):
+        def crop_closure(pointcloud: PointCloud) -> PointCloud:
+            return pointcloud.limit("x", 0.0, limit)
+
+        return crop_closure
+
+    check.equal(function_fingerprint(make(1.0), {}), function_fingerprint(make(1.0), {}))
+    check.not_equal(function_fingerprint(make(1.0), {}), function_fingerprint(make(2.0), {}))
+
+
+def test_fingerprint_from_file(dataset: Dataset, tmp_path: Path):
+    dataset.to_file(tmp_path.joinpath("dataset"), use_orig_filename=False)
+    read1 = Dataset.from_file(tmp_path.joinpath("dataset"))
+    read2 = Dataset.from_file(tmp_path.joinpath("dataset"))
+    check.equal(read1.fingerprint, read2.fingerprint)
+    check.equal(read1.apply(crop).fingerprint, read2.apply(crop).fingerprint)
+
+
+def test_fingerprint_from_instance(dataset: Dataset, tmp_path: Path):
+    pointclouds = [dataset[i] for i in range(3)]
+    instance1 = Dataset.from_instance("pointclouds", pointclouds)
+    instance2 = Dataset.from_instance("pointclouds", pointclouds)
+    check.equal(instance1.fingerprint, instance2.fingerprint)
+    check.not_equal(instance1.fingerprint, Dataset.from_instance("pointclouds", pointclouds[:2]).fingerprint)
+    instance1.apply(crop).persist_to(tmp_path)
+    CALLS["crop"] = 0
+    instance2.apply(crop).persist_to(tmp_path)
+    check.equal(CALLS["crop"], 0)
+    check.equal(len(CheckpointCache(tmp_path).entries()), 1)
+
+
+def test_persist_to_incomplete(dataset: Dataset, tmp_path: Path):
+    expected = dataset.apply(crop).apply(n_points, warn=False).compute()
+    incomplete = CheckpointCache(tmp_path).path(dataset.apply(crop).fingerprint)
+    incomplete.mkdir(parents=True)
+    incomplete.joinpath("junk").write_bytes(b"")
+    persisted = dataset.apply(crop).persist_to(tmp_path)
+    check.equal(persisted.apply(n_points, warn=False).compute(), expected)
+    check.is_false(incomplete.joinpath("junk").exists())
+    check.equal(len(CheckpointCache(tmp_path).entries()), 1)
+
+
+def test_persist_to(dataset: Dataset, tmp_path: Path):
+    expected = dataset.apply(crop).apply(n_points, warn=False).compute()
+    CALLS["crop"] = 0
+    persisted = dataset.apply(crop).persist_to(tmp_path)
+    check.greater_equal(CALLS["crop"], len(dataset))
+    check.is_instance(persisted, Dataset)
+    check.equal(persisted.fingerprint, dataset.apply(crop).fingerprint)
+    check.equal(persisted.apply(n_points, warn=False).compute(), expected)
+    check.equal(persisted.timestamps, dataset.timestamps)
+    CALLS["crop"] = 0
+    loaded = dataset.apply(crop).persist_to(tmp_path)
+    check.equal(CALLS["crop"], 0)
+    check.equal(loaded.apply(n_points, warn=False).compute(), expected)
+    pd.testing.assert_frame_equal(loaded[3].data, persisted[3].data)
+    check.equal(len(CheckpointCache(tmp_path).entries()), 1)
+
+
+def test_apply_checkpoint(dataset: Dataset, tmp_path: Path):
+    res1 = dataset.apply(crop, checkpoint=tmp_path)
+    res2 = dataset.apply(crop, checkpoint=tmp_path).apply(crop_y)
+    check.equal(res2.fingerprint, dataset.apply(crop).apply(crop_y).fingerprint)
+    check.equal(
+        res2.apply(n_points, warn=False).compute(),
+        res1.apply(crop_y).apply(n_points, warn=False).compute(),
+    )
+    check.equal(len(CheckpointCache(tmp_path).entries()), 1)
+
+
+def test_apply_checkpoint_wrong(dataset: Dataset, tmp_path: Path):
+    with pytest.raises(ValueError, match="checkpoint"):
+        dataset.apply(n_points, warn=False, checkpoint=tmp_path)
+
+
+def test_checkpoint_eviction(dataset: Dataset, tmp_path: Path):
+    dataset.apply(crop).persist_to(tmp_path)
+    dataset.apply(crop_y).persist_to(tmp_path)
+    cache = CheckpointCache(tmp_path)
+    first, second = (entry[0] for entry in cache.entries())
+    os.utime(cache.path(second).joinpath("meta.json"), (0, 0))
+    check.equal([entry[0] for entry in cache.entries()], [second, first])
+    dataset.apply(crop, limit=0.2).persist_to(tmp_path, max_entries=2)
+    remaining = [entry[0] for entry in cache.entries()]
+    check.equal(len(remaining), 2)
+    check.is_not_in(second, remaining)
+    dataset.apply(crop, limit=0.3).persist_to(tmp_path, max_size_gb=1e-12)
+    check.equal([entry[0] for entry in cache.entries()], [dataset.apply(crop, limit=0.3).fingerprint])
+    cache.clear()
+    check.equal(cache.entries(), [])
+
+
+def test_checkpoint_cache_wrong(tmp_path: Path):
+    with pytest.raises(ValueError, match="max_size_gb"):
+        CheckpointCache(tmp_path, max_size_gb=0)
+    with pytest.raises(ValueError, match="max_entries"):
+        CheckpointCache(tmp_path, max_entries=0)
+    with pytest.raises(TypeError):
+        CheckpointCache("cache")
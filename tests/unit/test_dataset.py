@@ -9,6 +9,9 @@ from dask.delayed import DelayedLeaf
 from pandas.testing import assert_series_equal
 
 from pointcloudset import Dataset, PointCloud
+from pointcloudset.config import DATASET_AGG_PERCENTILE_BINS
+from pointcloudset.pipeline import aggregate
+from pointcloudset.pipeline.aggregate import Unsupported, aggregate_by_key
 
 
 @pytest.mark.parametrize("test_sets", ["testset", "testdataset_vz6000"], indirect=True)
@@ -69,6 +72,62 @@ def test_getitem_strange(testset):
     check.equal(len(testset[2:0]), 0)
 
 
+def test_getitem_fancy(testdataset_small_frames: Dataset):
+    res = testdataset_small_frames[[0, 5, 7, -1]]
+    check.is_instance(res, Dataset)
+    check.equal(res.timestamps, [testdataset_small_frames.timestamps[i] for i in [0, 5, 7, 1999]])
+    check.is_true(res.data[3] is testdataset_small_frames.data[1999])
+    pd.testing.assert_frame_equal(res[1].data, testdataset_small_frames[5].data)
+    check.equal(len(testdataset_small_frames[np.arange(10, 20)]), 10)
+    check.equal(type(testdataset_small_frames[np.int64(3)]), PointCloud)
+    check.equal(len(testdataset_small_frames[[]]), 0)
+    check.not_equal(res.fingerprint, testdataset_small_frames[[0, 5, 7]].fingerprint)
+
+
+def test_getitem_mask(testdataset_small_frames: Dataset):
+    mask = np.arange(len(testdataset_small_frames)) % 3 == 0
+    res = testdataset_small_frames[mask]
+    check.equal(len(res), mask.sum())
+    check.equal(res.timestamps, list(np.array(testdataset_small_frames.timestamps)[mask]))
+
+
+def test_getitem_fancy_error(testdataset_small_frames: Dataset):
+    with pytest.raises(IndexError, match="out of range"):
+        testdataset_small_frames[[0, 2000]]
+    with pytest.raises(IndexError, match="mask"):
+        testdataset_small_frames[[True, False]]
+    with pytest.raises(ValueError, match="monotonic"):
+        testdataset_small_frames[[5, 1]]
+    with pytest.raises(TypeError):
+        testdataset_small_frames[[0.5, 1.5]]
+
+
+def test_decimate(testdataset_small_frames: Dataset):
+    res = testdataset_small_frames.decimate(10, offset=3)
+    check.equal(len(res), 200)
+    check.equal(res.timestamps, testdataset_small_frames.timestamps[3::10])
+    check.is_true(res.data[0] is testdataset_small_frames.data[3])
+    with pytest.raises(ValueError, match="every"):
+        testdataset_small_frames.decimate(0)
+
+
+def test_resample(testdataset_small_frames: Dataset):
+    start = testdataset_small_frames.start_time
+    res = testdataset_small_frames.resample("1s")
+    check.equal(len(res), 200)
+    check.equal(res.timestamps, testdataset_small_frames.timestamps[::10])
+    res = testdataset_small_frames.resample(datetime.timedelta(milliseconds=250), how="last")
+    check.equal(
+        res.timestamps[:2], [start + datetime.timedelta(milliseconds=200), start + datetime.timedelta(milliseconds=400)]
+    )
+    gaps = testdataset_small_frames[[0, 1, 50, 51]].resample("1s")
+    check.equal(gaps.timestamps, [start, start + datetime.timedelta(seconds=5)])
+    with pytest.raises(ValueError, match="period"):
+        testdataset_small_frames.resample("0s")
+    with pytest.raises(ValueError, match="how"):
+        testdataset_small_frames.resample("1s", how="mean")
+
+
 @pytest.mark.parametrize("test_sets", ["testset", "testdataset_vz6000"], indirect=True)
 def test_has_pointclouds(test_sets: Dataset):
     check.equal(test_sets.has_pointclouds(), True)
@@ -533,3 +592,152 @@ def test_dataset_agg_long_pointcloud(testset: Dataset):
     check.is_instance(res, list)
     check.is_instance(res[0], pd.DataFrame)
     check.equal(2, len(res))
+
+
+AGGS_BY_KEY = ["min", "max", "mean", "std", "var", "count", "sum", ["min", "max", "mean", "std"], {"x": ["min", "max"]}]
+
+
+def _groupby_reference(dataset: Dataset, agg) -> pd.DataFrame:
+    """Result of DatasetCore._agg computed with pandas on all points at once."""
+    all_points = pd.concat([pointcloud.data for pointcloud in dataset if len(pointcloud) > 0])
+    if dataset.has_original_id:
+        res = all_points.groupby("original_id").agg(agg)
+        res["N"] = all_points.groupby("original_id").size()
+        res["original_id"] = res.index
+        return res.reset_index(drop=True)
+    all_points["dummy"] = all_points.index
+    return all_points.groupby("dummy").agg(agg)
+
+
+@pytest.mark.parametrize("agg", AGGS_BY_KEY)
+@pytest.mark.parametrize("dataset_name", ["testdataset_small_frames", "testdataset_original_id"])
+def test_agg_by_key(dataset_name: str, agg, request):
+    dataset = request.getfixturevalue(dataset_name)[0:30]
+    res = dataset._agg_by_key(agg)
+    pd.testing.assert_frame_equal(res, _groupby_reference(dataset, agg), check_exact=False, rtol=1e-9)
+
+
+def test_agg_by_key_same_as_dask(testdataset_small_frames: Dataset):
+    dataset = testdataset_small_frames[0:30]
+    agg = ["min", "max", "mean", "std"]
+    pd.testing.assert_frame_equal(
+        dataset._agg_by_key(agg), dataset._agg(agg).compute().sort_index(), check_exact=False, rtol=1e-9
+    )
+
+
+def test_agg_by_key_fallback(testdataset_small_frames: Dataset):
+    dataset = testdataset_small_frames[0:10]
+    res = dataset._agg_by_key("median")
+    pd.testing.assert_frame_equal(res, dataset._agg("median").compute())
+
+
+def test_agg_by_key_memory_limit(testdataset_small_frames: Dataset, monkeypatch):
+    dataset = testdataset_small_frames[0:10]
+    agg = ["min", "max", "mean", "std"]
+    expected = dataset._agg_by_key(agg)
+    # the dense state of the points of one frame does not fit a target of 100 bytes
+    monkeypatch.setattr(aggregate, "DATASET_BATCH_TARGET_MB", 100 / 1024**2)
+    with pytest.raises(Unsupported, match="keys out of range"):
+        aggregate_by_key(dataset, agg)
+    pd.testing.assert_frame_equal(dataset._agg_by_key(agg), expected, check_exact=False, rtol=1e-9)
+
+
+def test_agg_dataset_by_key(testdataset_original_id: Dataset):
+    res = testdataset_original_id.agg(["min", "max"], "dataset")
+    all_points = pd.concat([pointcloud.data for pointcloud in testdataset_original_id])
+    check.equal(res.x["min"]["min"], all_points.x.min())
+    check.equal(res.intensity["max"]["max"], all_points.intensity.max())
+    check.equal(
+        list(res.columns.get_level_values(0)),
+        ["x", "x", "y", "y", "z", "z", "intensity", "intensity", "N", "original_id"],
+    )
+
+
+def test_agg_point_by_key(testdataset_original_id: Dataset):
+    agg = ["min", "max", "mean", "std"]
+    res = testdataset_original_id.agg(agg, "point")
+    pd.testing.assert_frame_equal(res, _groupby_reference(testdataset_original_id, agg), check_exact=False, rtol=1e-9)
+
+
+def test_agg_point_percentiles(testdataset_original_id: Dataset):
+    res = testdataset_original_id.agg("mean", "point", percentiles=[0, 50, 90, 100])
+    check.equal(
+        list(res.columns),
+        ["x mean", "y mean", "z mean", "intensity mean"]
+        + [f"{column} {stat}" for column in ["x", "y", "z", "intensity"] for stat in ["p0", "p50", "p90", "p100"]]
+        + ["N", "original_id"],
+    )
+    all_points = pd.concat([pointcloud.data for pointcloud in testdataset_original_id])
+    grouped = all_points.groupby("original_id")
+    bin_width = (grouped.max() - grouped.min()) / DATASET_AGG_PERCENTILE_BINS
+    for column in ["x", "y", "z"]:
+        np.testing.assert_allclose(res[f"{column} p0"], grouped[column].min(), rtol=1e-9)
+        np.testing.assert_allclose(res[f"{column} p100"], grouped[column].max(), rtol=1e-9)
+        for percentile in [50, 90]:
+            error = np.abs(res[f"{column} p{percentile}"].values - grouped[column].quantile(percentile / 100).values)
+            check.is_true(np.all(error <= bin_width[column].values + 1e-12))
+
+
+def test_agg_percentile_histograms_sparse():
+    frames = [pd.DataFrame({"x": [0.0, 1.0, 4.0, np.nan], "original_id": [0, 0, 5, 5]}) for _ in range(3)]
+    low = np.array([[0.0, 0.0, 0.0, 0.0, 0.0, 4.0]])
+    high = np.array([[1.0, 0.0, 0.0, 0.0, 0.0, 4.0]])
+    batches = [aggregate._batch_histogram(frames[:1], ["x"], True, low, high, 4)]
+    batches.append(aggregate._batch_histogram(frames[1:], ["x"], True, low, high, 4))
+    (codes, counts), *_ = aggregate._sum_histograms(batches)
+    np.testing.assert_array_equal(codes, [0, 3, 20])
+    histogram = aggregate._dense_histogram(codes, counts, 6, 4)
+    np.testing.assert_array_equal(histogram[[0, 5]], [[3, 0, 0, 3], [3, 0, 0, 0]])
+    check.equal(histogram.sum(), 9)
+
+
+def test_agg_point_percentiles_list(testdataset_original_id: Dataset):
+    res = testdataset_original_id.agg({"x": ["min", "max"]}, "point", percentiles=[50])
+    check.equal(list(res.columns), [("x", "min"), ("x", "max"), ("x", "p50"), ("N", ""), ("original_id", "")])
+    check.is_true(np.all(res.x["min"] <= res.x["p50"]))
+    check.is_true(np.all(res.x["p50"] <= res.x["max"]))
+
+
+def test_agg_point_percentiles_wrong(testdataset_original_id: Dataset, testdataset_small_frames: Dataset):
+    with pytest.raises(ValueError, match="depth"):
+        testdataset_original_id.agg("mean", "dataset", percentiles=[50])
+    with pytest.raises(ValueError, match="between"):
+        testdataset_original_id.agg("mean", "point", percentiles=[101])
+    with pytest.raises(ValueError, match="original_id"):
+        testdataset_small_frames[0:5].agg("mean", "point", percentiles=[50])
+
+
+@pytest.mark.slow
+def test_agg_point_benchmark():
+    """Benchmark: per beam statistics of 10k frames with 2048 points each."""
+    rng = np.random.default_rng(0)
+    n_points = 2048
+    frame = pd.DataFrame(rng.random((n_points, 4), dtype=np.float32), columns=["x", "y", "z", "intensity"])
+    frame["original_id"] = np.arange(n_points, dtype=np.uint32)
+    pointclouds = [
+        PointCloud(data=frame, timestamp=datetime.datetime(2020, 1, 1) + datetime.timedelta(seconds=i))
+        for i in range(10_000)
+    ]
+    dataset = Dataset.from_instance("pointclouds", pointclouds)
+    res = dataset.agg(["mean", "std"], "point", percentiles=[50, 90])
+    check.equal(len(res), n_points)
+    np.testing.assert_allclose(res.x["mean"], frame.x, rtol=1e-6)
+
+
+@pytest.mark.slow
+def test_agg_dataset_benchmark():
+    """Benchmark: single pass mergeable statistics against the dask groupby."""
+    rng = np.random.default_rng(0)
+    n_points = 100_000
+    pointclouds = [
+        PointCloud(
+            data=pd.DataFrame(rng.random((n_points, 4), dtype=np.float32), columns=["x", "y", "z", "intensity"]),
+            timestamp=datetime.datetime(2020, 1, 1) + datetime.timedelta(seconds=i),
+        )
+        for i in range(100)
+    ]
+    dataset = Dataset.from_instance("pointclouds", pointclouds)
+    agg = ["min", "max", "mean", "std"]
+    res = dataset._agg_by_key(agg)
+    should = dataset._agg(agg).compute()
+    pd.testing.assert_frame_equal(res, should.sort_index(), check_exact=False, rtol=1e-4)
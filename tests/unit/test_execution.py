@@ -0,0 +1,178 @@
+import datetime
+import os
+
+import pytest
+import pytest_check as check
+from dask import delayed
+from scipy.spatial import KDTree
+
+import pointcloudset.geometry.spatial_index
+from pointcloudset import Dataset, PointCloud
+from pointcloudset.pipeline.aggregate import _tree_reduce
+from pointcloudset.pipeline.delayed_result import DelayedResult
+from pointcloudset.pipeline.execution import Execution, kernel_workers, kernel_workers_context, set_kernel_workers
+
+
+def test_execution_default():
+    execution = Execution()
+    check.is_none(execution.scheduler)
+    check.equal(execution, Execution(None, None, None))
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"scheduler": "gpu"},
+        {"scheduler": "threads", "num_workers": 0},
+        {"scheduler": "threads", "memory_limit": "4GB"},
+    ],
+)
+def test_execution_wrong(kwargs):
+    with pytest.raises(ValueError):
+        Execution(**kwargs)
+
+
+def test_execution_single_task():
+    check.equal(Execution("processes", 4).for_single_task(), Execution("synchronous"))
+    check.equal(Execution("threads", 4).for_single_task(), Execution("threads", 4))
+
+
+def test_with_execution_is_kept(testdataset_vz6000: Dataset):
+    def pipeline1(pointcloud: PointCloud) -> PointCloud:
+        return pointcloud.limit("x", 0, 1)
+
+    execution = Execution("synchronous")
+    dataset = testdataset_vz6000.with_execution("synchronous")
+    check.equal(dataset.execution, execution)
+    check.equal(testdataset_vz6000.execution, Execution())
+    check.equal(dataset[0:1].execution, execution)
+    check.equal(dataset.apply(pipeline1).execution, execution)
+    res = dataset.apply(len, warn=False)
+    check.is_instance(res, DelayedResult)
+    check.equal(res.execution, execution)
+
+
+@pytest.mark.parametrize("scheduler", ["threads", "synchronous"])
+def test_with_execution_results(testdataset_vz6000: Dataset, scheduler):
+    def pipeline1(pointcloud: PointCloud):
+        return pointcloud.data.x.max()
+
+    dataset = testdataset_vz6000.with_execution(scheduler, num_workers=2)
+    check.equal(dataset.apply(pipeline1).compute(), testdataset_vz6000.apply(pipeline1).compute())
+    check.equal(dataset.max()["x max"], testdataset_vz6000.max()["x max"])
+
+
+@pytest.mark.slow
+def test_with_execution_processes(testdataset_vz6000: Dataset):
+    def pipeline1(pointcloud: PointCloud) -> PointCloud:
+        return pointcloud.limit("x", 0, 1)
+
+    def pipeline2(pointcloud: PointCloud):
+        return len(pointcloud)
+
+    dataset = testdataset_vz6000.with_execution("processes", num_workers=2)
+    res = dataset.apply(pipeline1).apply(pipeline2).compute()
+    check.equal(res, testdataset_vz6000.apply(pipeline1).apply(pipeline2).compute())
+
+
+def test_kernel_workers_default():
+    check.equal(kernel_workers(), -1)
+
+
+def test_set_kernel_workers():
+    set_kernel_workers(2)
+    try:
+        check.equal(kernel_workers(), 2)
+        with kernel_workers_context(1):
+            check.equal(kernel_workers(), 2)
+    finally:
+        set_kernel_workers(None)
+    check.equal(kernel_workers(), -1)
+
+
+def test_set_kernel_workers_wrong():
+    with pytest.raises(ValueError, match="workers"):
+        set_kernel_workers(0)
+
+
+def test_execution_kernel_workers():
+    cpu_count = os.cpu_count()
+    check.equal(Execution("synchronous").kernel_workers(), -1)
+    check.equal(Execution("threads").kernel_workers(), 1)
+    check.equal(Execution("processes", num_workers=1).kernel_workers(), cpu_count)
+    check.equal(Execution("threads", num_workers=cpu_count * 2).kernel_workers(), 1)
+
+
+@pytest.mark.parametrize("scheduler", ["threads", "synchronous"])
+def test_apply_kernel_workers(testdataset_vz6000: Dataset, scheduler):
+    def pipeline1(pointcloud: PointCloud) -> int:
+        return kernel_workers()
+
+    dataset = testdataset_vz6000.with_execution(scheduler)
+    res = dataset.apply(pipeline1).compute()
+    check.equal(res, [dataset.execution.kernel_workers()] * len(dataset))
+    check.equal(kernel_workers(), -1)
+
+
+@pytest.mark.parametrize("scheduler", ["threads", "synchronous"])
+def test_kernel_workers_outside_apply(testdataset_vz6000: Dataset, scheduler):
+    def step(state: list, pointcloud: PointCloud) -> tuple[list, int]:
+        return [*state, kernel_workers()], len(pointcloud)
+
+    def window_workers(pointclouds: list[PointCloud]) -> int:
+        return kernel_workers()
+
+    dataset = testdataset_vz6000.with_execution(scheduler)
+    expected = dataset.execution.kernel_workers()
+    state, _ = dataset.scan(step, [])
+    check.equal(set(state), {expected})
+    streamed = DelayedResult([delayed(kernel_workers)() for _ in range(3)], execution=dataset.execution)
+    check.equal(list(streamed.stream()), [expected] * 3)
+    check.equal(set(dataset.rolling(2).apply(window_workers).stream()), {expected})
+    res = _tree_reduce(
+        dataset, lambda frames: {kernel_workers()}, lambda results: set().union(*results), dataset[0].data
+    )
+    check.equal(res, {expected})
+    check.equal(kernel_workers(), -1)
+
+
+def test_radius_outlier_kernel_workers(testdataset_vz6000: Dataset, monkeypatch):
+    """KDTree queries inside threaded Dataset tasks must not use all cores each."""
+    used_workers = []
+
+    class RecordingKDTree(KDTree):
+        def query_ball_point(self, *args, **kwargs):
+            used_workers.append(kwargs["workers"])
+            return super().query_ball_point(*args, **kwargs)
+
+    monkeypatch.setattr(pointcloudset.geometry.spatial_index, "KDTree", RecordingKDTree)
+
+    def pipeline1(pointcloud: PointCloud) -> PointCloud:
+        return pointcloud.filter("radiusoutlier", nb_points=2, radius=1.0)
+
+    testdataset_vz6000.with_execution("threads").apply(pipeline1).apply(len, warn=False).compute()
+    check.equal(set(used_workers), {1})
+
+
+@pytest.mark.slow
+def test_kernel_workers_benchmark(testpointcloud_300k: PointCloud):
+    """Benchmark: dataset level radius outlier removal with automatic kernel threads
+    against all CPU cores in every task (nested oversubscription)."""
+    pointclouds = []
+    for i in range(8):
+        pointcloud = testpointcloud_300k.limit("x", 0.0, 20.0)
+        pointcloud.timestamp = datetime.datetime(2020, 1, 1, 0, 0, i)
+        pointclouds.append(pointcloud)
+    dataset = Dataset.from_instance("pointclouds", pointclouds).with_execution("threads")
+
+    def pipeline1(pointcloud: PointCloud) -> int:
+        return len(pointcloud.filter("radiusoutlier", nb_points=5, radius=0.5))
+
+    results = {}
+    for workers in [None, -1]:
+        set_kernel_workers(workers)
+        try:
+            results[workers] = dataset.apply(pipeline1).compute()
+        finally:
+            set_kernel_workers(None)
+    check.equal(results[None], results[-1])
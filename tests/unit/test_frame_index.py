@@ -0,0 +1,125 @@
+import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from pointcloudset import Dataset, PointCloud
+from pointcloudset.pipeline.frame_index import FrameIndex, parse_box, pointcloud_bounds
+
+CALLS = {"frames": 0}
+
+
+def count_frames(pointcloud: PointCloud) -> PointCloud:
+    CALLS["frames"] += 1
+    return pointcloud
+
+
+@pytest.fixture
+def moving_dataset() -> Dataset:
+    """Pointclouds of a sensor driving along x, one meter per pointcloud."""
+    rng = np.random.default_rng(0)
+    start = datetime.datetime(2020, 1, 1)
+    pointclouds = [
+        PointCloud(
+            data=pd.DataFrame(rng.uniform(-1.0, 1.0, size=(50, 3)) + [i, 0.0, 0.0], columns=["x", "y", "z"]),
+            timestamp=start + datetime.timedelta(seconds=i),
+        )
+        for i in range(30)
+    ]
+    pointclouds[12] = PointCloud(columns=["x", "y", "z"], timestamp=pointclouds[12].timestamp)
+    return Dataset.from_instance("pointclouds", pointclouds)
+
+
+def _brute_force(dataset: Dataset, lower, upper) -> list[int]:
+    res = []
+    for i, pointcloud in enumerate(dataset):
+        bounds = pointcloud_bounds(pointcloud)
+        if np.all(bounds[:3] <= upper) and np.all(bounds[3:] >= lower):
+            res.append(i)
+    return res
+
+
+def test_pointcloud_bounds(testpointcloud_mini: PointCloud):
+    bounds = pointcloud_bounds(testpointcloud_mini)
+    box = testpointcloud_mini.bounding_box
+    np.testing.assert_allclose(
+        bounds, np.concatenate([box.loc["min", ["x", "y", "z"]], box.loc["max", ["x", "y", "z"]]])
+    )
+    check.is_true(np.all(np.isnan(pointcloud_bounds(PointCloud(columns=["x", "y", "z"])))))
+
+
+@pytest.mark.parametrize(
+    "lower, upper",
+    [
+        ((10.0, -np.inf, -np.inf), (12.0, np.inf, np.inf)),
+        ((-5.0, 0.5, -0.5), (3.0, 2.0, 0.5)),
+        ((100.0, -1.0, -1.0), (101.0, 1.0, 1.0)),
+        ((-np.inf, -np.inf, -np.inf), (np.inf, np.inf, np.inf)),
+    ],
+)
+def test_frames_intersecting(moving_dataset: Dataset, lower, upper):
+    res = moving_dataset.frames_intersecting((lower, upper))
+    should = _brute_force(moving_dataset, np.array(lower), np.array(upper))
+    check.is_instance(res, Dataset)
+    check.equal(res.timestamps, [moving_dataset.timestamps[i] for i in should])
+    for pointcloud, i in zip(res, should, strict=True):
+        pd.testing.assert_frame_equal(pointcloud.data, moving_dataset[i].data)
+
+
+def test_frames_intersecting_bounding_box(moving_dataset: Dataset):
+    box = moving_dataset[5].bounding_box
+    res = moving_dataset.frames_intersecting(box)
+    check.is_in(moving_dataset.timestamps[5], res.timestamps)
+    check.equal(len(res), len(_brute_force(moving_dataset, box.loc["min"].to_numpy(), box.loc["max"].to_numpy())))
+    only_x = moving_dataset.frames_intersecting(pd.DataFrame({"x": [10.5, 10.6]}, index=["min", "max"]))
+    check.equal(len(only_x), 2)
+
+
+def test_frames_intersecting_loads_candidates(moving_dataset: Dataset):
+    counted = moving_dataset.apply(count_frames, batch_size=1)
+    CALLS["frames"] = 0
+    check.equal(len(counted.frame_index), len(moving_dataset))
+    check.greater_equal(CALLS["frames"], len(moving_dataset))
+    CALLS["frames"] = 0
+    res = counted.frames_intersecting(((20.0, -1.0, -1.0), (21.0, 1.0, 1.0)))
+    check.equal(CALLS["frames"], 0)
+    list(res)
+    check.equal(CALLS["frames"], len(res))
+    check.less(len(res), len(moving_dataset))
+
+
+def test_frame_bounds_slice(moving_dataset: Dataset):
+    index = moving_dataset.frame_index
+    check.is_instance(index, FrameIndex)
+    check.equal(len(index), len(moving_dataset))
+    part = moving_dataset[3:20:2]
+    np.testing.assert_array_equal(part.frame_bounds, moving_dataset.frame_bounds[3:20:2])
+    check.equal(list(index.to_frame().columns), ["min x", "min y", "min z", "max x", "max y", "max z"])
+    part.extend(moving_dataset[20:22])
+    check.equal(part.frame_bounds.shape, (len(part), 6))
+
+
+def test_frame_bounds_to_file(moving_dataset: Dataset, tmp_path: Path):
+    check.equal(len(moving_dataset.frame_index), len(moving_dataset))
+    moving_dataset.to_file(tmp_path.joinpath("moving"), use_orig_filename=False)
+    read = Dataset.from_file(tmp_path.joinpath("moving"))
+    check.is_not_in("frame_bounds", read.meta)
+    np.testing.assert_array_equal(read.frame_bounds, moving_dataset.frame_bounds)
+    res = read.frames_intersecting(((10.0, -np.inf, -np.inf), (12.0, np.inf, np.inf)))
+    check.equal(res.timestamps, moving_dataset.frames_intersecting(((10.0, -1, -1), (12.0, 1, 1))).timestamps)
+
+
+def test_parse_box_wrong():
+    with pytest.raises(ValueError, match="rows min and max"):
+        parse_box(pd.DataFrame({"a": [0.0, 1.0]}, index=["min", "max"]))
+    with pytest.raises(ValueError, match="two corners"):
+        parse_box(((0.0, 1.0), (1.0, 2.0)))
+    with pytest.raises(ValueError, match="two corners"):
+        parse_box(5.0)
+    with pytest.raises(ValueError, match="larger"):
+        parse_box(((1.0, 0.0, 0.0), (0.0, 1.0, 1.0)))
+    with pytest.raises(ValueError, match="shape"):
+        FrameIndex(np.zeros((3, 4)))
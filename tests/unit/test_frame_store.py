@@ -0,0 +1,91 @@
+import datetime
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from pointcloudset import Dataset, PointCloud
+from pointcloudset.pipeline.frame_store import FrameStore
+
+FRAME_MB = 50_000 * 4 * 8 / 1024**2
+
+
+def _frame(i: int) -> pd.DataFrame:
+    rng = np.random.default_rng(i)
+    data = pd.DataFrame(rng.normal(size=(50_000, 3)), columns=["x", "y", "z"])
+    data["intensity"] = rng.integers(0, 255, 50_000).astype(np.float32)
+    data["original_id"] = np.arange(50_000, dtype=np.uint32)
+    return data
+
+
+@pytest.fixture
+def pointclouds() -> list[PointCloud]:
+    start = datetime.datetime(2020, 1, 1)
+    return [PointCloud(data=_frame(i), timestamp=start + datetime.timedelta(seconds=i)) for i in range(10)]
+
+
+def test_frame_store_spill(tmp_path: Path):
+    store = FrameStore(memory_limit_mb=3 * FRAME_MB, scratch_dir=tmp_path)
+    frames = [store.put(_frame(i)) for i in range(8)]
+    stats = store.stats()
+    check.equal(stats["frames"], 8)
+    check.less_equal(stats["resident_bytes"], stats["memory_limit_bytes"])
+    check.greater(stats["resident_frames"], 0)
+    check.equal(stats["resident_frames"] + stats["spilled_frames"], 8)
+    check.greater(stats["spilled_bytes"], 0)
+    check.equal(len(list(store.folder.iterdir())), stats["spilled_frames"])
+    for i, frame in enumerate(frames):
+        pd.testing.assert_frame_equal(frame.load(), _frame(i))
+    check.less_equal(store.stats()["resident_bytes"], stats["memory_limit_bytes"])
+    check.equal(len(store), 8)
+
+
+def test_frame_store_no_memory(tmp_path: Path):
+    store = FrameStore(memory_limit_mb=0, scratch_dir=tmp_path)
+    frame = store.put(_frame(0))
+    check.equal(store.stats()["resident_bytes"], 0)
+    check.equal(store.stats()["spilled_frames"], 1)
+    pd.testing.assert_frame_equal(frame.load(), _frame(0))
+    pd.testing.assert_frame_equal(pickle.loads(pickle.dumps(frame)).load(), _frame(0))
+
+
+def test_frame_store_close(tmp_path: Path):
+    store = FrameStore(memory_limit_mb=0, scratch_dir=tmp_path)
+    frame = store.put(_frame(0))
+    folder = store.folder
+    store.close()
+    check.is_false(folder.exists())
+    with pytest.raises(ValueError, match="closed"):
+        frame.load()
+    with pytest.raises(ValueError, match="closed"):
+        store.put(_frame(0))
+
+
+def test_frame_store_wrong():
+    with pytest.raises(ValueError, match="memory_limit_mb"):
+        FrameStore(memory_limit_mb=-1)
+    with pytest.raises(TypeError, match="Path"):
+        FrameStore(scratch_dir="scratch")
+
+
+def test_dataset_frame_store(pointclouds: list[PointCloud], tmp_path: Path):
+    store = FrameStore(memory_limit_mb=2 * FRAME_MB, scratch_dir=tmp_path)
+    dataset = Dataset.from_instance("pointclouds", pointclouds, frame_store=store)
+    check.greater_equal(store.stats()["spilled_frames"], 8)
+    check.equal(dataset.fingerprint, Dataset.from_instance("pointclouds", pointclouds, frame_store=store).fingerprint)
+    for pointcloud, should in zip(dataset, pointclouds, strict=True):
+        pd.testing.assert_frame_equal(pointcloud.data, should.data)
+    means = dataset.apply(lambda pointcloud: pointcloud.data.x.mean(), warn=False).to_numpy()
+    np.testing.assert_allclose(means, [pointcloud.data.x.mean() for pointcloud in pointclouds])
+    check.less_equal(store.stats()["resident_bytes"], store.memory_limit)
+
+
+def test_dataset_frame_store_processes(pointclouds: list[PointCloud], tmp_path: Path):
+    store = FrameStore(memory_limit_mb=0, scratch_dir=tmp_path)
+    dataset = Dataset.from_instance("pointclouds", pointclouds[:3], frame_store=store).with_execution(
+        "processes", num_workers=2
+    )
+    np.testing.assert_array_equal(dataset.apply(len, warn=False).to_numpy(), [50_000] * 3)
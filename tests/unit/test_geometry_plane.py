@@ -62,3 +62,19 @@ def test_intersect_line_of_sight_error2():
                 ]
             ),
         )
+
+
+@pytest.mark.parametrize("normal_dist", [True, False])
+def test_distance_to_points(normal_dist):
+    xyz = np.array([[2.0, 2.0, 0.0], [0.0, 0.0, 0.0], [-3.0, 1.0, 4.0]])
+    plane_model = np.array([1.0, 0.5, 0.0, -1.0])
+    distances = plane.distance_to_points(xyz, plane_model, normal_dist=normal_dist)
+    expected = [plane.distance_to_point(point, plane_model, normal_dist=normal_dist) for point in xyz]
+    np.testing.assert_allclose(distances, expected)
+
+
+def test_distance_to_points_error():
+    with pytest.raises(ValueError):
+        plane.distance_to_points(np.zeros((2, 2)), np.array([1, 0, 0, 0]))
+    with pytest.raises(ValueError):
+        plane.distance_to_points(np.zeros((2, 3)), np.array([1, 0, 0]))
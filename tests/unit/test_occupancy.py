@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from pointcloudset import Dataset, PointCloud
+from pointcloudset.geometry.voxel import VoxelCounts, pack_keys, unpack_keys, voxel_indices
+from pointcloudset.pipeline.occupancy import VoxelGrid
+
+
+def _reference(dataset: Dataset, voxel_size: float) -> pd.DataFrame:
+    frames = []
+    for number, pointcloud in enumerate(dataset):
+        data = pointcloud.data.dropna(subset=["x", "y", "z"])
+        indices = np.floor(data[["x", "y", "z"]].to_numpy() / voxel_size).astype(np.int64)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "i": indices[:, 0],
+                    "j": indices[:, 1],
+                    "k": indices[:, 2],
+                    "intensity": data.intensity.to_numpy(),
+                    "pointcloud": number,
+                }
+            )
+        )
+    points = pd.concat(frames)
+    return points.groupby(["i", "j", "k"]).agg(
+        points=("pointcloud", "size"), pointclouds=("pointcloud", "nunique"), mean=("intensity", "mean")
+    )
+
+
+def test_pack_keys():
+    indices = np.array([[0, 0, 0], [-1, 5, 3], [1000, -1000, 7], [-(2**20), 2**20 - 1, 0]])
+    keys = pack_keys(indices)
+    np.testing.assert_array_equal(unpack_keys(keys), indices)
+    check.equal(list(np.argsort(keys)), list(np.lexsort(indices.T[::-1])))
+    np.testing.assert_array_equal(voxel_indices(np.array([[0.5, -0.1, 1.0]]), 0.5), [[1, -1, 2]])
+    with pytest.raises(ValueError, match="voxel_size"):
+        pack_keys(np.array([[2**20, 0, 0]]))
+
+
+def test_voxel_occupancy(testdataset_original_id: Dataset):
+    grid = testdataset_original_id.voxel_occupancy(0.5, value_column="intensity")
+    check.is_instance(grid, VoxelGrid)
+    should = _reference(testdataset_original_id, 0.5)
+    res = grid.to_frame().set_index(["i", "j", "k"])
+    check.equal(len(grid), len(should))
+    np.testing.assert_array_equal(res.points, should.points)
+    np.testing.assert_array_equal(res.pointclouds, should.pointclouds)
+    np.testing.assert_allclose(res["intensity mean"], should["mean"])
+    np.testing.assert_allclose(res[["x", "y", "z"]].to_numpy(), (np.array(should.index.tolist()) + 0.5) * 0.5)
+
+
+def test_voxel_occupancy_bounds(testdataset_original_id: Dataset):
+    grid = testdataset_original_id.voxel_occupancy(0.25, bounds=((0.0, 0.0, -np.inf), (1.0, 1.0, np.inf)))
+    centers = grid.centers
+    check.is_true(np.all((centers[:, :2] > 0.0) & (centers[:, :2] < 1.0)))
+    check.is_none(grid.mean)
+    points = sum(
+        int(((pointcloud.data.x.between(0, 1)) & (pointcloud.data.y.between(0, 1))).sum())
+        for pointcloud in testdataset_original_id
+    )
+    check.equal(grid.points.sum(), points)
+
+
+def test_voxel_occupancy_query(testdataset_original_id: Dataset, tmp_path: Path):
+    grid = testdataset_original_id.voxel_occupancy(1.0, value_column="intensity")
+    frame = grid.to_frame()
+    res = grid.query(np.vstack([frame[["x", "y", "z"]].to_numpy()[:3], [[500.0, 500.0, 500.0]]]))
+    np.testing.assert_array_equal(res.points, [*frame.points[:3], 0])
+    np.testing.assert_array_equal(res.pointclouds, [*frame.pointclouds[:3], 0])
+    check.is_true(np.isnan(res["intensity mean"].iloc[3]))
+    res = grid.query([[1e9, 0.0, 0.0], [np.nan, 0.0, 0.0], [np.inf, 0.0, 0.0], frame[["x", "y", "z"]].to_numpy()[0]])
+    np.testing.assert_array_equal(res.points, [0, 0, 0, frame.points[0]])
+    check.equal(int(res["intensity mean"].isna().sum()), 3)
+    pointcloud = grid.to_pointcloud()
+    check.is_instance(pointcloud, PointCloud)
+    check.equal(len(pointcloud), len(grid))
+    pointcloud.to_file(tmp_path.joinpath("occupancy.csv"))
+    check.is_true(tmp_path.joinpath("occupancy.csv").exists())
+
+
+def test_voxel_counts_infinite():
+    xyz = np.array([[0.5, 0.5, 0.5], [np.inf, 0.0, 0.0], [0.0, -np.inf, 0.0], [np.nan, 0.0, 0.0], [0.2, 0.1, 0.3]])
+    counts = VoxelCounts.from_points(xyz, 1.0, values=np.array([1.0, 2.0, 3.0, 4.0, np.inf]))
+    np.testing.assert_array_equal(counts.keys, pack_keys(np.zeros((1, 3), dtype=np.int64)))
+    np.testing.assert_array_equal(counts.points, [2])
+    np.testing.assert_array_equal(counts.value_sum, [1.0])
+    np.testing.assert_array_equal(counts.value_count, [1])
+
+
+def test_voxel_occupancy_wrong(testdataset_original_id: Dataset):
+    with pytest.raises(ValueError, match="voxel_size"):
+        testdataset_original_id.voxel_occupancy(0.0)
+    with pytest.raises(ValueError, match="does not exist"):
+        testdataset_original_id.voxel_occupancy(1.0, value_column="range")
+    with pytest.raises(ValueError, match="voxel_size"):
+        testdataset_original_id.voxel_occupancy(1e-9)
@@ -1,9 +1,15 @@
+import threading
+import time
 from typing import Any
 
+import numpy as np
+import pandas as pd
 import pytest
 import pytest_check as check
+from dask import delayed
 
 import pointcloudset as pcs
+from pointcloudset.pipeline.batch import auto_batch_size, batch_slices
 from pointcloudset.pipeline.delayed_result import DelayedResult
 
 
@@ -36,3 +42,136 @@ def test_delayed_result_slice(res):
     res02 = res[0:2]
     check.is_instance(res02, list)
     check.equal(res02[0]["x"], 0.9805122017860413)
+
+
+@pytest.fixture
+def res_batched(testdataset_mini_real):
+    return testdataset_mini_real.apply(first, warn=False, batch_size=2)
+
+
+def test_delayed_result_batched(res_batched):
+    check.equal(len(res_batched), 2)
+    check.equal(res_batched.compute()[0]["x"], 0.9805122017860413)
+    check.equal(res_batched[0]["x"], 0.9805122017860413)
+    check.is_instance(res_batched[0:2], list)
+
+
+@pytest.mark.parametrize("batch_size", [None, 7])
+def test_delayed_result_stream(testdataset_small_frames, batch_size):
+    res = testdataset_small_frames.apply(len, warn=False, batch_size=batch_size)
+    expected = res.compute()
+    check.equal(list(res.stream()), expected)
+    check.equal(list(res.stream(max_in_flight=1)), expected)
+    check.equal(sorted(res.as_completed(max_in_flight=3)), list(enumerate(expected)))
+
+
+def test_batched_frames_computed_once(testdataset_small_frames):
+    """Results taken from a batch are computed together, not the batch once per result."""
+    lock = threading.Lock()
+    calls = {"frames": 0}
+
+    def counted(pointcloud: pcs.PointCloud) -> pcs.PointCloud:
+        with lock:
+            calls["frames"] += 1
+        return pointcloud
+
+    dataset = testdataset_small_frames[0:32].apply(counted, batch_size=16)
+    runs = {
+        "rolling": lambda: list(dataset.rolling(2)),
+        "scan": lambda: dataset.scan(lambda state, pointcloud: (state, len(pointcloud)), None),
+        "stream": lambda: list(DelayedResult(dataset.data, execution=dataset.execution).stream(max_in_flight=1)),
+        "as_completed": lambda: list(DelayedResult(dataset.data, execution=dataset.execution).as_completed()),
+        "apply stream": lambda: list(dataset.apply(len, warn=False).stream()),
+        "apply compute": lambda: dataset.apply(counted).apply(len, warn=False).compute(),
+    }
+    for name, run in runs.items():
+        calls["frames"] = 0
+        run()
+        check.equal(calls["frames"], 32 if name != "apply compute" else 64, name)
+
+
+def test_delayed_result_batched_changed(testdataset_small_frames):
+    res = testdataset_small_frames[0:8].apply(len, warn=False, batch_size=4)
+    check.equal(res.compute(), [20] * 8)
+    res[0] = delayed(-1)
+    check.equal(res.compute(), [-1] + [20] * 7)
+    res.append(delayed(5))
+    check.equal(res.compute(), [-1] + [20] * 7 + [5])
+    check.equal(list(res.stream()), [-1] + [20] * 7 + [5])
+
+
+def test_delayed_result_stream_wrong(testdataset_small_frames):
+    with pytest.raises(ValueError, match="max_in_flight"):
+        list(testdataset_small_frames.apply(len, warn=False).stream(max_in_flight=0))
+
+
+def test_delayed_result_stream_in_flight(testdataset_small_frames):
+    lock = threading.Lock()
+    state = {"running": 0, "max_running": 0, "started": 0}
+
+    def slow_len(pointcloud: pcs.PointCloud) -> int:
+        with lock:
+            state["started"] += 1
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+        time.sleep(0.01)
+        with lock:
+            state["running"] -= 1
+        return len(pointcloud)
+
+    dataset = testdataset_small_frames[0:50].with_execution("threads", num_workers=8)
+    stream = dataset.apply(slow_len, warn=False).stream(max_in_flight=3)
+    check.equal(next(stream), 20)
+    check.less_equal(state["started"], 4)
+    stream.close()
+    check.equal(sum(1 for _ in dataset.apply(slow_len, warn=False).stream(max_in_flight=3)), 50)
+    check.less_equal(state["max_running"], 3)
+
+
+def test_delayed_result_to_numpy(testdataset_small_frames):
+    res = testdataset_small_frames.apply(len, warn=False, batch_size="auto")
+    array = res.to_numpy()
+    check.is_instance(array, np.ndarray)
+    check.equal(array.shape, (len(testdataset_small_frames),))
+    check.is_true(np.all(array == 20))
+    vectors = testdataset_small_frames[0:10].apply(lambda pc: pc.data[["x", "y"]].max().to_numpy(), warn=False)
+    check.equal(vectors.to_numpy(dtype=np.float32).shape, (10, 2))
+    check.equal(vectors.to_numpy(dtype=np.float32).dtype, np.float32)
+
+
+@pytest.mark.parametrize("values", [[1, 2.5, 3], [2.5, 1, 3], [1, 2, np.float32(3.5)]])
+def test_delayed_result_result_dtype(values: list):
+    """The dtype comes from all results, not from the first one which finishes."""
+    res = DelayedResult([delayed(value) for value in values])
+    array = res.to_numpy()
+    check.equal(array.dtype, np.result_type(*[np.asarray(value).dtype for value in values]))
+    np.testing.assert_array_equal(array, values)
+    df = DelayedResult([delayed({"a": value}) for value in values]).to_pandas()
+    check.equal(df["a"].dtype, array.dtype)
+    np.testing.assert_array_equal(df["a"], values)
+
+
+def test_delayed_result_to_pandas(testdataset_small_frames):
+    dataset = testdataset_small_frames[0:10]
+    df = dataset.apply(lambda pc: pc.data.mean(), warn=False).to_pandas()
+    expected = pd.DataFrame(dataset.apply(lambda pc: pc.data.mean(), warn=False).compute())
+    pd.testing.assert_frame_equal(df, expected)
+    df_scalar = dataset.apply(len, warn=False).to_pandas()
+    check.equal(list(df_scalar.columns), ["value"])
+    check.equal(df_scalar["value"].tolist(), [20] * 10)
+    df_array = dataset.apply(lambda pc: pc.data[["x", "y"]].min().to_numpy(), warn=False).to_pandas(
+        columns=["x_min", "y_min"]
+    )
+    check.equal(list(df_array.columns), ["x_min", "y_min"])
+    check.equal(len(df_array), 10)
+
+
+def test_batch_slices():
+    check.equal(batch_slices(5, 2), [slice(0, 2), slice(2, 4), slice(4, 5)])
+    check.equal(batch_slices(0, 2), [])
+
+
+def test_auto_batch_size():
+    check.equal(auto_batch_size(1000, frame_nbytes=1000, target_bytes=10_000, n_workers=1), 10)
+    check.equal(auto_batch_size(8, frame_nbytes=1, target_bytes=10_000, n_workers=1), 2)
+    check.equal(auto_batch_size(10, frame_nbytes=10**9, target_bytes=10, n_workers=1), 1)
@@ -3,7 +3,9 @@ import pandas as pd
 import pytest
 import pytest_check as check
 
+import pointcloudset.geometry.ransac
 from pointcloudset import PointCloud
+from pointcloudset.geometry.ransac import fit_plane, ransac_plane
 
 
 def _make_flat_plane_pc(n_inliers: int = 80, n_outliers: int = 10) -> tuple[PointCloud, int]:
@@ -139,6 +141,185 @@ def test_plane_segmentation_different_seeds_may_differ():
     check.is_instance(r2, PointCloud)
 
 
+def _make_tilted_plane_pc(n_points: int = 20000, ratio: float = 0.5) -> tuple[PointCloud, np.ndarray]:
+    """Points on a tilted plane far from the origin plus uniform clutter, with a mask of
+    the plane points."""
+    rng = np.random.default_rng(3)
+    n_inliers = int(n_points * ratio)
+    xy = rng.uniform(-20, 20, size=(n_inliers, 2))
+    plane = np.column_stack([xy, 0.2 * xy[:, 0] - 0.1 * xy[:, 1]]) + [1000.0, -2000.0, 50.0]
+    clutter = rng.uniform(-20, 20, size=(n_points - n_inliers, 3)) * [1, 1, 0.5] + [1000.0, -2000.0, 70.0]
+    xyz = np.concatenate([plane, clutter])
+    on_plane = np.zeros(n_points, dtype=bool)
+    on_plane[:n_inliers] = True
+    return PointCloud({"x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2]}), on_plane
+
+
+def test_plane_segmentation_preview():
+    """Above RANSAC_PREVIEW_SIZE points the hypotheses are pre-scored on a subset."""
+    pc, on_plane = _make_tilted_plane_pc()
+    result = pc.plane_segmentation(distance_threshold=0.01, ransac_n=3, num_iterations=500, return_plane_model=True)
+    check.equal(len(result["PointCloud"]), on_plane.sum())
+    np.testing.assert_allclose(result["PointCloud"].xyz, pc.xyz[on_plane])
+    expected = np.array([0.2, -0.1, -1.0, 0.2 * -1000.0 - 0.1 * 2000.0 + 50.0])
+    expected /= np.linalg.norm(expected[:3])
+    model = result["plane_model"] * np.sign(result["plane_model"][2] * expected[2])
+    np.testing.assert_allclose(model, expected, atol=1e-9)
+
+
+def test_plane_segmentation_stops_early(monkeypatch):
+    calls = []
+    fit_hypotheses = pointcloudset.geometry.ransac._fit_hypotheses
+
+    def counting(sample_xyz: np.ndarray):
+        calls.append(len(sample_xyz))
+        return fit_hypotheses(sample_xyz)
+
+    monkeypatch.setattr(pointcloudset.geometry.ransac, "_fit_hypotheses", counting)
+    pc, on_plane = _make_tilted_plane_pc()
+    early = pc.plane_segmentation(distance_threshold=0.01, ransac_n=3, num_iterations=10000)
+    # 0.5 ** 3 inliers per sample needs 52 samples for a confidence of 0.999
+    check.less(sum(calls), 200)
+    check.equal(len(early), on_plane.sum())
+    calls.clear()
+    pc.plane_segmentation(distance_threshold=0.01, ransac_n=3, num_iterations=1000, confidence=1.0)
+    check.equal(sum(calls), 1000)
+
+
+def test_plane_segmentation_preview_seed_is_reproducible():
+    pc, _ = _make_tilted_plane_pc(ratio=0.2)
+    r1 = pc.plane_segmentation(0.5, 5, 300, return_plane_model=True, seed=11)
+    r2 = pc.plane_segmentation(0.5, 5, 300, return_plane_model=True, seed=11)
+    np.testing.assert_array_equal(r1["plane_model"], r2["plane_model"])
+    np.testing.assert_array_equal(r1["PointCloud"].xyz, r2["PointCloud"].xyz)
+
+
+def test_ransac_plane_collinear():
+    xyz = np.column_stack([np.arange(10.0), 2 * np.arange(10.0), np.zeros(10)])
+    for ransac_n in (3, 4):
+        inliers, model = ransac_plane(xyz, 0.1, ransac_n, 20, np.random.default_rng(0))
+        check.equal(len(inliers), 0)
+        np.testing.assert_array_equal(model, np.zeros(4))
+
+
+@pytest.mark.parametrize("ransac_n", [3, 4, 10])
+def test_ransac_plane_matches_exhaustive_scoring(ransac_n: int, monkeypatch):
+    """The best hypothesis with a preview is the best of all hypotheses in a clear case
+    and the same as with all points scored."""
+    pc, on_plane = _make_tilted_plane_pc(n_points=3000, ratio=0.7)
+    xyz = pc.get_xyz(np.float64)
+    exact, exact_model = ransac_plane(xyz, 0.01, ransac_n, 300, np.random.default_rng(1), confidence=1.0)
+    monkeypatch.setattr(pointcloudset.geometry.ransac, "RANSAC_PREVIEW_SIZE", 500)
+    previewed, previewed_model = ransac_plane(xyz, 0.01, ransac_n, 300, np.random.default_rng(1), confidence=1.0)
+    np.testing.assert_array_equal(exact, np.flatnonzero(on_plane))
+    np.testing.assert_array_equal(previewed, exact)
+    np.testing.assert_allclose(np.abs(previewed_model), np.abs(exact_model), atol=1e-9)
+
+
+@pytest.mark.parametrize("n_points", [90, 5000])
+def test_plane_segmentation_nan(n_points: int):
+    """Points with NaN coordinates are left out, exactly or with a preview."""
+    rng = np.random.default_rng(6)
+    xyz = np.column_stack([rng.uniform(-5, 5, size=(n_points, 2)), np.zeros(n_points)])
+    xyz[7] = np.nan
+    xyz[9, 2] = np.inf
+    pc = PointCloud({"x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2], "original_id": np.arange(n_points)})
+    result = pc.plane_segmentation(0.01, 3, 100, return_plane_model=True)
+    ids = result["PointCloud"].column_values("original_id")
+    np.testing.assert_array_equal(ids, np.delete(np.arange(n_points), [7, 9]))
+    np.testing.assert_allclose(np.abs(result["plane_model"]), [0.0, 0.0, 1.0, 0.0], atol=1e-12)
+    inliers, _ = ransac_plane(np.full((5, 3), np.nan), 0.1, 3, 10, np.random.default_rng(0))
+    check.equal(len(inliers), 0)
+
+
+def test_fit_plane():
+    rng = np.random.default_rng(4)
+    xy = rng.normal(size=(100, 2))
+    xyz = np.column_stack([xy, 3.0 + 0.0 * xy[:, 0]])
+    np.testing.assert_allclose(np.abs(fit_plane(xyz)), [0.0, 0.0, 1.0, 3.0], atol=1e-12)
+
+
+def _make_room_pc() -> PointCloud:
+    """A floor, two walls and some clutter in between."""
+    rng = np.random.default_rng(5)
+    floor = np.column_stack([rng.uniform(0, 10, size=(3000, 2)), np.zeros(3000)])
+    wall_x = np.column_stack([np.full(2000, 10.0), rng.uniform(0, 10, size=(2000, 2)) + [0, 0.1]])
+    wall_y = np.column_stack([rng.uniform(0, 9.9, 1000), np.zeros(1000), rng.uniform(0.1, 10, 1000)])
+    clutter = rng.uniform([1, 1, 1], [9, 9, 9], size=(500, 3))
+    xyz = np.concatenate([floor, wall_x, wall_y, clutter])
+    return PointCloud({"x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2], "original_id": np.arange(len(xyz))})
+
+
+def test_segment_planes():
+    pc = _make_room_pc()
+    result = pc.segment_planes(distance_threshold=0.01, max_planes=5, min_inliers=100)
+    check.equal(result["plane_models"].shape, (3, 4))
+    np.testing.assert_allclose(np.abs(result["plane_models"][:, :3]), np.eye(3)[[2, 0, 1]], atol=1e-9)
+    np.testing.assert_allclose(np.abs(result["plane_models"][:, 3]), [0.0, 10.0, 0.0], atol=1e-9)
+    expected = [np.arange(3000), np.arange(3000, 5000), np.arange(5000, 6000)]
+    for inliers, numbers in zip(result["inliers"], expected, strict=True):
+        np.testing.assert_array_equal(inliers, numbers)
+    residual = result["residual"]
+    check.equal(residual.columns, pc.columns)
+    np.testing.assert_array_equal(residual.column_values("original_id"), np.arange(6000, 6500))
+
+
+def test_segment_planes_first_plane_like_plane_segmentation():
+    pc, _ = _make_tilted_plane_pc()
+    single = pc.plane_segmentation(0.01, 3, 200, return_plane_model=True, seed=3)
+    result = pc.segment_planes(0.01, max_planes=2, min_inliers=10, num_iterations=200, seed=3)
+    np.testing.assert_array_equal(result["plane_models"][0], single["plane_model"])
+    np.testing.assert_array_equal(pc.apply_filter(result["inliers"][0]).xyz, single["PointCloud"].xyz)
+
+
+def test_segment_planes_limits():
+    pc = _make_room_pc()
+    check.equal(len(pc.segment_planes(0.01, max_planes=2, min_inliers=100)["inliers"]), 2)
+    result = pc.segment_planes(0.01, max_planes=5, min_inliers=1500)
+    check.equal([len(inliers) for inliers in result["inliers"]], [3000, 2000])
+    check.equal(len(result["residual"]), 1500)
+    nothing = pc.segment_planes(0.01, max_planes=5, min_inliers=5000)
+    check.equal(nothing["plane_models"].shape, (0, 4))
+    check.equal(nothing["inliers"], [])
+    check.equal(len(nothing["residual"]), len(pc))
+
+
+def test_segment_planes_nan():
+    pc = _make_room_pc()
+    xyz = np.array(pc.xyz)
+    xyz[[10, 4000]] = np.nan
+    nan_pc = PointCloud({"x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2], "original_id": np.arange(len(xyz))})
+    result = nan_pc.segment_planes(distance_threshold=0.01, max_planes=5, min_inliers=100)
+    check.equal(result["plane_models"].shape, (3, 4))
+    np.testing.assert_array_equal(result["inliers"][0], np.delete(np.arange(3000), 10))
+    np.testing.assert_array_equal(result["inliers"][1], np.delete(np.arange(3000, 5000), 1000))
+    np.testing.assert_array_equal(result["residual"].column_values("original_id"), [10, 4000, *range(6000, 6500)])
+
+
+def test_segment_planes_empty():
+    empty = PointCloud(data=pd.DataFrame({"x": [], "y": [], "z": []}))
+    result = empty.segment_planes(0.1, max_planes=3, min_inliers=1)
+    check.equal(len(result["inliers"]), 0)
+    check.equal(len(result["residual"]), 0)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"distance_threshold": 0.0},
+        {"max_planes": 0},
+        {"min_inliers": 0},
+        {"ransac_n": 2},
+        {"num_iterations": 0},
+        {"confidence": 0.0},
+    ],
+)
+def test_segment_planes_wrong(kwargs: dict):
+    pc, _ = _make_flat_plane_pc()
+    with pytest.raises(ValueError, match=next(iter(kwargs))):
+        pc.segment_planes(**{"distance_threshold": 0.1, "max_planes": 2, "min_inliers": 10} | kwargs)
+
+
 # --- Input validation ---
 
 
@@ -176,3 +357,37 @@ def test_plane_segmentation_raises_on_zero_iterations():
     pc, _ = _make_flat_plane_pc()
     with pytest.raises(ValueError, match="num_iterations"):
         pc.plane_segmentation(distance_threshold=0.1, ransac_n=3, num_iterations=0)
+
+
+@pytest.mark.parametrize("confidence", [0.0, -0.5, 1.5])
+def test_plane_segmentation_raises_on_wrong_confidence(confidence: float):
+    pc, _ = _make_flat_plane_pc()
+    with pytest.raises(ValueError, match="confidence"):
+        pc.plane_segmentation(distance_threshold=0.1, ransac_n=3, num_iterations=10, confidence=confidence)
+
+
+def _loop_plane_segmentation(xyz: np.ndarray, distance_threshold: float, num_iterations: int) -> int:
+    """One hypothesis per iteration scored on all points."""
+    rng = np.random.default_rng(0)
+    best = 0
+    for _ in range(num_iterations):
+        sample = xyz[rng.choice(len(xyz), 3, replace=False)]
+        centroid = sample.mean(axis=0)
+        normal = np.linalg.svd(sample - centroid)[2][-1]
+        best = max(best, int(np.count_nonzero(np.abs((xyz - centroid) @ normal) <= distance_threshold)))
+    return best
+
+
+@pytest.mark.slow
+def test_plane_segmentation_benchmark():
+    """Benchmark: a ground plane with 40 % of one million points against scoring each
+    hypothesis on all points."""
+    rng = np.random.default_rng(0)
+    n_ground = 400_000
+    ground = np.column_stack([rng.uniform(-50, 50, size=(n_ground, 2)), rng.normal(-1.8, 0.02, n_ground)])
+    clutter = rng.uniform([-50, -50, -1.8], [50, 50, 5], size=(600_000, 3))
+    xyz = np.concatenate([ground, clutter])
+    pc = PointCloud({"x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2]})
+    result = pc.plane_segmentation(distance_threshold=0.1, ransac_n=3, num_iterations=1000)
+    reference = _loop_plane_segmentation(xyz, 0.1, 100)
+    check.greater(len(result), 0.99 * reference)
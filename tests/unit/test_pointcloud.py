@@ -1,3 +1,4 @@
+import pickle
 from datetime import datetime
 from pathlib import Path
 
@@ -8,6 +9,7 @@ import pytest_check as check
 from pandas._testing import assert_frame_equal
 
 from pointcloudset import PointCloud
+from pointcloudset.geometry import plane
 
 typical_columns = [
     "x",
@@ -274,3 +276,196 @@ def test_add_original_id_from_index(testpointcloud_mini_df):
     check.is_false(test_pc.has_original_id)
     test_pc = test_pc._add_original_id_from_index()
     check.is_true(test_pc.has_original_id)
+
+
+def test_init_from_arrays(testpointcloud_mini_df: pd.DataFrame):
+    arrays = {column: testpointcloud_mini_df[column].to_numpy() for column in testpointcloud_mini_df.columns}
+    pointcloud = PointCloud(arrays, datetime(2020, 1, 1))
+    check.equal(len(pointcloud), 8)
+    check.equal(pointcloud.columns, typical_columns)
+    check.is_true(pointcloud.has_original_id is False)
+    np.testing.assert_array_equal(pointcloud.xyz, testpointcloud_mini_df[["x", "y", "z"]].to_numpy())
+    assert_frame_equal(pointcloud.bounding_box, PointCloud(testpointcloud_mini_df).bounding_box)
+    assert_frame_equal(pointcloud.data, testpointcloud_mini_df)
+
+
+def test_init_from_structured_array():
+    points = np.zeros(3, dtype=[("x", "f4"), ("y", "f4"), ("z", "f4"), ("ring", "u2")])
+    points["ring"] = [1, 2, 3]
+    pointcloud = PointCloud(points)
+    check.equal(pointcloud.columns, ["x", "y", "z", "ring"])
+    check.equal(str(pointcloud.data["ring"].dtype), "uint16")
+    check.equal(pointcloud.data["ring"].tolist(), [1, 2, 3])
+
+
+@pytest.mark.parametrize(
+    "data, error",
+    [
+        ({"x": [1.0], "y": [1.0]}, ValueError),
+        ({"x": [1.0], "y": [1.0], "z": [1.0, 2.0]}, ValueError),
+        ({"x": [[1.0]], "y": [[1.0]], "z": [[1.0]]}, ValueError),
+        (np.zeros((2, 3)), TypeError),
+        ([1.0, 2.0, 3.0], TypeError),
+    ],
+)
+def test_init_from_arrays_wrong(data, error):
+    with pytest.raises(error):
+        PointCloud(data)
+
+
+def test_filter_keeps_arrays(testpointcloud_mini: PointCloud):
+    limited = testpointcloud_mini.limit("x", 0.0, 1000.0).limit("intensity", 0.5, 1000.0)
+    check.is_not_none(limited._columns)
+    check.equal(len(limited), len(limited.column_values("x")))
+    expected = testpointcloud_mini.data
+    expected = expected[(expected.x >= 0.0) & (expected.intensity >= 0.5)].reset_index(drop=True)
+    assert_frame_equal(limited.data, expected)
+    check.is_none(limited._columns)
+
+
+def test_filter_with_extension_dtype(testpointcloud_mini_df: pd.DataFrame):
+    testpointcloud_mini_df["label"] = pd.Categorical(["a", "b"] * 4)
+    limited = PointCloud(testpointcloud_mini_df).limit("x", 0.0, 1000.0)
+    check.equal(limited.data["label"].dtype, "category")
+    check.equal(len(limited), 7)
+
+
+def test_add_column_to_arrays(testpointcloud_mini: PointCloud):
+    limited = testpointcloud_mini.limit("x", 0.0, 1000.0)
+    limited._add_column("constant", 1.5)
+    limited._add_original_id_from_index()
+    check.is_not_none(limited._columns)
+    check.equal(limited.data["constant"].tolist(), [1.5] * len(limited))
+    check.equal(limited.data["original_id"].tolist(), list(range(len(limited))))
+
+
+def test_add_column_to_arrays_like_dataframe(testpointcloud_mini: PointCloud):
+    n_points = len(testpointcloud_mini.limit("x", 0.0, 1000.0))
+    new_columns = {
+        # a Series is aligned by its index
+        "series": pd.Series(np.arange(n_points, dtype=float), index=np.arange(n_points)[::-1]),
+        "column": np.ones((n_points, 1)),
+        "label": "a",
+    }
+    for column, values in new_columns.items():
+        expected = testpointcloud_mini.limit("x", 0.0, 1000.0).data
+        expected[column] = values
+        array_backed = testpointcloud_mini.limit("x", 0.0, 1000.0)
+        check.is_not_none(array_backed._columns)
+        array_backed._add_column(column, values)
+        pd.testing.assert_frame_equal(array_backed.data, expected)
+    with pytest.raises(ValueError):
+        testpointcloud_mini.limit("x", 0.0, 1000.0)._add_column("wrong", np.ones(n_points + 1))
+
+
+def test_data_changes_are_kept(testpointcloud_mini: PointCloud):
+    limited = testpointcloud_mini.limit("x", 0.0, 1000.0)
+    limited.data["new"] = 1
+    check.equal(limited.columns, [*typical_columns, "new"])
+    check.equal(limited.limit("new", 0, 2).data["new"].sum(), len(limited))
+
+
+def test_xyz_buffer_cached(testpointcloud_mini: PointCloud):
+    xyz = testpointcloud_mini.xyz
+    check.is_(testpointcloud_mini.xyz, xyz)
+    check.is_true(xyz.flags.c_contiguous)
+    check.is_false(xyz.flags.writeable)
+    xyz32 = testpointcloud_mini.get_xyz(np.float32)
+    check.equal(xyz32.dtype, np.float32)
+    check.is_(testpointcloud_mini.get_xyz("float32"), xyz32)
+    check.is_(testpointcloud_mini.get_xyz(np.float64), xyz)
+    np.testing.assert_array_equal(xyz32, xyz.astype(np.float32))
+    with pytest.raises(ValueError):
+        testpointcloud_mini.get_xyz(np.int64)
+
+
+def test_xyz_buffer_invalidated(testpointcloud_mini: PointCloud):
+    xyz = testpointcloud_mini.xyz
+    testpointcloud_mini._add_column("intensity2", 1.0)
+    check.is_(testpointcloud_mini.xyz, xyz)
+    testpointcloud_mini._add_column("x", 5.0)
+    check.equal(testpointcloud_mini.xyz[:, 0].tolist(), [5.0] * 8)
+    testpointcloud_mini.data["y"] = 3.0
+    check.equal(testpointcloud_mini.xyz[:, 1].tolist(), [3.0] * 8)
+    testpointcloud_mini.data = {"x": [1.0], "y": [2.0], "z": [3.0]}
+    check.equal(testpointcloud_mini.xyz.tolist(), [[1.0, 2.0, 3.0]])
+    check.equal(testpointcloud_mini.centroid.tolist(), [1.0, 2.0, 3.0])
+
+
+def test_pickle_without_xyz_buffer(testpointcloud_mini: PointCloud):
+    xyz = testpointcloud_mini.xyz
+    loaded = pickle.loads(pickle.dumps(testpointcloud_mini))
+    check.equal(loaded._xyz_cache, {})
+    np.testing.assert_array_equal(loaded.xyz, xyz)
+    with pytest.warns(DeprecationWarning):
+        assert_frame_equal(loaded.points.points, testpointcloud_mini.data)
+
+
+def _pointcloud_columns(n: int) -> dict:
+    rng = np.random.default_rng(0)
+    columns = {dim: rng.normal(scale=10.0, size=n).astype(np.float32) for dim in ["x", "y", "z"]}
+    columns["intensity"] = rng.uniform(0.0, 100.0, n).astype(np.float32)
+    columns["ring"] = rng.integers(0, 64, n).astype(np.uint16)
+    return columns
+
+
+def _pandas_limits(df: pd.DataFrame) -> pd.DataFrame:
+    for dim in ["x", "y", "z"]:
+        df = df.loc[(df[dim] >= -10.0).to_numpy()].reset_index(drop=True)
+        df = df.loc[(df[dim] <= 10.0).to_numpy()].reset_index(drop=True)
+    return df
+
+
+@pytest.mark.slow
+def test_numpy_backed_benchmark():
+    """Benchmark: methods on the numpy arrays against the same work on the DataFrame."""
+    columns = _pointcloud_columns(500_000)
+    df = pd.DataFrame(columns)
+    small = {name: values[:20_000] for name, values in columns.items()}
+    plane_model = np.array([0.0, 0.0, 1.0, 1.0])
+    limited = PointCloud(columns).limit("x", -10, 10).limit("y", -10, 10).limit("z", -10, 10)
+    pd.testing.assert_frame_equal(limited.data, _pandas_limits(df))
+    quantile = PointCloud(columns).filter("quantile", "intensity", ">=", 0.3)
+    check.equal(len(quantile), len(df.loc[(df.intensity >= df.intensity.quantile(0.3)).to_numpy()]))
+    distances = PointCloud(dict(small)).diff("point", target=np.array([1.0, 2.0, 3.0])).data.iloc[:, -1]
+    expected = [np.linalg.norm(point - [1.0, 2.0, 3.0]) for point in PointCloud(small).xyz]
+    np.testing.assert_allclose(distances, expected)
+    distances = PointCloud(dict(small)).diff("plane", target=plane_model).data.iloc[:, -1]
+    expected = [abs(plane.distance_to_point(point, plane_model)) for point in PointCloud(small).xyz]
+    np.testing.assert_allclose(distances, expected)
+
+
+def test_spatial_index_cached(testpointcloud_mini: PointCloud):
+    index = testpointcloud_mini.spatial_index
+    check.is_(testpointcloud_mini.spatial_index, index)
+    check.equal(repr(index), "SpatialIndex(points=8, built=False)")
+    check.is_(index.tree, index.tree)
+    testpointcloud_mini.get_cluster(eps=2.0, min_points=2)
+    testpointcloud_mini.filter("radiusoutlier", 1, 2.0)
+    check.is_(testpointcloud_mini.spatial_index, index)
+    testpointcloud_mini._add_column("x", 1.0)
+    check.is_not(testpointcloud_mini.spatial_index, index)
+
+
+def test_spatial_index_queries(testpointcloud_mini: PointCloud):
+    index = testpointcloud_mini.spatial_index
+    xyz = testpointcloud_mini.xyz
+    counts = index.query_radius(xyz[:3], 1.8, return_length=True)
+    check.equal(counts.tolist(), [3, 2, 2])
+    distances, numbers = index.query_knn(np.array([[0.9, 0.9, 0.9]]), k=2)
+    check.equal(numbers[0].tolist(), [1, 0])
+    np.testing.assert_allclose(distances[0], [np.sqrt(3 * 0.01), np.sqrt(3 * 0.81)])
+    check.equal(index.query_box([-0.5, -0.5, -0.5], [1.0, 1.0, 1.0]).tolist(), [0, 1])
+    check.equal(index.query_box([-np.inf] * 3, [np.inf] * 3).tolist(), list(range(8)))
+
+
+def test_spatial_index_carried_by_filters(testpointcloud_mini: PointCloud, testpointcloud_mini_df):
+    check.is_none(PointCloud(testpointcloud_mini_df).limit("x", 0.0, 500.0)._spatial_index)
+    index = testpointcloud_mini.spatial_index
+    check.is_not_none(index.tree)
+    limited = testpointcloud_mini.limit("x", 0.0, 500.0)
+    np.testing.assert_array_equal(limited.spatial_index.xyz, limited.get_xyz(np.float64))
+    check.is_none(limited.spatial_index._tree)
+    everything = testpointcloud_mini.limit("x", -10.0, 1000.0)
+    check.is_(everything.spatial_index.tree, index.tree)
+    check.equal(len(limited.limit("y", 5.0, 6.0).spatial_index), 0)
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+import pytest_check as check
+from pandas.testing import assert_frame_equal
+
+from pointcloudset import Dataset, PointCloud
+
+
+def _reference(pointcloud: PointCloud, voxel_size: float, agg: dict) -> pd.DataFrame:
+    data = pointcloud.data.dropna(subset=["x", "y", "z"]).reset_index(drop=True)
+    indices = np.floor(data[["x", "y", "z"]].to_numpy(np.float64) / voxel_size).astype(np.int64)
+    groups = data.groupby([indices[:, 0], indices[:, 1], indices[:, 2]], sort=False)
+    return groups.agg(agg).reset_index(drop=True)[list(data.columns)]
+
+
+@pytest.fixture()
+def random_pointcloud() -> PointCloud:
+    rng = np.random.default_rng(3)
+    n_points = 2000
+    columns = {
+        "x": rng.uniform(-5.0, 5.0, n_points),
+        "y": rng.uniform(-5.0, 5.0, n_points),
+        "z": rng.uniform(0.0, 1.0, n_points).astype(np.float32),
+        "intensity": rng.normal(size=n_points),
+        "ring": rng.integers(0, 64, n_points).astype(np.uint16),
+        "original_id": np.arange(n_points),
+    }
+    columns["x"][[3, 10]] = np.nan
+    columns["intensity"][rng.random(n_points) < 0.1] = np.nan
+    return PointCloud(columns)
+
+
+@pytest.mark.parametrize(
+    "agg, expected",
+    [
+        (
+            "centroid",
+            {"x": "mean", "y": "mean", "z": "mean", "intensity": "first", "ring": "first", "original_id": "first"},
+        ),
+        (
+            "first",
+            {"x": "first", "y": "first", "z": "first", "intensity": "first", "ring": "first", "original_id": "first"},
+        ),
+        ("mean", {"x": "mean", "y": "mean", "z": "mean", "intensity": "mean", "ring": "mean", "original_id": "first"}),
+    ],
+)
+def test_voxel_down_sample(random_pointcloud: PointCloud, agg: str, expected: dict):
+    smaller = random_pointcloud.voxel_down_sample(1.0, agg=agg)
+    check.is_not_none(smaller._columns)
+    reference = _reference(random_pointcloud, 1.0, expected)
+    # pandas first skips NaN, voxel_down_sample takes all columns of the same point
+    first_point = random_pointcloud.data.loc[reference.original_id]
+    for column, how in expected.items():
+        if how == "first":
+            reference[column] = first_point[column].to_numpy()
+    assert_frame_equal(smaller.data, reference, check_dtype=False, rtol=1e-6)
+    check.equal(smaller.columns, random_pointcloud.columns)
+    check.equal(smaller.data.z.dtype, np.float32)
+
+
+def test_voxel_down_sample_column_agg(random_pointcloud: PointCloud):
+    smaller = random_pointcloud.voxel_down_sample(
+        2.0, column_agg={"intensity": "max", "ring": "min", "original_id": "sum"}
+    )
+    reference = _reference(
+        random_pointcloud,
+        2.0,
+        {"x": "mean", "y": "mean", "z": "mean", "intensity": "max", "ring": "min", "original_id": "sum"},
+    )
+    assert_frame_equal(smaller.data, reference, check_dtype=False, rtol=1e-6)
+    check.equal(smaller.data.ring.dtype, np.uint16)
+
+
+def test_voxel_down_sample_dataframe(testpointcloud_mini: PointCloud):
+    data = testpointcloud_mini.data.assign(label=pd.Categorical(["a", "b"] * 4))
+    smaller = PointCloud(data).voxel_down_sample(1000.0, agg="mean")
+    # the point at -1 is in a voxel of its own
+    check.equal(len(smaller), 2)
+    check.equal(list(smaller.data.label), ["a", "a"])
+    check.almost_equal(smaller.data.intensity[0], data.intensity.drop(index=2).mean())
+    with pytest.raises(ValueError, match="numeric"):
+        PointCloud(data).voxel_down_sample(1.0, column_agg={"label": "mean"})
+
+
+def test_voxel_down_sample_empty(testpointcloud_mini: PointCloud):
+    empty = testpointcloud_mini.limit("x", 5000.0, 6000.0).voxel_down_sample(1.0)
+    check.equal(len(empty), 0)
+    check.equal(empty.columns, testpointcloud_mini.columns)
+
+
+@pytest.mark.parametrize(
+    "kwargs, error",
+    [
+        ({"voxel_size": 0.0}, ValueError),
+        ({"voxel_size": 1.0, "agg": "median"}, ValueError),
+        ({"voxel_size": 1.0, "column_agg": {"intensity": "median"}}, ValueError),
+        ({"voxel_size": 1.0, "column_agg": {"wrong": "max"}}, KeyError),
+        ({"voxel_size": 1e-9}, ValueError),
+    ],
+)
+def test_voxel_down_sample_wrong(testpointcloud_mini: PointCloud, kwargs: dict, error: type):
+    with pytest.raises(error):
+        testpointcloud_mini.voxel_down_sample(**kwargs)
+
+
+def test_dataset_voxel_down_sample(testdataset_original_id: Dataset):
+    smaller = testdataset_original_id.voxel_down_sample(0.5, column_agg={"intensity": "max"})
+    check.is_instance(smaller, Dataset)
+    check.equal(len(smaller), len(testdataset_original_id))
+    for pointcloud, original in zip(smaller, testdataset_original_id, strict=True):
+        expected = original.voxel_down_sample(0.5, column_agg={"intensity": "max"})
+        assert_frame_equal(pointcloud.data, expected.data)
+    applied = testdataset_original_id.apply(PointCloud.voxel_down_sample, voxel_size=0.5)
+    check.is_instance(applied, Dataset)
+    with pytest.raises(ValueError):
+        testdataset_original_id.voxel_down_sample(-1.0)
+
+
+def test_random_down_sample_keeps_columns(testpointcloud_mini: PointCloud):
+    smaller = testpointcloud_mini.random_down_sample(3)
+    check.equal(len(smaller), 3)
+    check.equal(smaller.columns, testpointcloud_mini.columns)
+    check.is_true(np.isin(smaller.data.x, testpointcloud_mini.data.x).all())
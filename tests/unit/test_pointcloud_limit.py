@@ -63,3 +63,45 @@ def test_limit_less(testpointcloud_mini: PointCloud):
 def test_limit_greater(testpointcloud_mini: PointCloud):
     totest = testpointcloud_mini.limit_greater("x", value=10.0)
     check.greater(totest.data["x"].min(), 10.0)
+
+
+def test_select(testpointcloud_mini: PointCloud):
+    expected = testpointcloud_mini.limit("x", 0.0, 500.0).limit_greater("intensity", 0.5).limit_less("y", 800.0)
+    selected = testpointcloud_mini.select(x=(0.0, 500.0), intensity=(">", 0.5), y=("<", 800.0))
+    np.testing.assert_array_equal(selected.data.values, expected.data.values)
+    selected = testpointcloud_mini.select({"x": [0.0, 500.0], "intensity": (">", 0.5), "y": ("<", 800.0)})
+    np.testing.assert_array_equal(selected.data.values, expected.data.values)
+    check.equal(selected.timestamp, testpointcloud_mini.timestamp)
+
+
+def test_select_expression(testpointcloud_mini: PointCloud):
+    expected = testpointcloud_mini.select(x=(0.0, 500.0), intensity=(">", 0.5))
+    selected = testpointcloud_mini.select("x >= 0 and x <= 500 and intensity > 0.5")
+    np.testing.assert_array_equal(selected.data.values, expected.data.values)
+
+
+def test_select_lazy(testpointcloud_mini: PointCloud):
+    selection = testpointcloud_mini.select(x=(0.0, 500.0), lazy=True).limit("y", 0.0, 800.0).limit_greater("z", 0.5)
+    check.equal(repr(selection), f"Selection({len(selection)} of 8 points)")
+    expected = testpointcloud_mini.limit("x", 0.0, 500.0).limit("y", 0.0, 800.0).limit_greater("z", 0.5)
+    check.equal(len(selection), len(expected))
+    np.testing.assert_array_equal(selection.compute().data.values, expected.data.values)
+    np.testing.assert_array_equal(
+        selection.select("x > 1").compute().data.values, expected.limit_greater("x", 1).data.values
+    )
+
+
+@pytest.mark.parametrize(
+    "conditions, error",
+    [
+        ({"x": (">>", 1.0)}, ValueError),
+        ({"x": (2.0, 1.0)}, ValueError),
+        ({"x": 1.0}, ValueError),
+        ({"wrong": (0.0, 1.0)}, KeyError),
+        ("wrong > 1", KeyError),
+        ("x + 1", ValueError),
+    ],
+)
+def test_select_wrong(testpointcloud_mini: PointCloud, conditions, error):
+    with pytest.raises(error):
+        testpointcloud_mini.select(conditions)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+import pytest_check as check
+from scipy.spatial import KDTree
+
+import pointcloudset.geometry.normals
+from pointcloudset import PointCloud
+
+
+def _pointcloud(xyz: np.ndarray) -> PointCloud:
+    return PointCloud({"x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2]})
+
+
+def _normals(pointcloud: PointCloud) -> np.ndarray:
+    return np.column_stack([pointcloud.column_values(column) for column in ("nx", "ny", "nz")])
+
+
+def _reference(xyz: np.ndarray, k: int | None, radius: float | None) -> tuple[np.ndarray, np.ndarray]:
+    """One covariance and eigen decomposition per point."""
+    tree = KDTree(xyz)
+    if k is None:
+        neighbourhoods = tree.query_ball_point(xyz, radius)
+    else:
+        _, indices = tree.query(xyz, k=k, distance_upper_bound=np.inf if radius is None else radius)
+        neighbourhoods = [row[row < len(xyz)] for row in indices]
+    normals = np.full(xyz.shape, np.nan)
+    curvature = np.full(len(xyz), np.nan)
+    for number, neighbours in enumerate(neighbourhoods):
+        if len(neighbours) < 3:
+            continue
+        eigenvalues, eigenvectors = np.linalg.eigh(np.cov(xyz[neighbours].T, bias=True))
+        normal = eigenvectors[:, 0]
+        normals[number] = -normal if normal @ -xyz[number] < 0 else normal
+        curvature[number] = eigenvalues[0] / eigenvalues.sum()
+    return normals, curvature
+
+
+def test_normals_plane():
+    grid = np.stack(np.meshgrid(np.arange(20.0), np.arange(20.0)), axis=-1).reshape(-1, 2)
+    xyz = np.column_stack([grid, np.ones(len(grid))])
+    result = _pointcloud(xyz).estimate_normals(k=8)
+    np.testing.assert_allclose(_normals(result), np.tile([0.0, 0.0, -1.0], (len(xyz), 1)), atol=1e-12)
+    np.testing.assert_allclose(result.column_values("curvature"), 0.0, atol=1e-12)
+    above = _pointcloud(xyz).estimate_normals(radius=1.5, viewpoint=np.array([0.0, 0.0, 10.0]))
+    np.testing.assert_allclose(_normals(above)[:, 2], 1.0)
+
+
+def test_normals_sphere():
+    rng = np.random.default_rng(1)
+    directions = rng.normal(size=(5000, 3))
+    xyz = 2.0 * directions / np.linalg.norm(directions, axis=1, keepdims=True)
+    result = _pointcloud(xyz).estimate_normals(k=12)
+    # seen from the centre the normals point inwards
+    cosine = np.einsum("ij,ij->i", _normals(result), -xyz / 2.0)
+    check.greater(cosine.min(), 0.99)
+    check.less(result.column_values("curvature").max(), 0.02)
+
+
+@pytest.mark.parametrize("k, radius", [(10, None), (None, 0.4), (10, 0.25)])
+def test_normals_match_reference(k: int | None, radius: float | None, monkeypatch):
+    # a small budget gives many chunks
+    monkeypatch.setattr(pointcloudset.geometry.normals, "NORMALS_MEMORY_BUDGET_MB", 0.01)
+    rng = np.random.default_rng(2)
+    xyz = rng.normal(size=(1500, 3)) * [1.0, 1.0, 0.1] + [100.0, -50.0, 2.0]
+    result = _pointcloud(xyz).estimate_normals(k=k, radius=radius)
+    normals, curvature = _reference(xyz, k, radius)
+    np.testing.assert_allclose(_normals(result), normals, atol=1e-10)
+    np.testing.assert_allclose(result.column_values("curvature"), curvature, atol=1e-10)
+    check.equal(result.columns[-4:], ["nx", "ny", "nz", "curvature"])
+
+
+def test_normals_few_neighbours():
+    xyz = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [10.0, 10.0, 10.0]])
+    result = _pointcloud(xyz).estimate_normals(radius=1.5)
+    check.is_true(np.isnan(_normals(result)[3]).all())
+    check.is_true(np.isnan(result.column_values("curvature")[3]))
+    np.testing.assert_allclose(np.abs(_normals(result)[:3, 2]), 1.0)
+    small = _pointcloud(xyz[:2]).estimate_normals(k=5)
+    check.is_true(np.isnan(small.column_values("curvature")).all())
+
+
+def test_normals_empty():
+    empty = PointCloud(data=pd.DataFrame({"x": [], "y": [], "z": []})).estimate_normals(k=5)
+    check.equal(len(empty), 0)
+    check.equal(empty.columns, ["x", "y", "z", "nx", "ny", "nz", "curvature"])
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"k": 2}, {"radius": 0.0}, {"k": 5, "radius": -1.0}])
+def test_normals_wrong(testpointcloud_mini: PointCloud, kwargs: dict):
+    with pytest.raises(ValueError):
+        testpointcloud_mini.estimate_normals(**kwargs)
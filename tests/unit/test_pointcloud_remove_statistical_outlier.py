@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+import pytest_check as check
+from scipy.spatial import KDTree
+
+import pointcloudset.filter.stat
+from pointcloudset import PointCloud
+
+
+def _make_cluster_plus_outliers_pc(n_cluster: int = 200, n_outliers: int = 5) -> PointCloud:
+    """Dense cluster near origin plus isolated points far away."""
+    rng = np.random.default_rng(42)
+    xyz = np.concatenate([rng.normal(scale=0.1, size=(n_cluster, 3)), rng.uniform(50, 100, size=(n_outliers, 3))])
+    return PointCloud(data=pd.DataFrame(xyz, columns=["x", "y", "z"]))
+
+
+def _reference_mask(xyz: np.ndarray, k: int, std_ratio: float) -> np.ndarray:
+    distances, _ = KDTree(xyz).query(xyz, k=k + 1)
+    mean_distances = distances[:, 1:].mean(axis=1)
+    return mean_distances <= mean_distances.mean() + std_ratio * mean_distances.std(ddof=1)
+
+
+def test_sor_removes_isolated_points():
+    pc = _make_cluster_plus_outliers_pc()
+    result = pc.filter("statistical", k=10, std_ratio=2.0)
+    check.equal(len(result), 200)
+    check.is_true(np.all(np.abs(result.xyz) < 1.0))
+
+
+@pytest.mark.parametrize("k, std_ratio", [(1, 1.0), (8, 0.5), (20, 2.0)])
+def test_sor_matches_reference(k: int, std_ratio: float, monkeypatch):
+    monkeypatch.setattr(pointcloudset.filter.stat, "STATISTICAL_OUTLIER_QUERY_CHUNK_SIZE", 37)
+    rng = np.random.default_rng(7)
+    xyz = rng.standard_cauchy(size=(500, 3))
+    pc = PointCloud({"x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2], "original_id": np.arange(500)})
+    result = pc.filter("statistical", k=k, std_ratio=std_ratio)
+    np.testing.assert_array_equal(
+        result.column_values("original_id"), np.flatnonzero(_reference_mask(xyz, k, std_ratio))
+    )
+
+
+def test_sor_k_larger_than_pointcloud():
+    pc = PointCloud(data=pd.DataFrame({"x": [0.0, 0.1, 0.2, 50.0], "y": 0.0, "z": 0.0}))
+    result = pc.filter("statistical", k=20, std_ratio=1.0)
+    check.equal(list(result.data.x), [0.0, 0.1, 0.2])
+
+
+@pytest.mark.parametrize("n_points", [0, 1])
+def test_sor_tiny_pointcloud_unchanged(n_points: int):
+    pc = PointCloud(data=pd.DataFrame({"x": np.zeros(n_points), "y": 0.0, "z": 0.0}))
+    check.equal(len(pc.filter("statistical")), n_points)
+
+
+@pytest.mark.parametrize("kwargs", [{"k": 0}, {"k": -1}, {"std_ratio": 0.0}, {"std_ratio": -1.0}])
+def test_sor_wrong(kwargs: dict):
+    with pytest.raises(ValueError, match=next(iter(kwargs))):
+        _make_cluster_plus_outliers_pc().filter("statistical", **kwargs)
+
+
+@pytest.mark.slow
+def test_sor_benchmark():
+    """Benchmark: statistical outlier removal on 1.2 million points against one kNN query
+    of all points in their original order."""
+    rng = np.random.default_rng(0)
+    xyz = np.concatenate([rng.normal(scale=5.0, size=(1_188_000, 3)), rng.uniform(-100, 100, size=(12_000, 3))])
+    pc = PointCloud({"x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2]})
+    result = pc.filter("statistical", k=20, std_ratio=2.0)
+    expected = _reference_mask(xyz, 20, 2.0)
+    check.equal(len(result), int(expected.sum()))
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+import pytest
+import pytest_check as check
+
+import pointcloudset.geometry.sampling
+from pointcloudset import PointCloud
+from pointcloudset.geometry.sampling import farthest_point_indices
+from pointcloudset.geometry.spatial_index import SpatialIndex
+
+
+def _pointcloud(xyz: np.ndarray) -> PointCloud:
+    return PointCloud({"x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2], "original_id": np.arange(len(xyz))})
+
+
+def _reference_fps(xyz: np.ndarray, number_of_points: int, start: int) -> np.ndarray:
+    """Update the distances of all points after each pick."""
+    min_distances = np.full(len(xyz), np.inf)
+    picked = [start]
+    for _ in range(1, number_of_points):
+        np.minimum(min_distances, ((xyz - xyz[picked[-1]]) ** 2).sum(axis=1), out=min_distances)
+        picked.append(int(np.argmax(min_distances)))
+    return np.array(picked)
+
+
+@pytest.mark.parametrize("n_points", [1, 255, 256, 3000])
+def test_farthest_point_indices_match_reference(n_points: int):
+    rng = np.random.default_rng(n_points)
+    xyz = rng.normal(size=(n_points, 3)) * [10.0, 5.0, 1.0]
+    number_of_points = min(n_points, 200)
+    expected = _reference_fps(xyz, number_of_points, n_points // 2)
+    result = farthest_point_indices(SpatialIndex(xyz), number_of_points, start=n_points // 2)
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_farthest_point_indices_numba_kernel(monkeypatch):
+    # without Numba installed the kernel runs as plain Python and must give the same picks
+    xyz = np.random.default_rng(3).uniform(size=(700, 3))
+    index = SpatialIndex(xyz)
+    expected = farthest_point_indices(index, 100, start=5)
+    monkeypatch.setattr(pointcloudset.geometry.sampling, "HAS_NUMBA", True)
+    np.testing.assert_array_equal(farthest_point_indices(index, 100, start=5), expected)
+
+
+def test_farthest_point_indices_duplicates(monkeypatch):
+    xyz = np.repeat(np.random.default_rng(4).normal(size=(10, 3)), 30, axis=0)
+    picked = farthest_point_indices(SpatialIndex(xyz), 300)
+    check.equal(len(np.unique(picked)), 300)
+    check.equal(len(np.unique(xyz[picked[:10]], axis=0)), 10)
+    monkeypatch.setattr(pointcloudset.geometry.sampling, "HAS_NUMBA", True)
+    np.testing.assert_array_equal(farthest_point_indices(SpatialIndex(xyz), 300), picked)
+
+
+def test_farthest_point_sample():
+    xyz = np.random.default_rng(5).normal(size=(2000, 3))
+    pc = _pointcloud(xyz)
+    result = pc.farthest_point_sample(50, seed=1)
+    check.equal(len(result), 50)
+    check.equal(result.columns, pc.columns)
+    ids = result.column_values("original_id")
+    np.testing.assert_array_equal(ids, _reference_fps(xyz, 50, ids[0]))
+    np.testing.assert_array_equal(pc.farthest_point_sample(50, seed=1).column_values("original_id"), ids)
+    # the first k points are the sample of size k
+    np.testing.assert_array_equal(pc.farthest_point_sample(20, seed=1).column_values("original_id"), ids[:20])
+    check.not_equal(pc.farthest_point_sample(50, seed=2).column_values("original_id")[0], ids[0])
+
+
+def test_farthest_point_sample_frame(testpointcloud_mini: PointCloud):
+    result = testpointcloud_mini.farthest_point_sample(len(testpointcloud_mini))
+    check.equal(len(result), len(testpointcloud_mini))
+    check.equal(sorted(result.data.x), sorted(testpointcloud_mini.data.x))
+
+
+def test_farthest_point_sample_nan():
+    xyz = np.random.default_rng(6).normal(size=(100, 3))
+    xyz[[3, 50]] = np.nan
+    pc = _pointcloud(xyz)
+    result = pc.farthest_point_sample(98)
+    check.is_true(np.isfinite(result.xyz).all())
+    check.equal(len(np.unique(result.column_values("original_id"))), 98)
+    with pytest.raises(ValueError):
+        pc.farthest_point_sample(99)
+
+
+def test_farthest_point_sample_empty():
+    empty = PointCloud(data=pd.DataFrame({"x": [], "y": [], "z": []}))
+    check.equal(len(empty.farthest_point_sample(0)), 0)
+
+
+@pytest.mark.parametrize("number_of_points", [-1, 2001])
+def test_farthest_point_sample_wrong(number_of_points: int):
+    with pytest.raises(ValueError):
+        _pointcloud(np.zeros((2000, 3))).farthest_point_sample(number_of_points)
+
+
+def _stratified_pointcloud() -> tuple[PointCloud, np.ndarray]:
+    """One dense voxel of size 1 and seven voxels with three points each."""
+    rng = np.random.default_rng(7)
+    corners = np.array([[i % 2, i // 2 % 2, i // 4] for i in range(8)])
+    xyz = np.concatenate([rng.uniform(size=(5000, 3)), np.repeat(corners[1:], 3, axis=0) + rng.uniform(size=(21, 3))])
+    return _pointcloud(xyz), np.floor(xyz).astype(int)
+
+
+@pytest.mark.parametrize("number_of_points", [1, 8, 14, 24, 100, 5021])
+def test_stratified_sample(number_of_points: int):
+    pc, keys = _stratified_pointcloud()
+    result = pc.stratified_sample(number_of_points, voxel_size=1.0)
+    ids = result.column_values("original_id")
+    check.equal(len(ids), number_of_points)
+    check.is_true(np.all(np.diff(ids) > 0))
+    _, voxels = np.unique(keys, axis=0, return_inverse=True)
+    occupancy = np.bincount(voxels)
+    counts = np.bincount(voxels[ids], minlength=len(occupancy))
+    # a voxel only gets fewer points than another one minus one if it has no more
+    not_full = counts < occupancy
+    if not_full.any():
+        check.greater_equal(counts[not_full].min(), counts.max() - 1)
+
+
+def test_stratified_sample_seed():
+    pc, _ = _stratified_pointcloud()
+    ids = pc.stratified_sample(100, voxel_size=1.0, seed=3).column_values("original_id")
+    np.testing.assert_array_equal(pc.stratified_sample(100, voxel_size=1.0, seed=3).column_values("original_id"), ids)
+    check.is_false(np.array_equal(pc.stratified_sample(100, voxel_size=1.0, seed=4).column_values("original_id"), ids))
+
+
+def test_stratified_sample_nan(testpointcloud_mini: PointCloud):
+    xyz = np.random.default_rng(8).normal(size=(50, 3))
+    xyz[10] = np.nan
+    result = _pointcloud(xyz).stratified_sample(49, voxel_size=0.5)
+    check.is_true(np.isfinite(result.xyz).all())
+    check.equal(len(testpointcloud_mini.stratified_sample(3, voxel_size=0.5)), 3)
+
+
+@pytest.mark.parametrize("kwargs", [{"voxel_size": 0.0}, {"voxel_size": -1.0}, {"number_of_points": 5022}])
+def test_stratified_sample_wrong(kwargs: dict):
+    pc, _ = _stratified_pointcloud()
+    with pytest.raises(ValueError):
+        pc.stratified_sample(**{"number_of_points": 10, "voxel_size": 1.0} | kwargs)
+
+
+@pytest.mark.slow
+def test_sampling_benchmark():
+    """Benchmark: farthest point and stratified sampling of two million points."""
+    rng = np.random.default_rng(0)
+    xyz = rng.normal(size=(2_000_000, 3)) * [20.0, 20.0, 2.0]
+    pc = PointCloud({"x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2]})
+    farthest = pc.farthest_point_sample(4096)
+    stratified = pc.stratified_sample(100_000, voxel_size=1.0)
+    check.equal(len(farthest), 4096)
+    check.equal(len(stratified), 100_000)
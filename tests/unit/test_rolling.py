@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from pointcloudset import Dataset, PointCloud
+from pointcloudset.pipeline.delayed_result import DelayedResult
+from pointcloudset.pipeline.rolling import Rolling, sliding_windows
+
+CALLS = {"frames": 0}
+
+
+def count_frames(pointcloud: PointCloud) -> PointCloud:
+    CALLS["frames"] += 1
+    return pointcloud
+
+
+def accumulate(pointclouds: list[PointCloud]) -> PointCloud:
+    return PointCloud(
+        pd.concat([pointcloud.data for pointcloud in pointclouds], ignore_index=True),
+        timestamp=pointclouds[-1].timestamp,
+    )
+
+
+def n_points(pointclouds: list[PointCloud]) -> int:
+    return sum(len(pointcloud) for pointcloud in pointclouds)
+
+
+def remove_all(pointclouds: list[PointCloud]) -> PointCloud:
+    return pointclouds[-1].limit("x", 10.0, 11.0)
+
+
+@pytest.fixture
+def dataset(testdataset_small_frames: Dataset) -> Dataset:
+    return testdataset_small_frames[0:23]
+
+
+def test_sliding_windows():
+    windows = list(sliding_windows(range(10), 4, 3))
+    check.equal(windows, [[0, 1, 2, 3], [3, 4, 5, 6], [6, 7, 8, 9]])
+    check.equal(list(sliding_windows(range(3), 1)), [[0], [1], [2]])
+    check.equal(list(sliding_windows(range(3), 4)), [])
+
+
+@pytest.mark.parametrize("window, step", [(1, 1), (3, 1), (4, 3), (2, 5)])
+def test_rolling_iter(dataset: Dataset, window: int, step: int):
+    rolling = dataset.rolling(window, step)
+    check.is_instance(rolling, Rolling)
+    windows = list(rolling)
+    check.equal(len(windows), len(rolling))
+    for i, pointclouds in enumerate(windows):
+        check.equal(len(pointclouds), window)
+        for j, pointcloud in enumerate(pointclouds):
+            check.equal(pointcloud.timestamp, dataset.timestamps[i * step + j])
+            pd.testing.assert_frame_equal(pointcloud.data, dataset[i * step + j].data)
+
+
+def test_rolling_apply(dataset: Dataset):
+    res = dataset.rolling(4, step=3).apply(accumulate)
+    check.is_instance(res, Dataset)
+    check.equal(len(res), 7)
+    check.equal(res.timestamps, dataset.timestamps[3::3])
+    check.equal(res[1].timestamp, dataset.timestamps[6])
+    pd.testing.assert_frame_equal(res[1].data, accumulate([dataset[i] for i in range(3, 7)]).data)
+    check.not_equal(res.fingerprint, dataset.rolling(4, step=2).apply(accumulate).fingerprint)
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, "auto"])
+def test_rolling_apply_result(dataset: Dataset, batch_size):
+    res = dataset.rolling(3).apply(n_points, warn=False, batch_size=batch_size)
+    check.is_instance(res, DelayedResult)
+    check.equal(res.compute(), [60] * 21)
+
+
+def test_rolling_apply_empty(dataset: Dataset):
+    res = dataset.rolling(2).apply(remove_all)
+    check.equal(len(res[0]), 0)
+    check.equal(list(res[0].data.columns), ["x", "y", "z", "intensity"])
+
+
+def test_rolling_computes_frames_once(dataset: Dataset):
+    counted = dataset.apply(count_frames)
+    CALLS["frames"] = 0
+    list(counted.rolling(5))
+    check.equal(CALLS["frames"], len(dataset))
+    CALLS["frames"] = 0
+    counted.rolling(5).apply(n_points, warn=False, batch_size=4).compute()
+    check.equal(CALLS["frames"], len(dataset))
+
+
+def test_rolling_wrong(dataset: Dataset):
+    with pytest.raises(ValueError, match="window"):
+        dataset.rolling(0)
+    with pytest.raises(ValueError, match="step"):
+        dataset.rolling(2, step=0)
+    with pytest.raises(ValueError, match="larger"):
+        dataset.rolling(30).apply(n_points, warn=False)
@@ -0,0 +1,83 @@
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from pointcloudset import Dataset, PointCloud
+
+
+def count_points(total: int, pointcloud: PointCloud) -> tuple[int, int]:
+    return total + len(pointcloud), len(pointcloud)
+
+
+def crop(total: int, pointcloud: PointCloud, limit: float = 0.0) -> tuple[int, PointCloud]:
+    return total + 1, pointcloud.limit("x", limit, limit + 1.0)
+
+
+def previous_timestamp(previous, pointcloud: PointCloud):
+    return pointcloud.timestamp, previous
+
+
+def slow_read(pointcloud: PointCloud) -> PointCloud:
+    time.sleep(0.02)
+    return pointcloud
+
+
+def slow_step(state: int, pointcloud: PointCloud) -> tuple[int, None]:
+    time.sleep(0.02)
+    return state + 1, None
+
+
+@pytest.fixture
+def dataset(testdataset_small_frames: Dataset) -> Dataset:
+    return testdataset_small_frames[0:15]
+
+
+def test_scan(dataset: Dataset):
+    total, outputs = dataset.scan(count_points, 0)
+    check.equal(outputs, [len(pointcloud) for pointcloud in dataset])
+    check.equal(total, sum(outputs))
+    _, previous = dataset.scan(previous_timestamp, None, max_in_flight=1)
+    check.equal(previous, [None, *dataset.timestamps[:-1]])
+
+
+def test_scan_kwargs(dataset: Dataset):
+    n, outputs = dataset.scan(crop, 0, limit=0.5)
+    check.equal(n, len(dataset))
+    check.equal(len(outputs[3]), len(dataset[3].limit("x", 0.5, 1.5)))
+
+
+def test_scan_output_dir(dataset: Dataset, tmp_path: Path):
+    _, outputs = dataset.scan(crop, 0, limit=0.9)
+    check.is_true(any(len(pointcloud) == 0 for pointcloud in outputs))
+    n, written = dataset.scan(crop, 0, output_dir=tmp_path.joinpath("out"), limit=0.9)
+    check.equal(n, len(dataset))
+    check.is_instance(written, Dataset)
+    check.equal(written.timestamps, dataset.timestamps)
+    check.equal(written.execution, dataset.execution)
+    for should, pointcloud in zip(outputs, written, strict=True):
+        pd.testing.assert_frame_equal(pointcloud.data, should.data)
+
+
+def test_scan_output_dir_all_empty(dataset: Dataset, tmp_path: Path):
+    _, written = dataset.scan(crop, 0, output_dir=tmp_path, limit=2.0)
+    check.equal([len(pointcloud) for pointcloud in written], [0] * len(dataset))
+
+
+def test_scan_wrong(dataset: Dataset, tmp_path: Path):
+    with pytest.raises(TypeError, match="PointCloud"):
+        dataset.scan(count_points, 0, output_dir=tmp_path.joinpath("out"))
+    with pytest.raises(ValueError, match="not empty"):
+        dataset.scan(crop, 0, output_dir=tmp_path)
+    with pytest.raises(ValueError, match="filename"):
+        dataset.scan(crop, 0, output_dir=tmp_path.joinpath("out.parquet"))
+
+
+@pytest.mark.slow
+def test_scan_benchmark(dataset: Dataset):
+    """Benchmark: reading ahead overlaps with the sequential step."""
+    slow = dataset.apply(slow_read).with_execution("threads", num_workers=4)
+    n, _ = slow.scan(slow_step, 0)
+    check.equal(n, len(dataset))
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from pointcloudset import Dataset, PointCloud
+from pointcloudset.pipeline.sketch import QuantileSketch, _batch_sketches, _merge_sketches
+
+QUANTILES = [0.001, 0.01, 0.1, 0.5, 0.9, 0.99, 0.999]
+
+
+def _rank_error(values: np.ndarray, estimates: np.ndarray, q: list[float]) -> np.ndarray:
+    return np.abs(np.searchsorted(np.sort(values), estimates) / len(values) - np.asarray(q))
+
+
+def test_sketch_exact():
+    values = np.random.default_rng(0).normal(size=1000)
+    sketch = QuantileSketch().update(values)
+    np.testing.assert_allclose(sketch.quantile(QUANTILES), np.quantile(values, QUANTILES))
+    check.equal(sketch.quantile(0.0), values.min())
+    check.equal(sketch.quantile(1.0), values.max())
+    check.equal(len(sketch), 1000)
+
+
+def test_sketch_accuracy():
+    values = np.random.default_rng(1).standard_normal(1_000_000)
+    sketch = QuantileSketch(k=1024)
+    for part in np.array_split(values, 100):
+        sketch.merge(QuantileSketch(k=1024).update(part))
+    check.less(sum(len(items) for items in sketch.levels), 3 * 1024)
+    check.less(np.max(_rank_error(values, sketch.quantile(QUANTILES), QUANTILES)), 4 / 1024)
+    check.equal(sketch.quantile(0.0), values.min())
+    check.equal(sketch.quantile(1.0), values.max())
+
+
+def test_sketch_nan_and_empty():
+    check.is_true(np.isnan(QuantileSketch().quantile(0.5)))
+    sketch = QuantileSketch().update(np.array([1.0, np.nan, 3.0]))
+    check.equal(len(sketch), 2)
+    check.equal(sketch.quantile(0.5), 2.0)
+    check.equal(QuantileSketch().merge(sketch).quantile(0.5), 2.0)
+
+
+def test_merge_sketches_unchanged():
+    batches = [
+        _batch_sketches([pd.DataFrame({"x": part})], ["x"], 16, np.array([i]))
+        for i, part in enumerate(np.split(np.arange(300.0), 3))
+    ]
+    levels = [[items.copy() for items in batch["x"].levels] for batch in batches]
+    merged = _merge_sketches(batches)
+    check.equal(len(merged["x"]), 300)
+    for batch, batch_levels in zip(batches, levels, strict=True):
+        check.equal(len(batch["x"]), 100)
+        for items, expected in zip(batch["x"].levels, batch_levels, strict=True):
+            np.testing.assert_array_equal(items, expected)
+
+
+def test_batch_sketches_seed():
+    frames = [pd.DataFrame({"x": np.arange(1000.0)})]
+    offsets = {tuple(_batch_sketches(frames, ["x"], 16, np.array([number]))["x"].levels[-1]) for number in range(8)}
+    check.greater(len(offsets), 1)
+    np.testing.assert_array_equal(
+        np.concatenate(_batch_sketches(frames, ["x"], 16, np.array([3]))["x"].levels),
+        np.concatenate(_batch_sketches(frames, ["x"], 16, np.array([3]))["x"].levels),
+    )
+
+
+def test_sketch_wrong():
+    with pytest.raises(ValueError, match="k must be"):
+        QuantileSketch(k=2)
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        QuantileSketch().quantile(1.5)
+    with pytest.raises(ValueError, match="merge"):
+        QuantileSketch(k=16).merge(QuantileSketch(k=32).update(np.ones(3)))
+
+
+def test_dataset_quantile(testdataset_original_id: Dataset):
+    all_points = pd.concat([pointcloud.data for pointcloud in testdataset_original_id])
+    res = testdataset_original_id.quantile(0.9)
+    check.is_instance(res, pd.Series)
+    check.equal(list(res.index), ["x", "y", "z", "intensity"])
+    pd.testing.assert_series_equal(res, all_points[["x", "y", "z", "intensity"]].quantile(0.9))
+    res = testdataset_original_id.quantile([0.0, 0.5, 1.0], ["x", "intensity"])
+    check.is_instance(res, pd.DataFrame)
+    pd.testing.assert_frame_equal(res, all_points[["x", "intensity"]].quantile([0.0, 0.5, 1.0]))
+
+
+def test_dataset_quantile_large(testdataset_small_frames: Dataset):
+    all_points = pd.concat([pointcloud.data for pointcloud in testdataset_small_frames])
+    res = testdataset_small_frames.quantile(QUANTILES, "intensity", k=256)
+    check.less(np.max(_rank_error(all_points.intensity.to_numpy(), res.intensity.to_numpy(), QUANTILES)), 4 / 256)
+
+
+def test_dataset_quantile_wrong(testdataset_original_id: Dataset):
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        testdataset_original_id.quantile(99)
+    with pytest.raises(ValueError, match="does not exist"):
+        testdataset_original_id.quantile(0.5, "range")
+
+
+def test_dataset_histogram(testdataset_original_id: Dataset):
+    all_points = pd.concat([pointcloud.data for pointcloud in testdataset_original_id])
+    counts, edges = testdataset_original_id.histogram("x", bins=7)
+    should_counts, should_edges = np.histogram(all_points.x, bins=7)
+    np.testing.assert_array_equal(counts, should_counts)
+    np.testing.assert_allclose(edges, should_edges)
+    res = testdataset_original_id.histogram(bins=np.array([-1.0, 0.0, 1.0]))
+    check.equal(list(res), ["x", "y", "z", "intensity"])
+    intensity = all_points.intensity.dropna()
+    np.testing.assert_array_equal(res["intensity"][0], np.histogram(intensity, bins=[-1.0, 0.0, 1.0])[0])
+    counts, _ = testdataset_original_id.histogram("y", bins=4, range=(0.0, 1.0))
+    np.testing.assert_array_equal(counts, np.histogram(all_points.y, bins=4, range=(0.0, 1.0))[0])
+
+
+def test_dataset_histogram_wrong(testdataset_original_id: Dataset):
+    with pytest.raises(ValueError, match="bins"):
+        testdataset_original_id.histogram("x", bins=0)
+    with pytest.raises(ValueError, match="bins"):
+        testdataset_original_id.histogram("x", bins=np.array([1.0, 0.0]))
+
+
+def test_dataset_quantile_filter(testdataset_original_id: Dataset):
+    cut_value = testdataset_original_id.quantile(0.75, "x")["x"]
+    res = testdataset_original_id.quantile_filter("x", ">=", 0.75)
+    check.is_instance(res, Dataset)
+    check.equal(len(res), len(testdataset_original_id))
+    for pointcloud, filtered in zip(testdataset_original_id, res, strict=True):
+        check.equal(len(filtered), int((pointcloud.data.x >= cut_value).sum()))
+
+
+def test_quantile_filter_cut_value(testdataset_original_id: Dataset):
+    pointcloud: PointCloud = testdataset_original_id[0]
+    res = pointcloud.filter("quantile", "x", "<", cut_value=0.0)
+    check.equal(len(res), int((pointcloud.data.x < 0.0).sum()))
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from pointcloudset import Dataset
+from pointcloudset.pipeline.time_groupby import TimeGroupBy
+
+
+def _all_points(dataset: Dataset) -> pd.DataFrame:
+    frames = []
+    for pointcloud in dataset:
+        data = pointcloud.data.drop(columns="original_id", errors="ignore")
+        frames.append(data.set_index(pd.DatetimeIndex([pointcloud.timestamp] * len(data), name="timestamp")))
+    return pd.concat(frames)
+
+
+@pytest.mark.parametrize(
+    "agg",
+    ["mean", ["count", "sum", "min", "max", "std", "var"], {"x": "max", "intensity": "mean"}, {"y": ["min", "std"]}],
+)
+def test_groupby_time_agg(testdataset_original_id: Dataset, agg):
+    res = testdataset_original_id.groupby_time("500ms").agg(agg)
+    should = _all_points(testdataset_original_id).resample("500ms").agg(agg)
+    pd.testing.assert_frame_equal(res[should.columns], should, check_dtype=False, check_freq=False)
+    check.equal(list(res.index), list(should.index))
+
+
+def test_groupby_time_counts(testdataset_small_frames: Dataset):
+    grouped = testdataset_small_frames.groupby_time("1s")
+    check.is_instance(grouped, TimeGroupBy)
+    check.equal(len(grouped), 200)
+    res = grouped.agg(["min", "max"])
+    check.equal(list(res["pointclouds"]), [10] * 200)
+    check.equal(list(res["N"]), [200] * 200)
+    check.equal(res.index[1] - res.index[0], pd.Timedelta("1s"))
+
+
+def test_groupby_time_empty_bins(testdataset_original_id: Dataset):
+    dataset = testdataset_original_id[[0, 1, 29]]
+    res = dataset.groupby_time("1s").agg(["count", "mean"])
+    check.equal(len(res), 3)
+    check.equal(list(res["pointclouds"]), [2, 0, 1])
+    check.equal(res[("x", "count")].iloc[1], 0)
+    check.is_true(pd.isna(res[("x", "mean")].iloc[1]))
+
+
+def test_groupby_time_wrong(testdataset_original_id: Dataset):
+    with pytest.raises(ValueError, match="statistics"):
+        testdataset_original_id.groupby_time("1s").agg("median")
+    with pytest.raises(ValueError, match="statistics"):
+        testdataset_original_id.groupby_time("1s").agg({"range": "mean"})
+    with pytest.raises(ValueError):
+        testdataset_original_id.groupby_time("fast")
+    with pytest.raises(ValueError, match="empty"):
+        testdataset_original_id[[]].groupby_time("1s")